@@ -0,0 +1,122 @@
+import asyncio
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+import time
+import uuid
+from typing import AsyncIterator, Dict, List, Optional
+
+import aiofiles
+from PIL import Image
+
+from application.domain.attachment import Attachment
+from application.port.outbound.attachment_port import AttachmentPort
+from common.core.container.annotate import component
+from common.core.logger import get_logger
+from common.utils.json_file_util import JSONFileUtil
+
+logger = get_logger(__name__)
+
+
+@component
+class AttachmentStore(AttachmentPort):
+    """
+    内容寻址的附件存储：文件按 sha256 保存在 uploads/blobs/{前2位}/{3-4位}/{sha256}，
+    相同内容只保存一份，附件元数据保存在 uploads/blobs/attachments.json
+    """
+
+    blob_dir = "uploads/blobs"
+    tmp_dir = "uploads/blobs/tmp"
+    attachments_file_url = "uploads/blobs/attachments.json"
+    _blob_pattern = re.compile(r"(?:^|[\\/])blobs[\\/][0-9a-f]{2}[\\/][0-9a-f]{2}[\\/]([0-9a-f]{64})$")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def _blob_path(self, attachment_id: str) -> str:
+        return f"{self.blob_dir}/{attachment_id[:2]}/{attachment_id[2:4]}/{attachment_id}"
+
+    @staticmethod
+    def _image_size(path: str) -> tuple[Optional[int], Optional[int]]:
+        """只读取图片头获取尺寸，不解码像素"""
+        try:
+            with Image.open(path) as image:
+                return image.width, image.height
+        except Exception as e:
+            logger.warning(f"读取图片尺寸失败[{path}]：{e}")
+            return None, None
+
+    async def save(self, chunks: AsyncIterator[bytes], filename: Optional[str] = None, mime_type: Optional[str] = None) -> Attachment:
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        tmp_file = f"{self.tmp_dir}/{uuid.uuid4()}"
+        sha256 = hashlib.sha256()
+        size = 0
+        try:
+            async with aiofiles.open(tmp_file, 'wb') as out_file:
+                async for chunk in chunks:
+                    sha256.update(chunk)
+                    size += len(chunk)
+                    await out_file.write(chunk)
+            attachment_id = sha256.hexdigest()
+            # 元数据文件读写和图片尺寸读取都是同步 I/O，在线程中执行，不阻塞事件循环
+            attachment = await asyncio.to_thread(self._commit, tmp_file, attachment_id, size, filename, mime_type)
+        finally:
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+        logger.info(f"保存附件[{attachment_id}]：{size} 字节{'，内容重复' if attachment.deduplicated else ''}")
+        return attachment
+
+    def _commit(self, tmp_file: str, attachment_id: str, size: int, filename: Optional[str], mime_type: Optional[str]) -> Attachment:
+        """临时文件移入内容寻址路径并保存元数据，内容已存在时丢弃临时文件"""
+        path = self._blob_path(attachment_id)
+        with self._lock:
+            attachments = JSONFileUtil(self.attachments_file_url)
+            existing = attachments.read_key(attachment_id)
+            deduplicated = existing is not None and os.path.exists(path)
+            if deduplicated:
+                attachment = Attachment.model_validate(existing)
+                os.remove(tmp_file)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_file, path)
+                if not mime_type or mime_type == "application/octet-stream":
+                    mime_type = mimetypes.guess_type(filename or "")[0] or mime_type
+                width, height = self._image_size(path) if mime_type and mime_type.startswith("image/") else (None, None)
+                attachment = Attachment(id=attachment_id, path=path, filename=filename, mime_type=mime_type,
+                                        size=size, width=width, height=height)
+            attachment.uploaded = int(time.time())
+            attachments.update_key(attachment_id, attachment.model_dump(exclude={"deduplicated"}))
+        attachment.deduplicated = deduplicated
+        return attachment
+
+    def load(self, attachment_id: str) -> Optional[Attachment]:
+        attachment = JSONFileUtil(self.attachments_file_url).read_key(attachment_id)
+        if attachment:
+            return Attachment.model_validate(attachment)
+        return None
+
+    def attachment_id(self, path: str) -> Optional[str]:
+        match = self._blob_pattern.search(path)
+        return match.group(1) if match else None
+
+    def collect_garbage(self, ref_counts: Dict[str, int], grace_seconds: int) -> List[str]:
+        removed: List[str] = []
+        now = int(time.time())
+        with self._lock:
+            attachments = JSONFileUtil(self.attachments_file_url)
+            data = attachments.read()
+            for attachment_id, attachment in list(data.items()):
+                ref_count = ref_counts.get(attachment_id, 0)
+                if ref_count > 0 or now - attachment.get("uploaded", 0) < grace_seconds:
+                    attachment["ref_count"] = ref_count
+                    continue
+                path = self._blob_path(attachment_id)
+                if os.path.exists(path):
+                    os.remove(path)
+                del data[attachment_id]
+                removed.append(attachment_id)
+            attachments.write(data)
+        logger.info(f"附件垃圾回收：删除 {len(removed)} 个附件")
+        return removed
@@ -1,14 +1,30 @@
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterator, Tuple
 import jsonlines
-from common.utils.file_util import check_file_and_create, del_file, check_file
-from common.core.container.annotate import component
+import os
+from common.utils.file_util import check_file_and_create, del_file
+from common.utils.jsonl_log_util import JsonlLog
+from common.core.container.annotate import conditional_on_env
+from common.utils.common_utils import CONVERSATION_STORE_ENV_KEY
 from application.domain.conversation import Conversation, DialogSegment
 from application.port.outbound.conversation_port import ConversationPort
+from adapter.conversation.conversation_summary_index import ConversationSummaryIndex
+from adapter.conversation.conversation_cache import ConversationCache
+from common.core.metrics import register_metrics
 
-@component
+@conditional_on_env(CONVERSATION_STORE_ENV_KEY, "jsonl", match_if_missing=True)
 class ConversationAdapter(ConversationPort):
 
+    def __init__(self):
+        # 对话片段和agent记录均为追加写日志，修改和删除以操作记录追加
+        self.dialog_segment_log = JsonlLog(key_field="id")
+        self.agent_record_log = JsonlLog(key_field="id")
+        # 会话列表摘要索引，随写操作同步更新
+        self.summary_index = ConversationSummaryIndex(self.dialog_segment_log)
+        # 已解析会话的缓存，追加片段时增量更新
+        self.conversation_cache = ConversationCache(maxsize=int(os.environ.get("EFFLUX_CONVERSATION_CACHE_SIZE", "32")))
+        register_metrics("conversation_cache", self.conversation_cache.stats)
+
     def conversation_update(self, conversation: Conversation) -> Optional[Conversation]:
         conversation_file = f'conversations/conversations_list.jsonl'
         updated = False
@@ -29,6 +45,8 @@ class ConversationAdapter(ConversationPort):
             with jsonlines.open(conversation_file, mode='w') as writer:
                 for updated_conversation in updated_conversations:
                     writer.write(updated_conversation.model_dump())  # 将对象写为字典
+            self.summary_index.on_conversation_update(conversation)
+            self.conversation_cache.update_theme(conversation.id, conversation.theme)
             return conversation  # 返回更新后的会话对象
         else:
             return None  # 如果没有找到匹配的会话对象，则返回 None
@@ -36,90 +54,77 @@ class ConversationAdapter(ConversationPort):
 
     def conversation_add(self, dialog_segment: DialogSegment) -> DialogSegment:
         dialog_segment_file = f'conversations/{dialog_segment.conversation_id}.jsonl'
-        check_file_and_create(dialog_segment_file)
-        with jsonlines.open(dialog_segment_file, mode='a') as writer:
-            writer.write(dialog_segment.model_dump())
+        previous_size = self.dialog_segment_log.size(dialog_segment_file)
+        dialog_segment_dump = dialog_segment.to_record()
+        self.dialog_segment_log.append(dialog_segment_file, dialog_segment_dump)
+        self.summary_index.on_dialog_segment_add(dialog_segment, dialog_segment_dump, previous_size)
+        self.conversation_cache.append(dialog_segment_dump, previous_size, self.dialog_segment_log.size(dialog_segment_file))
         return dialog_segment
 
     def dialog_segment_remove(self, conversation_id: str, dialog_segment_id: str) -> str:
         dialog_segment_file = f'conversations/{conversation_id}.jsonl'
-        segments = []
-
-        # 读取现有对话段
-        with jsonlines.open(dialog_segment_file, mode='r') as reader:
-            for obj in reader:
-                # 将对象转换为 DialogSegment
-                history_dialog_segment = DialogSegment.model_validate(obj)
-                # 检查 ID，跳过待删除的段
-                if history_dialog_segment.id != dialog_segment_id:
-                    segments.append(history_dialog_segment)
-
-        # 重写文件，排除待删除的段
-        with jsonlines.open(dialog_segment_file, mode='w') as writer:
-            if len(segments) == 1: # 对话片段仅为一条的时候删除会话
-                self.conversation_remove(conversation_id=conversation_id)
-            else:
-                for segment in segments:
-                    writer.write(segment.model_dump())  # 写入更新后的数据
-
+        # 追加删除记录，不再重写整个文件
+        self.dialog_segment_log.delete(dialog_segment_file, dialog_segment_id)
+        self.conversation_cache.invalidate(conversation_id)
+        if self.dialog_segment_log.count(dialog_segment_file) == 1: # 对话片段仅为一条的时候删除会话
+            self.conversation_remove(conversation_id=conversation_id)
+        else:
+            self.summary_index.on_dialog_segments_change(conversation_id)
         return dialog_segment_id
 
     def dialog_segment_find(self, conversation_id: str, dialog_segment_id) -> Optional[DialogSegment]:
         dialog_segment_file = f'conversations/{conversation_id}.jsonl'
-
-        # 读取现有对话段
-        with jsonlines.open(dialog_segment_file, mode='r') as reader:
-            for obj in reader:
-                # 将对象转换为 DialogSegment
-                history_dialog_segment = DialogSegment.model_validate(obj)
-                # 检查 ID，跳过待删除的段
-                if history_dialog_segment.id == dialog_segment_id:
-                    return history_dialog_segment
-
+        for obj in self.dialog_segment_log.read(dialog_segment_file):
+            if obj.get("id") == dialog_segment_id:
+                return DialogSegment.from_record(obj)
         return None
 
     def update_conversation_record(self, conversation_id: str, updated_segments: List[DialogSegment]):
-            dialog_segment_file = f'conversations/{conversation_id}.jsonl'
-            # 写入更新后的记录
-            with jsonlines.open(dialog_segment_file, mode='w') as writer:
-                for segment in updated_segments:
-                    writer.write(segment.model_dump())
+        dialog_segment_file = f'conversations/{conversation_id}.jsonl'
+        # 只追加有变化的片段
+        self.dialog_segment_log.replace_all(dialog_segment_file, [segment.to_record() for segment in updated_segments])
+        self.conversation_cache.invalidate(conversation_id)
+        self.summary_index.on_dialog_segments_change(conversation_id)
 
     def load_agent_record(self, agent_instance_id: str) -> List[DialogSegment]:
-        dialog_segment_list = []
         dialog_segment_file = f'conversations/agent/{agent_instance_id}.jsonl'
-        if not check_file(dialog_segment_file): # 不存在，返回空列表
-            return dialog_segment_list
-        with jsonlines.open(dialog_segment_file, mode='r') as reader:
-            for obj in reader:
-                dialog_segment_list.append(DialogSegment.model_validate(obj))
-        return dialog_segment_list
+        # 不存在时返回空列表
+        return [DialogSegment.from_record(obj) for obj in self.agent_record_log.read(dialog_segment_file)]
 
     def update_agent_record(self, agent_instance_id: str, updated_segments: List[DialogSegment]):
-            dialog_segment_file = f'conversations/agent/{agent_instance_id}.jsonl'
-            # 写入更新后的记录
-            with jsonlines.open(dialog_segment_file, mode='w') as writer:
-                for segment in updated_segments:
-                    writer.write(segment.model_dump())
+        dialog_segment_file = f'conversations/agent/{agent_instance_id}.jsonl'
+        self.agent_record_log.replace_all(dialog_segment_file, [segment.to_record() for segment in updated_segments])
 
     def add_agent_record(self, dialog_segment: DialogSegment) -> DialogSegment:
         dialog_segment_file = f'conversations/agent/{dialog_segment.payload['agent_instance_id']}.jsonl'
-        check_file_and_create(dialog_segment_file)
-        with jsonlines.open(dialog_segment_file, mode='a') as writer:
-            for key, value in dialog_segment.payload.items():
-                if isinstance(value, BaseModel):
-                    dialog_segment.payload[key] = value.model_dump()
-            writer.write(dialog_segment.model_dump())
+        for key, value in dialog_segment.payload.items():
+            if isinstance(value, BaseModel):
+                dialog_segment.payload[key] = value.model_dump()
+        self.agent_record_log.append(dialog_segment_file, dialog_segment.to_record())
         return dialog_segment
 
+    def agent_record_id_list(self) -> List[str]:
+        agent_record_dir = 'conversations/agent'
+        if not os.path.isdir(agent_record_dir):
+            return []
+        return [file_name[:-len('.jsonl')] for file_name in os.listdir(agent_record_dir) if file_name.endswith('.jsonl')]
+
     def conversation_save(self, conversation: Conversation) -> Conversation:
         conversation_file = f'conversations/conversations_list.jsonl'
         check_file_and_create(conversation_file)
         with jsonlines.open(conversation_file, mode='a') as writer:
             writer.write(conversation.model_dump())
+        self.summary_index.on_conversation_save(conversation)
         return conversation
 
-    def conversation_load(self, conversation_id: str) -> Optional[Conversation]:
+    def conversation_load(self, conversation_id: str, limit: Optional[int] = None, before: Optional[str] = None) -> Optional[Conversation]:
+        dialog_segment_file = f'conversations/{conversation_id}.jsonl'
+        if limit is None and before is None:
+            # 先取文件大小和修改时间再读取，读取期间有追加时缓存会在下次校验时失效
+            file_size, mtime_ns = self.dialog_segment_log.signature(dialog_segment_file)
+            conversation = self.conversation_cache.get(conversation_id, file_size, mtime_ns)
+            if conversation:
+                return conversation
         conversation_file = f'conversations/conversations_list.jsonl'
         conversation: Optional[Conversation] = None
         with jsonlines.open(conversation_file, mode='r') as reader:
@@ -129,32 +134,25 @@ class ConversationAdapter(ConversationPort):
         if not conversation:
             return None
 
-        dialog_segment_file = f'conversations/{conversation_id}.jsonl'
-        with jsonlines.open(dialog_segment_file, mode='r') as reader:
-            for obj in reader:
-                conversation.dialog_segment_list.append(DialogSegment.model_validate(obj))
+        if limit == 0: # 只加载会话信息
+            return conversation
+        if limit is None and before is None:
+            for obj in self.dialog_segment_log.read(dialog_segment_file):
+                conversation.dialog_segment_list.append(DialogSegment.from_record(obj))
+            self.conversation_cache.put(conversation, file_size, mtime_ns)
+            return conversation
+        dialog_segments, conversation.has_more = self.dialog_segment_iter(conversation_id, limit=limit, before=before)
+        conversation.dialog_segment_list = list(dialog_segments)
         return conversation
 
+    def dialog_segment_iter(self, conversation_id: str, limit: Optional[int] = None, before: Optional[str] = None) -> Tuple[Iterator[DialogSegment], bool]:
+        dialog_segment_file = f'conversations/{conversation_id}.jsonl'
+        objs, has_more = self.dialog_segment_log.read_page(dialog_segment_file, limit=limit, before=before)
+        return (DialogSegment.from_record(obj) for obj in objs), has_more
 
     def conversation_load_list(self) -> List[Conversation]:
-        conversation_file = f'conversations/conversations_list.jsonl'
-        conversation_list: List[Conversation] = []
-        check_file_and_create(conversation_file)
-        with jsonlines.open(conversation_file, mode='r') as reader:
-            for obj in reader:
-                conversation = Conversation.model_validate(obj)
-                if conversation:
-                    # 获取最后一条片段,用于列表展示
-                    dialog_segment_file = f'conversations/{conversation.id}.jsonl'
-                    if check_file(dialog_segment_file):
-                        with jsonlines.open(dialog_segment_file, mode='r') as sub_reader:
-                            dialog_segment_obj = None
-                            for sub_obj in sub_reader:
-                                dialog_segment_obj = sub_obj
-                            if dialog_segment_obj:
-                                conversation.last_dialog_segment = DialogSegment.model_validate(dialog_segment_obj)
-                        conversation_list.append(conversation)
-        return conversation_list
+        # 从摘要索引读取，不再逐个遍历会话片段文件
+        return self.summary_index.load_list()
 
     def conversation_remove(self, conversation_id: str) -> str:
         conversation_file = f'conversations/conversations_list.jsonl'
@@ -171,5 +169,8 @@ class ConversationAdapter(ConversationPort):
                 writer.write(conversation.model_dump())
         dialog_segment_file = f'conversations/{conversation_id}.jsonl'
         # 删除 dialog_segment_file 文件
+        self.dialog_segment_log.forget(dialog_segment_file)
         del_file(dialog_segment_file)
+        self.conversation_cache.invalidate(conversation_id)
+        self.summary_index.on_conversation_remove(conversation_id)
         return conversation_id
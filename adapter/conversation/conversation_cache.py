@@ -0,0 +1,89 @@
+from typing import Any, Dict, Optional
+import threading
+from cachetools import LRUCache
+from application.domain.conversation import Conversation, DialogSegment
+
+
+class _CacheEntry:
+
+    def __init__(self, conversation: Conversation, file_size: int, mtime_ns: Optional[int]):
+        self.conversation = conversation
+        # 缓存对应的片段文件大小（包含尚未写入的追加内容）和修改时间，不一致时视为失效
+        self.file_size = file_size
+        # 追加片段后文件尚未写入，修改时间未知，下次查询时记录
+        self.mtime_ns = mtime_ns
+
+
+class ConversationCache:
+    """
+    已解析会话的 LRU 缓存，按会话id缓存完整的会话和对话片段。
+    以片段文件大小和修改时间校验，通过适配器追加的片段增量更新缓存，避免每轮对话重新解析全部历史。
+    """
+
+    def __init__(self, maxsize: int = 32):
+        self._cache: LRUCache = LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._appends = 0
+
+    @staticmethod
+    def _copy(conversation: Conversation) -> Conversation:
+        """返回深拷贝，调用方原地修改片段的 payload、content、metadata、tool_calls 等不影响缓存"""
+        return conversation.model_copy(deep=True)
+
+    def get(self, conversation_id: str, file_size: int, mtime_ns: int) -> Optional[Conversation]:
+        with self._lock:
+            entry: Optional[_CacheEntry] = self._cache.get(conversation_id)
+            if entry is None or entry.file_size != file_size or entry.mtime_ns not in (None, mtime_ns):
+                self._misses += 1
+                return None
+            entry.mtime_ns = mtime_ns
+            self._hits += 1
+            return self._copy(entry.conversation)
+
+    def put(self, conversation: Conversation, file_size: int, mtime_ns: int):
+        with self._lock:
+            self._cache[conversation.id] = _CacheEntry(self._copy(conversation), file_size, mtime_ns)
+
+    def append(self, dialog_segment_dump: Dict[str, Any], previous_size: int, file_size: int):
+        """
+        追加对话片段
+        :param dialog_segment_dump: 已写入的片段字典
+        :param previous_size: 追加前的文件大小，与缓存不一致时丢弃缓存
+        :param file_size: 追加后的文件大小
+        """
+        conversation_id = dialog_segment_dump["conversation_id"]
+        with self._lock:
+            entry: Optional[_CacheEntry] = self._cache.get(conversation_id)
+            if entry is None:
+                return
+            if entry.file_size != previous_size:
+                self._cache.pop(conversation_id, None)
+                return
+            entry.conversation.dialog_segment_list.append(DialogSegment.from_record(dialog_segment_dump))
+            entry.file_size = file_size
+            entry.mtime_ns = None
+            self._appends += 1
+
+    def update_theme(self, conversation_id: str, theme: Optional[str]):
+        with self._lock:
+            entry: Optional[_CacheEntry] = self._cache.get(conversation_id)
+            if entry is not None:
+                entry.conversation.theme = theme
+
+    def invalidate(self, conversation_id: str):
+        with self._lock:
+            self._cache.pop(conversation_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "size": len(self._cache),
+                "max_size": self._cache.maxsize,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+                "incremental_appends": self._appends,
+            }
@@ -0,0 +1,75 @@
+"""
+jsonl 会话记录一次性导入 sqlite
+
+用法（在应用数据目录下执行）：python -m adapter.conversation.conversation_migrator
+"""
+from typing import Dict
+import sqlite3
+import json
+import os
+import jsonlines
+from common.utils.file_util import check_file
+from common.utils.jsonl_log_util import JsonlLog
+from application.domain.conversation import Conversation, DialogSegment
+from adapter.conversation.sqlite_conversation_adapter import SqliteConversationAdapter, SCHEMA, UPSERT_CONVERSATION, \
+    UPSERT_DIALOG_SEGMENT, INSERT_AGENT_RECORD
+from common.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+conversations_dir = "conversations"
+conversation_file = f"{conversations_dir}/conversations_list.jsonl"
+agent_record_dir = f"{conversations_dir}/agent"
+# 片段和agent记录文件为追加写日志，需合并读取
+dialog_segment_log = JsonlLog(key_field="id")
+
+
+def _dumps(data: dict) -> str:
+    return json.dumps(data, ensure_ascii=False)
+
+
+def migrate_jsonl_to_sqlite(conn: sqlite3.Connection) -> Dict[str, int]:
+    """
+    导入 conversations 目录下的会话列表、对话片段和agent记录，按主键覆盖写入，可重复执行
+    :param conn: 已建表的 sqlite 连接
+    :return: 各类记录的导入数量
+    """
+    counts = {"conversation": 0, "dialog_segment": 0, "agent_record": 0}
+    if not check_file(conversation_file):
+        return counts
+    logger.info("开始导入 jsonl 会话记录 -> sqlite")
+    with conn:
+        with jsonlines.open(conversation_file, mode='r') as reader:
+            for obj in reader:
+                conversation = Conversation.model_validate(obj)
+                conn.execute(UPSERT_CONVERSATION, (conversation.id, _dumps(conversation.model_dump())))
+                counts["conversation"] += 1
+                dialog_segment_file = f"{conversations_dir}/{conversation.id}.jsonl"
+                if not check_file(dialog_segment_file):
+                    continue
+                rows = []
+                for sub_obj in dialog_segment_log.read(dialog_segment_file):
+                    dialog_segment = DialogSegment.model_validate(sub_obj)
+                    rows.append((conversation.id, dialog_segment.id, _dumps(dialog_segment.model_dump())))
+                conn.executemany(UPSERT_DIALOG_SEGMENT, rows)
+                counts["dialog_segment"] += len(rows)
+        # agent 记录整体替换，避免重复执行时重复导入
+        if os.path.isdir(agent_record_dir):
+            for file_name in os.listdir(agent_record_dir):
+                if not file_name.endswith(".jsonl"):
+                    continue
+                agent_instance_id = file_name[:-len(".jsonl")]
+                rows = [(agent_instance_id, obj['id'], _dumps(DialogSegment.model_validate(obj).model_dump()))
+                        for obj in dialog_segment_log.read(f"{agent_record_dir}/{file_name}")]
+                conn.execute("DELETE FROM agent_record WHERE agent_instance_id = ?", (agent_instance_id,))
+                conn.executemany(INSERT_AGENT_RECORD, rows)
+                counts["agent_record"] += len(rows)
+    logger.info(f"jsonl 会话记录导入完成：{counts}")
+    return counts
+
+
+if __name__ == "__main__":
+    connection = sqlite3.connect(SqliteConversationAdapter.db_file_url)
+    connection.executescript(SCHEMA)
+    print(migrate_jsonl_to_sqlite(connection))
+    connection.close()
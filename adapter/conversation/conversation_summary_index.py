@@ -0,0 +1,232 @@
+from typing import Dict, Any, List, Optional
+import atexit
+import threading
+import json
+import os
+import jsonlines
+from application.domain.conversation import Conversation, DialogSegment
+from common.utils.file_util import check_file, read_last_line
+from common.utils.jsonl_log_util import JsonlLog, OP_KEY
+from common.utils.time_utils import create_from_second_now
+from common.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+SUMMARY_INDEX_VERSION = 2
+# 摘要需要按文件重新计算的标记，不会与真实文件大小相同
+STALE_FILE_SIZE = -1
+
+
+class ConversationSummaryIndex:
+    """
+    会话列表摘要索引（旁路文件），记录每个会话的主题、创建时间、最后一条片段和更新时间，
+    会话列表只需读取索引，不再逐个遍历会话片段文件。
+    索引缺失或与 jsonl 文件不一致时，按文件重新计算。
+    写操作只增量更新内存中的摘要，无法增量更新的会话标记为待重新计算，在读取会话列表时处理；
+    索引文件延迟合并写入，进程异常退出丢失的更新在下次读取时按文件大小校验后重新计算。
+    """
+
+    def __init__(self, dialog_segment_log: JsonlLog, conversations_dir: str = "conversations", persist_delay: float = 2):
+        """
+        :param dialog_segment_log: 对话片段日志
+        :param conversations_dir: 会话目录
+        :param persist_delay: 索引文件延迟写入的秒数，期间的多次更新合并为一次写入
+        """
+        self.dialog_segment_log = dialog_segment_log
+        self.conversations_dir = conversations_dir
+        self.conversation_file = f"{conversations_dir}/conversations_list.jsonl"
+        self.index_file = f"{conversations_dir}/conversations_summary.json"
+        self._lock = threading.RLock()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self.persist_delay = persist_delay
+        self._persist_timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
+
+    def _dialog_segment_file(self, conversation_id: str) -> str:
+        return f"{self.conversations_dir}/{conversation_id}.jsonl"
+
+    @staticmethod
+    def _file_stat(file_url: str) -> Optional[List[int]]:
+        try:
+            stat = os.stat(file_url)
+        except FileNotFoundError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _file_size(self, file_url: str) -> Optional[int]:
+        """片段文件大小（包含尚未写入的追加内容），文件不存在时返回 None"""
+        size = self.dialog_segment_log.size(file_url)
+        if not size and not os.path.exists(file_url):
+            return None
+        return size
+
+    def _ensure_loaded(self) -> Dict[str, Dict[str, Any]]:
+        """加载索引，会话列表文件在索引之外被修改过则整体重建"""
+        if self._entries is not None:
+            return self._entries
+        list_stat = self._file_stat(self.conversation_file)
+        if check_file(self.index_file):
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("version") == SUMMARY_INDEX_VERSION and data.get("list_stat") == list_stat:
+                    self._entries = data["conversations"]
+                    return self._entries
+            except Exception as e:
+                logger.warning(f"读取会话摘要索引失败，重新构建：{e}")
+        self._rebuild()
+        return self._entries
+
+    def _rebuild(self):
+        logger.info("构建会话摘要索引")
+        entries: Dict[str, Dict[str, Any]] = {}
+        if check_file(self.conversation_file):
+            with jsonlines.open(self.conversation_file, mode='r') as reader:
+                for obj in reader:
+                    conversation = Conversation.model_validate(obj)
+                    entry = self._make_entry(conversation)
+                    self._refresh_from_file(entry)
+                    entries[conversation.id] = entry
+        self._entries = entries
+        self._schedule_persist()
+
+    @staticmethod
+    def _make_entry(conversation: Conversation) -> Dict[str, Any]:
+        return {
+            "id": conversation.id,
+            "theme": conversation.theme,
+            "created": conversation.created.isoformat() if conversation.created else None,
+            "type": conversation.type,
+            "last_dialog_segment": None,
+            "updated_at": None,
+            "file_size": None,
+        }
+
+    def _refresh_from_file(self, entry: Dict[str, Any]):
+        """
+        按片段文件的最后一条记录重新计算该会话的摘要，只在读取路径调用。
+        最后一行是普通记录时反向读取该行即可，是更新或删除记录时才合并整个文件
+        """
+        dialog_segment_file = self._dialog_segment_file(entry["id"])
+        file_size = self._file_size(dialog_segment_file)
+        entry["file_size"] = file_size
+        if file_size is None:
+            entry["last_dialog_segment"] = None
+            return
+        with self.dialog_segment_log.lock(dialog_segment_file):
+            self.dialog_segment_log.flush(dialog_segment_file)
+            last_line = read_last_line(dialog_segment_file)
+        if last_line is None or not last_line.startswith(f'{{"{OP_KEY}"'):
+            entry["last_dialog_segment"] = json.loads(last_line) if last_line else None
+        else:
+            page, _ = self.dialog_segment_log.read_page(dialog_segment_file, limit=1)
+            last_objs = list(page)
+            entry["last_dialog_segment"] = last_objs[-1] if last_objs else None
+        entry["updated_at"] = create_from_second_now().isoformat()
+
+    def _schedule_persist(self):
+        """延迟写入索引文件，调用方持有锁"""
+        if self._persist_timer is None:
+            self._persist_timer = threading.Timer(self.persist_delay, self.flush)
+            self._persist_timer.daemon = True
+            self._persist_timer.start()
+
+    def flush(self):
+        """立即写入尚未写入的索引更新"""
+        with self._lock:
+            if self._persist_timer is None:
+                return
+            self._persist_timer.cancel()
+            self._persist_timer = None
+            self._persist()
+
+    def _persist(self):
+        """整体写入临时文件后替换，避免写入中断导致索引损坏"""
+        os.makedirs(self.conversations_dir, exist_ok=True)
+        data = {
+            "version": SUMMARY_INDEX_VERSION,
+            "list_stat": self._file_stat(self.conversation_file),
+            "conversations": self._entries,
+        }
+        tmp_file = f"{self.index_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_file, self.index_file)
+
+    def on_conversation_save(self, conversation: Conversation):
+        with self._lock:
+            entries = self._ensure_loaded()
+            entry = self._make_entry(conversation)
+            entry["file_size"] = STALE_FILE_SIZE
+            entries[conversation.id] = entry
+            self._schedule_persist()
+
+    def on_conversation_update(self, conversation: Conversation):
+        with self._lock:
+            entries = self._ensure_loaded()
+            entry = entries.get(conversation.id)
+            if entry:
+                entry["theme"] = conversation.theme
+            self._schedule_persist()
+
+    def on_conversation_remove(self, conversation_id: str):
+        with self._lock:
+            entries = self._ensure_loaded()
+            entries.pop(conversation_id, None)
+            self._schedule_persist()
+
+    def on_dialog_segment_add(self, dialog_segment: DialogSegment, dialog_segment_dump: Dict[str, Any], previous_size: Optional[int]):
+        """
+        追加对话片段后增量更新摘要
+        :param dialog_segment: 追加的对话片段
+        :param dialog_segment_dump: 已写入文件的片段字典
+        :param previous_size: 追加前片段文件的大小，与索引记录不一致时标记为待重新计算
+        """
+        with self._lock:
+            entries = self._ensure_loaded()
+            entry = entries.get(dialog_segment.conversation_id)
+            if not entry:
+                return
+            if (entry["file_size"] or 0) != previous_size:
+                entry["file_size"] = STALE_FILE_SIZE
+            else:
+                entry["last_dialog_segment"] = dialog_segment_dump
+                entry["updated_at"] = create_from_second_now().isoformat()
+                entry["file_size"] = self._file_size(self._dialog_segment_file(dialog_segment.conversation_id))
+            self._schedule_persist()
+
+    def on_dialog_segments_change(self, conversation_id: str):
+        """片段被删除或更新后标记为待重新计算"""
+        with self._lock:
+            entries = self._ensure_loaded()
+            entry = entries.get(conversation_id)
+            if not entry:
+                return
+            entry["file_size"] = STALE_FILE_SIZE
+            self._schedule_persist()
+
+    def load_list(self) -> List[Conversation]:
+        """按会话创建顺序返回会话列表，片段文件大小与索引不一致的会话按文件末尾重建摘要"""
+        with self._lock:
+            entries = self._ensure_loaded()
+            stale = False
+            conversation_list: List[Conversation] = []
+            for entry in entries.values():
+                file_size = self._file_size(self._dialog_segment_file(entry["id"]))
+                if file_size != entry["file_size"]:
+                    self._refresh_from_file(entry)
+                    stale = True
+                if file_size is None:
+                    continue
+                conversation = Conversation.model_validate({
+                    "id": entry["id"],
+                    "theme": entry["theme"],
+                    "created": entry["created"],
+                    "type": entry["type"],
+                })
+                if entry["last_dialog_segment"]:
+                    conversation.last_dialog_segment = DialogSegment.from_record(entry["last_dialog_segment"])
+                conversation_list.append(conversation)
+            if stale:
+                self._schedule_persist()
+        return conversation_list
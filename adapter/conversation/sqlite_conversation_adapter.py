@@ -0,0 +1,232 @@
+from pydantic import BaseModel
+from typing import List, Optional, Iterator, Tuple
+import threading
+import sqlite3
+import json
+import os
+from common.core.container.annotate import conditional_on_env
+from common.utils.common_utils import CONVERSATION_STORE_ENV_KEY
+from common.utils.file_util import check_file
+from application.domain.conversation import Conversation, DialogSegment
+from application.port.outbound.conversation_port import ConversationPort
+from common.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 对话片段以(会话id, 片段id)唯一，seq保持写入顺序（VACUUM 不会重新编号）
+CREATE_DIALOG_SEGMENT = """
+CREATE TABLE IF NOT EXISTS dialog_segment (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    conversation_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    UNIQUE (conversation_id, id)
+)"""
+CREATE_DIALOG_SEGMENT_INDEX = "CREATE INDEX IF NOT EXISTS idx_dialog_segment_conversation_seq ON dialog_segment (conversation_id, seq)"
+
+# 建表语句，会话以id为主键
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS conversation (
+    id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+{CREATE_DIALOG_SEGMENT};
+{CREATE_DIALOG_SEGMENT_INDEX};
+CREATE TABLE IF NOT EXISTS agent_record (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent_instance_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_agent_record_instance ON agent_record (agent_instance_id);
+"""
+
+UPSERT_CONVERSATION = (
+    "INSERT INTO conversation (id, data) VALUES (?, ?) "
+    "ON CONFLICT(id) DO UPDATE SET data = excluded.data"
+)
+UPSERT_DIALOG_SEGMENT = (
+    "INSERT INTO dialog_segment (conversation_id, id, data) VALUES (?, ?, ?) "
+    "ON CONFLICT(conversation_id, id) DO UPDATE SET data = excluded.data"
+)
+INSERT_AGENT_RECORD = "INSERT INTO agent_record (agent_instance_id, id, data) VALUES (?, ?, ?)"
+
+
+def dumps(data: dict) -> str:
+    return json.dumps(data, ensure_ascii=False)
+
+
+@conditional_on_env(CONVERSATION_STORE_ENV_KEY, "sqlite")
+class SqliteConversationAdapter(ConversationPort):
+    """
+    基于 sqlite 的会话存储，按主键单行读写，替代全量扫描的 jsonl 文件
+    """
+
+    db_file_url = "conversations/conversations.db"
+
+    def __init__(self):
+        new_db = not check_file(self.db_file_url)
+        os.makedirs(os.path.dirname(self.db_file_url), exist_ok=True)
+        # 事件处理器在多个线程中调用，共享连接并由锁串行化
+        self._conn = sqlite3.connect(self.db_file_url, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._upgrade_schema()
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        # 首次创建数据库时导入已有的 jsonl 会话记录
+        if new_db:
+            from adapter.conversation.conversation_migrator import migrate_jsonl_to_sqlite # 延迟导入，避免循环依赖
+            migrate_jsonl_to_sqlite(self._conn)
+
+    def _upgrade_schema(self):
+        """旧版本的对话片段表按隐式 rowid 排序，重建为带 seq 列的表，按原顺序复制数据"""
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(dialog_segment)").fetchall()]
+        if not columns or "seq" in columns:
+            return
+        logger.info("升级对话片段表，增加 seq 列")
+        # 表结构变更和数据复制在同一个事务中完成
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.execute("DROP INDEX IF EXISTS idx_dialog_segment_conversation")
+            self._conn.execute("ALTER TABLE dialog_segment RENAME TO dialog_segment_old")
+            self._conn.execute(CREATE_DIALOG_SEGMENT)
+            self._conn.execute(CREATE_DIALOG_SEGMENT_INDEX)
+            self._conn.execute("INSERT INTO dialog_segment (conversation_id, id, data) "
+                               "SELECT conversation_id, id, data FROM dialog_segment_old ORDER BY rowid")
+            self._conn.execute("DROP TABLE dialog_segment_old")
+        except Exception:
+            self._conn.rollback()
+            raise
+        self._conn.commit()
+
+    def conversation_save(self, conversation: Conversation) -> Conversation:
+        with self._lock, self._conn:
+            self._conn.execute(UPSERT_CONVERSATION, (conversation.id, dumps(conversation.model_dump())))
+        return conversation
+
+    def conversation_update(self, conversation: Conversation) -> Optional[Conversation]:
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT data FROM conversation WHERE id = ?", (conversation.id,)).fetchone()
+            if not row:
+                return None
+            old_conversation = Conversation.model_validate(json.loads(row[0]))
+            old_conversation.theme = conversation.theme
+            self._conn.execute("UPDATE conversation SET data = ? WHERE id = ?",
+                               (dumps(old_conversation.model_dump()), conversation.id))
+        return conversation
+
+    def conversation_add(self, dialog_segment: DialogSegment) -> DialogSegment:
+        with self._lock, self._conn:
+            self._conn.execute(UPSERT_DIALOG_SEGMENT,
+                               (dialog_segment.conversation_id, dialog_segment.id, dumps(dialog_segment.to_record())))
+        return dialog_segment
+
+    def dialog_segment_remove(self, conversation_id: str, dialog_segment_id: str) -> str:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM dialog_segment WHERE conversation_id = ? AND id = ?",
+                               (conversation_id, dialog_segment_id))
+            remain = self._conn.execute("SELECT COUNT(*) FROM dialog_segment WHERE conversation_id = ?",
+                                        (conversation_id,)).fetchone()[0]
+        if remain == 1: # 对话片段仅为一条的时候删除会话
+            self.conversation_remove(conversation_id=conversation_id)
+        return dialog_segment_id
+
+    def dialog_segment_find(self, conversation_id: str, dialog_segment_id) -> Optional[DialogSegment]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM dialog_segment WHERE conversation_id = ? AND id = ?",
+                                     (conversation_id, dialog_segment_id)).fetchone()
+        if not row:
+            return None
+        return DialogSegment.from_record(json.loads(row[0]))
+
+    def update_conversation_record(self, conversation_id: str, updated_segments: List[DialogSegment]):
+        segment_ids = [segment.id for segment in updated_segments]
+        with self._lock, self._conn:
+            # 删除不在新记录中的片段，其余按主键更新，保留原有顺序
+            placeholders = ",".join("?" * len(segment_ids))
+            self._conn.execute(f"DELETE FROM dialog_segment WHERE conversation_id = ? AND id NOT IN ({placeholders})",
+                               (conversation_id, *segment_ids))
+            self._conn.executemany(UPSERT_DIALOG_SEGMENT,
+                                   [(conversation_id, segment.id, dumps(segment.to_record())) for segment in updated_segments])
+
+    def load_agent_record(self, agent_instance_id: str) -> List[DialogSegment]:
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM agent_record WHERE agent_instance_id = ? ORDER BY seq",
+                                      (agent_instance_id,)).fetchall()
+        return [DialogSegment.from_record(json.loads(row[0])) for row in rows]
+
+    def update_agent_record(self, agent_instance_id: str, updated_segments: List[DialogSegment]):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM agent_record WHERE agent_instance_id = ?", (agent_instance_id,))
+            self._conn.executemany(INSERT_AGENT_RECORD,
+                                   [(agent_instance_id, segment.id, dumps(segment.to_record())) for segment in updated_segments])
+
+    def add_agent_record(self, dialog_segment: DialogSegment) -> DialogSegment:
+        for key, value in dialog_segment.payload.items():
+            if isinstance(value, BaseModel):
+                dialog_segment.payload[key] = value.model_dump()
+        with self._lock, self._conn:
+            self._conn.execute(INSERT_AGENT_RECORD, (dialog_segment.payload['agent_instance_id'], dialog_segment.id,
+                                                     dumps(dialog_segment.to_record())))
+        return dialog_segment
+
+    def agent_record_id_list(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT agent_instance_id FROM agent_record").fetchall()
+        return [row[0] for row in rows]
+
+    def conversation_load(self, conversation_id: str, limit: Optional[int] = None, before: Optional[str] = None) -> Optional[Conversation]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM conversation WHERE id = ?", (conversation_id,)).fetchone()
+        if not row:
+            return None
+        conversation = Conversation.model_validate(json.loads(row[0]))
+        if limit == 0: # 只加载会话信息
+            return conversation
+        dialog_segments, has_more = self.dialog_segment_iter(conversation_id, limit=limit, before=before)
+        conversation.dialog_segment_list = list(dialog_segments)
+        if limit is not None or before is not None:
+            conversation.has_more = has_more
+        return conversation
+
+    def dialog_segment_iter(self, conversation_id: str, limit: Optional[int] = None, before: Optional[str] = None) -> Tuple[Iterator[DialogSegment], bool]:
+        with self._lock:
+            before_seq = None
+            if before is not None:
+                before_row = self._conn.execute("SELECT seq FROM dialog_segment WHERE conversation_id = ? AND id = ?",
+                                                (conversation_id, before)).fetchone()
+                if not before_row:
+                    return iter(()), False
+                before_seq = before_row[0]
+            # 倒序多取一条用于判断是否还有更早的片段
+            rows = self._conn.execute(
+                "SELECT data FROM dialog_segment WHERE conversation_id = ? AND (? IS NULL OR seq < ?) "
+                "ORDER BY seq DESC LIMIT ?",
+                (conversation_id, before_seq, before_seq, -1 if limit is None else limit + 1)).fetchall()
+        has_more = limit is not None and len(rows) > limit
+        if has_more:
+            rows = rows[:limit]
+        rows.reverse()
+        return (DialogSegment.from_record(json.loads(row[0])) for row in rows), has_more
+
+    def conversation_load_list(self) -> List[Conversation]:
+        with self._lock:
+            # 每个会话只取最后一条片段用于列表展示，没有片段的会话不展示
+            rows = self._conn.execute(
+                "SELECT c.data, (SELECT s.data FROM dialog_segment s WHERE s.conversation_id = c.id ORDER BY s.seq DESC LIMIT 1) "
+                "FROM conversation c ORDER BY c.rowid").fetchall()
+        conversation_list: List[Conversation] = []
+        for conversation_data, last_segment_data in rows:
+            if not last_segment_data:
+                continue
+            conversation = Conversation.model_validate(json.loads(conversation_data))
+            conversation.last_dialog_segment = DialogSegment.from_record(json.loads(last_segment_data))
+            conversation_list.append(conversation)
+        return conversation_list
+
+    def conversation_remove(self, conversation_id: str) -> str:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM dialog_segment WHERE conversation_id = ?", (conversation_id,))
+            self._conn.execute("DELETE FROM conversation WHERE id = ?", (conversation_id,))
+        return conversation_id
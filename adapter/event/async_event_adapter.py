@@ -0,0 +1,217 @@
+from application.domain.events.event import Event, EventGroupStatus
+from application.port.inbound.event_handler import EventHandler
+from application.port.outbound.event_port import EventPort
+from common.core.container.annotate import conditional_on_env
+from common.core.container.container import get_container
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from typing import Deque, List, Dict, Optional, Tuple, Type
+import asyncio
+import inspect
+import injector
+import os
+import threading
+import traceback
+
+from common.core.logger import get_logger
+from common.utils.common_utils import EVENT_BUS_ENV_KEY
+logger = get_logger(__name__)
+
+@conditional_on_env(EVENT_BUS_ENV_KEY, "asyncio")
+class AsyncEventAdapter(EventPort):
+    """
+    基于单个 asyncio 事件循环的事件总线：事件循环运行在独立线程中，
+    每个事件组一个 asyncio.Queue 和消费协程，组内事件按发布顺序处理，不再为每个组启动线程。
+    async def 实现的处理器直接在事件循环中执行，同步处理器提交到有界线程池执行。
+    """
+
+    @injector.inject
+    def __init__(self, event_handlers_cls: List[Type[EventHandler]]):
+        self.event_handlers_map: Dict[str, List[EventHandler]] = {}
+        # 处理器 -> 是否为 async def 实现
+        self._async_handlers: Dict[int, bool] = {}
+        self._lock = threading.Lock()
+        # 事件组队列映射 {group_id: Queue}，只在事件循环中访问
+        self._group_queues: Dict[str, asyncio.Queue] = {}
+        # 组超过该时间无事件时关闭
+        self.group_idle_seconds = float(os.environ.get("EFFLUX_EVENT_GROUP_IDLE_SECONDS", "10"))
+
+        for cls in event_handlers_cls:
+            self.register_handler(get_container().get(cls))
+
+        # 同步处理器的执行线程池
+        # 跨线程发布的事件先放入待处理队列，事件循环被唤醒一次取走全部，减少唤醒次数
+        self._pending: Deque[Event] = deque()
+        self._pending_lock = threading.Lock()
+        self._wakeup_scheduled = False
+        self.handler_executor = ThreadPoolExecutor(max_workers=int(os.environ.get("EFFLUX_EVENT_HANDLER_WORKERS", "10")),
+                                                   thread_name_prefix="event-handler")
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, name="event-loop", daemon=True)
+        self._loop_thread.start()
+        logger.info("asyncio 事件循环线程已启动")
+
+    def emit_event(self, event: Event) -> str:
+        """发布事件，可在任意线程调用"""
+        # 只有非组内事件或组的开始/结束事件才打印日志
+        if not event.group or event.group.status in [EventGroupStatus.STARTED, EventGroupStatus.ENDED, EventGroupStatus.STOPPED]:
+            logger.info(f"事件发布 ---> [{event.id} - {event.type.value}]")
+        with self._pending_lock:
+            self._pending.append(event)
+            if self._wakeup_scheduled:
+                return event.id
+            self._wakeup_scheduled = True
+        self._loop.call_soon_threadsafe(self._drain_pending)
+        return event.id
+
+    def _drain_pending(self):
+        with self._pending_lock:
+            events = list(self._pending)
+            self._pending.clear()
+            self._wakeup_scheduled = False
+        for event in events:
+            self._enqueue(event)
+
+    def _enqueue(self, event: Event):
+        """在事件循环中把事件放入组队列，非组事件直接分发"""
+        if event.group and event.group.id:
+            group_id = event.group.id
+            group_queue = self._group_queues.get(group_id)
+            # 如果是组开始事件，启动组消费协程
+            if group_queue is None and event.group.status == EventGroupStatus.STARTED:
+                group_queue = asyncio.Queue()
+                self._group_queues[group_id] = group_queue
+                self._loop.create_task(self._process_group_events(group_id, group_queue))
+            if group_queue is not None:
+                group_queue.put_nowait(event)
+                return
+            # 如果组队列不存在（可能是已经处理完毕），则直接分发
+            logger.warning(f"事件组[{group_id}]队列不存在，事件将直接分发")
+        self._loop.create_task(self._dispatch_event(event))
+
+    async def _process_group_events(self, group_id: str, group_queue: asyncio.Queue):
+        """事件组消费协程，组内事件依次处理"""
+        try:
+            while True:
+                event = await self._next_event(group_queue)
+                if event is None:
+                    logger.warning(f"事件组[{group_id}]超过{self.group_idle_seconds}秒无活动，自动关闭")
+                    break
+                # 取出已入队的全部事件一起分发
+                events = [event]
+                while not self._is_group_end(event) and not group_queue.empty():
+                    event = group_queue.get_nowait()
+                    events.append(event)
+                await self._dispatch_events(events)
+                # 如果是组结束事件，则结束消费
+                if self._is_group_end(event):
+                    logger.info(f"事件组[{group_id}]处理完成{event.group.status}")
+                    break
+        finally:
+            if self._group_queues.get(group_id) is group_queue:
+                del self._group_queues[group_id]
+            # 结束后才入队的事件直接分发，不丢弃
+            while not group_queue.empty():
+                self._loop.create_task(self._dispatch_event(group_queue.get_nowait()))
+
+    async def _next_event(self, group_queue: asyncio.Queue) -> Optional[Event]:
+        """
+        获取组内下一个事件，队列为空时等待
+        :return: 超过空闲时间没有事件时返回 None
+        """
+        if not group_queue.empty():
+            return group_queue.get_nowait()
+        # 只在需要等待时设置定时器，不为每个事件创建 wait_for 任务
+        task = asyncio.current_task()
+        expired = []
+
+        def expire():
+            expired.append(True)
+            task.cancel()
+
+        timer = self._loop.call_later(self.group_idle_seconds, expire)
+        try:
+            return await group_queue.get()
+        except asyncio.CancelledError:
+            if expired:
+                return None
+            raise
+        finally:
+            timer.cancel()
+
+    @staticmethod
+    def _is_group_end(event: Event) -> bool:
+        return event.group.status == EventGroupStatus.ENDED or event.group.status == EventGroupStatus.STOPPED
+
+    async def _dispatch_events(self, events: List[Event]):
+        """按顺序分发同一组的多个事件，处理器都是同步实现时在线程池中一次执行完，只切换一次线程"""
+        plan = []
+        for event in events:
+            with self._lock:
+                handlers = self.event_handlers_map.get(event.type.value, [])
+            if any(self._async_handlers.get(id(handler)) for handler in handlers):
+                plan = None
+                break
+            plan.append((event, handlers))
+        if plan is None:
+            for event in events:
+                await self._dispatch_event(event)
+            return
+        await self._loop.run_in_executor(self.handler_executor, self._run_sync_handlers, plan)
+
+    def _run_sync_handlers(self, plan: List[Tuple[Event, List[EventHandler]]]):
+        for event, handlers in plan:
+            if not handlers:
+                logger.warning(f"没有找到事件类型 [{event.type.value}] 的处理器")
+            for handler in handlers:
+                try:
+                    handler.handle(event)
+                except Exception as e:
+                    logger.error(f"事件处理器 {handler.__class__.__name__} 处理事件 {event} 时发生错误: {str(e)}")
+                    logger.error(traceback.format_exc())  # 记录完整的堆栈跟踪
+
+    async def _dispatch_event(self, event: Event):
+        """分发事件到对应的处理器，多个处理器并行执行"""
+        event_type = event.type.value
+        with self._lock:
+            handlers = self.event_handlers_map.get(event_type, [])
+        if not handlers:
+            logger.warning(f"没有找到事件类型 [{event_type}] 的处理器")
+            return
+        if len(handlers) == 1:
+            await self._execute_handler(handlers[0], event)
+        else:
+            await asyncio.gather(*[self._execute_handler(handler, event) for handler in handlers])
+
+    async def _execute_handler(self, handler: EventHandler, event: Event):
+        try:
+            if self._async_handlers.get(id(handler)):
+                await handler.handle(event)
+            else:
+                await self._loop.run_in_executor(self.handler_executor, handler.handle, event)
+        except Exception as e:
+            logger.error(f"事件处理器 {handler.__class__.__name__} 处理事件 {event} 时发生错误: {str(e)}")
+            logger.error(traceback.format_exc())  # 记录完整的堆栈跟踪
+
+    def register_handler(self, handler: EventHandler):
+        """动态注册事件处理器"""
+        event_type = handler.type()
+        with self._lock:
+            self._async_handlers[id(handler)] = inspect.iscoroutinefunction(handler.handle)
+            self.event_handlers_map.setdefault(event_type, []).append(handler)
+        logger.info(f"已注册事件处理器 {handler.__class__.__name__} 用于事件类型 {event_type}")
+
+    def shutdown(self):
+        """关闭事件循环和处理器线程池"""
+        async def close_groups():
+            # 取消组消费协程和进行中的分发
+            for task in [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]:
+                task.cancel()
+
+        if self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(close_groups(), self._loop).result(timeout=5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join(timeout=5)
+            logger.warning("asyncio 事件循环已关闭")
+        self.handler_executor.shutdown(wait=False)
+        logger.warning("事件处理器线程池已关闭")
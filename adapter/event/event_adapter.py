@@ -1,35 +1,56 @@
-from application.domain.events.event import Event, EventGroupStatus
+from application.domain.events.event import Event, EventGroupStatus, EventSubType
 from application.port.inbound.event_handler import EventHandler
 from application.port.outbound.event_port import EventPort
-from common.core.container.annotate import component
+from common.core.container.annotate import conditional_on_env
 from common.core.container.container import get_container
-from concurrent.futures import ThreadPoolExecutor
-from typing import List, Dict, Type, Optional
+from typing import List, Dict, Optional, Tuple, Type
 import injector
+import os
 import threading
 import traceback
-import queue
-import time
 
 from common.core.logger import get_logger
+from common.core.metrics import register_metrics
+from common.utils.common_utils import EVENT_BUS_ENV_KEY
+from common.utils.keyed_executor import KeyedExecutor, OVERFLOW_COALESCE, OVERFLOW_DROP_OLDEST, OVERFLOW_POLICIES
 logger = get_logger(__name__)
 
-@component
+# 合并时拼接的流式内容字段
+_CHUNK_CONTENT_KEYS = ("content", "reasoning_content")
+
+
+def load_queue_limits(spec: str, default_max_pending: int, default_overflow: str) -> Dict[str, Tuple[int, str]]:
+    """
+    解析按事件类型配置的队列上限，格式 "ASSISTANT_MESSAGE=4096:drop_oldest,TOOL=64"，省略的策略使用默认值
+    :return: 事件类型 -> (待处理事件数上限, 溢出策略)
+    """
+    limits: Dict[str, Tuple[int, str]] = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        event_type, _, value = item.partition("=")
+        max_pending, _, overflow = value.partition(":")
+        overflow = overflow.strip() or default_overflow
+        if overflow not in OVERFLOW_POLICIES:
+            logger.warning(f"未知的事件队列溢出策略[{overflow}]，使用 {default_overflow}")
+            overflow = default_overflow
+        try:
+            limits[event_type.strip()] = (int(max_pending) if max_pending.strip() else default_max_pending, overflow)
+        except ValueError:
+            logger.warning(f"事件队列上限配置格式错误，已忽略：{item}")
+    return limits
+
+@conditional_on_env(EVENT_BUS_ENV_KEY, "thread", match_if_missing=True)
 class EventAdapter(EventPort):
-    # 主事件队列（用于非组事件）
-    _event_queue = queue.Queue()
-    # 事件组队列映射 {group_id: Queue}
-    _group_queues: Dict[str, queue.Queue] = {}
-    # 事件组线程映射 {group_id: Thread}
-    _group_threads: Dict[str, threading.Thread] = {}
-    # 主事件处理线程
-    _event_thread = None
-    # 是否运行中
-    _running = False
+    """
+    基于固定线程池的事件总线：同一事件组的事件以组id为键依次执行全部处理器，保证组内按发布顺序处理，
+    不同事件组以及非组事件由同一组工作线程并行执行，不再为每个事件组启动线程。
+    每个事件组（非组事件按事件类型）的待处理事件数有上限，超出时按事件类型配置的策略让发布方等待、
+    合并流式内容事件或丢弃最早的流式内容事件，队列深度、排队时间和丢弃数量见 /api/metrics 的 event_bus。
+    """
     # 事件处理器锁
     _lock = threading.Lock()
-    # 事件组锁
-    _group_lock = threading.Lock()
 
     @injector.inject
     def __init__(self, event_handlers_cls: List[Type[EventHandler]]):
@@ -45,105 +66,19 @@ class EventAdapter(EventPort):
                     self.event_handlers_map[event_type] = []
                 self.event_handlers_map[event_type].append(event_handler)
 
-        # 创建处理器执行线程池
-        self.handler_executor = ThreadPoolExecutor(max_workers=10)
-        
-        # 启动事件处理线程
-        self._start_event_thread()
-
-    def _start_event_thread(self):
-        """启动主事件处理线程"""
-        if self._event_thread is None or not self._event_thread.is_alive():
-            self._running = True
-            self._event_thread = threading.Thread(target=self._process_events, daemon=True)
-            self._event_thread.start()
-            logger.info("主事件处理线程已启动")
-
-    def _start_group_thread(self, group_id: str):
-        """启动事件组处理线程"""
-        with self._group_lock:
-            if group_id not in self._group_queues:
-                self._group_queues[group_id] = queue.Queue()
-            
-            if group_id not in self._group_threads or not self._group_threads[group_id].is_alive():
-                thread = threading.Thread(
-                    target=self._process_group_events,
-                    args=(group_id,),
-                    daemon=True
-                )
-                self._group_threads[group_id] = thread
-                thread.start()
-                logger.info(f"事件组[{group_id}]处理线程已启动")
-
-    def _process_events(self):
-        """主事件处理线程函数"""
-        while self._running:
-            event: Optional[Event] = None
-            try:
-                # 从队列获取事件，超时2秒
-                event = self._event_queue.get(timeout=2)
-                self._dispatch_event(event)
-                self._event_queue.task_done()
-            except queue.Empty:
-                continue
-            except Exception as e:
-                if event:
-                    logger.error(f"处理事件[{event.id}]时发生错误: {str(e)}")
-                else:
-                    logger.error(f"处理事件[未知]时发生错误: {str(e)}")
-
-    def _process_group_events(self, group_id: str):
-        """事件组处理线程函数"""
-        group_queue = self._group_queues[group_id]
-        
-        # 添加最后活动时间记录
-        last_activity_time = time.time()
-        # 设置超时时间（秒）
-        timeout_seconds = 10  # 可以根据实际需求调整
-        
-        while self._running:
-            try:
-                # 从组队列获取事件，使用较短的超时时间以便检查组超时
-                try:
-                    event = group_queue.get(timeout=2)
-                    # 更新最后活动时间
-                    last_activity_time = time.time()
-                    
-                    # 处理事件
-                    self._dispatch_event(event)
-                    group_queue.task_done()
-                    
-                    # 如果是组结束事件，则退出线程
-                    if event.group and (event.group.status == EventGroupStatus.ENDED or event.group.status == EventGroupStatus.STOPPED):
-                        logger.info(f"事件组[{group_id}]处理完成{event.group.status}，线程退出")
-                        with self._group_lock:
-                            if group_id in self._group_threads:
-                                del self._group_threads[group_id]
-                            if group_id in self._group_queues:
-                                del self._group_queues[group_id]
-                        break
-                except queue.Empty:
-                    # 检查是否超时
-                    current_time = time.time()
-                    if current_time - last_activity_time > timeout_seconds:
-                        logger.warning(f"事件组[{group_id}]超过{timeout_seconds}秒无活动，自动关闭")
-                        with self._group_lock:
-                            if group_id in self._group_threads:
-                                del self._group_threads[group_id]
-                            if group_id in self._group_queues:
-                                del self._group_queues[group_id]
-                        break
-                    
-                    # 检查组是否已被清理（可能由其他线程处理了结束事件）
-                    with self._group_lock:
-                        if group_id not in self._group_queues:
-                            break
-                    continue
-                    
-            except Exception as e:
-                logger.error(f"处理事件组[{group_id}]事件时发生错误: {str(e)}")
-                # 更新最后活动时间，避免因错误导致过早超时
-                last_activity_time = time.time()
+        # 创建处理器执行线程池，组内事件按组id串行，组间并行
+        self.handler_executor = KeyedExecutor(max_workers=int(os.environ.get("EFFLUX_EVENT_HANDLER_WORKERS", "10")),
+                                              thread_name_prefix="event-handler",
+                                              block_seconds=float(os.environ.get("EFFLUX_EVENT_QUEUE_BLOCK_SECONDS", "30")))
+        # 队列上限和溢出策略
+        self.queue_max_pending = int(os.environ.get("EFFLUX_EVENT_QUEUE_MAX_PENDING", "1024"))
+        self.queue_overflow = os.environ.get("EFFLUX_EVENT_QUEUE_OVERFLOW", OVERFLOW_COALESCE).strip()
+        if self.queue_overflow not in OVERFLOW_POLICIES:
+            logger.warning(f"未知的事件队列溢出策略[{self.queue_overflow}]，使用 {OVERFLOW_COALESCE}")
+            self.queue_overflow = OVERFLOW_COALESCE
+        self.queue_limits = load_queue_limits(os.environ.get("EFFLUX_EVENT_QUEUE_LIMITS", ""),
+                                              self.queue_max_pending, self.queue_overflow)
+        register_metrics("event_bus", self.handler_executor.stats)
 
     def _dispatch_event(self, event: Event):
         """分发事件到对应的处理器"""
@@ -155,12 +90,55 @@ class EventAdapter(EventPort):
         if not handlers:
             logger.warning(f"没有找到事件类型 [{event_type}] 的处理器")
             return
-        
-        # 使用线程池并行处理所有处理器
-        futures = []
+
+        max_pending, overflow = self.queue_limits.get(event_type, (self.queue_max_pending, self.queue_overflow))
+        if event.group and event.group.id:
+            # 组内事件：前一个事件的全部处理器执行完后才执行下一个事件
+            self.handler_executor.submit(event.group.id, self._execute_handlers, handlers, event, label=event_type,
+                                         max_pending=max_pending, overflow=overflow, merge=self._merge_chunks,
+                                         droppable=overflow == OVERFLOW_DROP_OLDEST and self._is_chunk(event))
+        else:
+            # 非组事件：多个处理器并行执行
+            for handler in handlers:
+                self.handler_executor.submit(None, self._execute_handler, handler, event, label=event_type,
+                                             max_pending=max_pending, overflow=overflow)
+
+    @staticmethod
+    def _is_chunk(event: Event) -> bool:
+        """组内的流式内容事件（非开始/结束事件）"""
+        return (event.group is not None and event.group.status == EventGroupStatus.SENDING
+                and event.sub_type in (EventSubType.MESSAGE, EventSubType.ASSISTANT_THINKING))
+
+    @classmethod
+    def _merge_chunks(cls, queued: Tuple, new: Tuple) -> Optional[Tuple]:
+        """
+        把新的流式内容事件合并到队尾尚未处理的同类事件中，拼接内容字段，其余字段取新事件的值。
+        只合并同一条消息（data 中的 id 相同）且组状态相同的事件
+        :param queued: 队尾任务参数 (处理器, 事件)
+        :param new: 新任务参数 (处理器, 事件)
+        :return: 合并后的参数，无法合并时返回 None
+        """
+        queued_handlers, queued_event = queued
+        handlers, event = new
+        if (queued_handlers != handlers or not cls._is_chunk(queued_event) or not cls._is_chunk(event)
+                or queued_event.type != event.type or queued_event.sub_type != event.sub_type
+                or queued_event.group.status != event.group.status
+                or queued_event.data.get('id') != event.data.get('id')
+                or queued_event.data.keys() != event.data.keys()):
+            return None
+        data = dict(event.data)
+        for key in _CHUNK_CONTENT_KEYS:
+            if isinstance(queued_event.data.get(key), str) and isinstance(event.data.get(key), str):
+                data[key] = queued_event.data[key] + event.data[key]
+            elif event.data.get(key) is None:
+                data[key] = queued_event.data.get(key)
+        return handlers, event.model_copy(update={"data": data})
+
+    @classmethod
+    def _execute_handlers(cls, handlers: List[EventHandler], event: Event):
+        """按顺序执行同一事件的多个处理器"""
         for handler in handlers:
-            future = self.handler_executor.submit(self._execute_handler, handler, event)
-            futures.append(future)
+            cls._execute_handler(handler, event)
 
     @staticmethod
     def _execute_handler(handler: EventHandler, event: Event):
@@ -176,27 +154,8 @@ class EventAdapter(EventPort):
         # 只有非组内事件或组的开始/结束事件才打印日志
         if not event.group or event.group.status in [EventGroupStatus.STARTED, EventGroupStatus.ENDED, EventGroupStatus.STOPPED]:
             logger.info(f"事件发布 ---> [{event.id} - {event.type.value}]")
-        
-        # 如果是组事件，放入对应的组队列
-        if event.group and event.group.id:
-            group_id = event.group.id
-            
-            # 如果是组开始事件，启动组处理线程
-            if event.group.status == EventGroupStatus.STARTED:
-                self._start_group_thread(group_id)
-
-            # 将事件放入组队列
-            with self._group_lock:
-                if group_id in self._group_queues:
-                    self._group_queues[group_id].put(event)
-                else:
-                    # 如果组队列不存在（可能是已经处理完毕），则放入主队列
-                    logger.warning(f"事件组[{group_id}]队列不存在，事件将放入主队列")
-                    self._event_queue.put(event)
-        else:
-            # 非组事件放入主队列
-            self._event_queue.put(event)
-            
+
+        self._dispatch_event(event)
         return event.id
     
     def register_handler(self, handler: EventHandler):
@@ -211,23 +170,6 @@ class EventAdapter(EventPort):
         logger.info(f"已注册事件处理器 {handler.__class__.__name__} 用于事件类型 {event_type}")
     
     def shutdown(self):
-        """关闭事件处理线程"""
-        self._running = False
-        
-        # 关闭主事件线程
-        if self._event_thread and self._event_thread.is_alive():
-            self._event_thread.join(timeout=5)
-            logger.warning("主事件处理线程已关闭")
-        
-        # 关闭所有组线程
-        with self._group_lock:
-            for group_id, thread in self._group_threads.items():
-                if thread.is_alive():
-                    thread.join(timeout=2)
-            self._group_threads.clear()
-            self._group_queues.clear()
-            logger.warning("所有事件组处理线程已关闭")
-        
-        # 关闭线程池
+        """关闭处理器线程池，已发布的事件继续处理完"""
         self.handler_executor.shutdown(wait=False)
-        logger.warning("事件处理器线程池已关闭")
\ No newline at end of file
+        logger.warning("事件处理器线程池已关闭")
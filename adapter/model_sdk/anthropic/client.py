@@ -11,9 +11,10 @@ from common.utils.auth import Secret
 from common.utils.time_utils import create_from_second_now_to_int
 from common.core.errors.system_exception import ThirdPartyServiceException, ThirdPartyServiceApiCode
 from application.domain.generators.chat_chunk.chunk import ChatStreamingChunk, ChatCompletionMessageToolCall
-from application.domain.generators.tools import Tool
+from application.domain.generators.tools import Tool, index_tools
 
 from common.core.logger import get_logger
+from adapter.model_sdk.client_pool import client_pool
 logger = get_logger(__name__)
 
 class AnthropicClient(ModelClient):
@@ -53,6 +54,8 @@ class AnthropicClient(ModelClient):
                                           api_base_url=base_url)
         # 转换为 Anthropic 接口风格的工具
         anthropic_tools: List[ToolUnionParam] = self._convert_openai_tools(tools)
+        # 按工具名匹配工具调用所属的 mcp server
+        tools_index: Dict[str, Tool] = index_tools(tools)
 
         system_instruction = self._convert_anthropic_system_instruction(chat_streaming_chunk_list=message_list)
         if system_instruction:
@@ -183,7 +186,7 @@ class AnthropicClient(ModelClient):
                         current_tool = ChatCompletionMessageToolCall(id=event.content_block.id,
                                                                      name=event.content_block.name,
                                                                      arguments=json.dumps(event.content_block.input))
-                        self._match_mcp_server_name(chunk_tools_call=current_tool, tools=tools)
+                        self._match_mcp_server_name(chunk_tools_call=current_tool, tools_index=tools_index)
                         chat_streaming_chunk: ChatStreamingChunk = ChatStreamingChunk.from_tool_calls(tool_calls=[current_tool])
                         yield chat_streaming_chunk
                     if event.type == 'message_stop' and event.message.stop_reason == 'stop_sequence' and event.message.stop_sequence == '<antml:function_calls>':
@@ -274,18 +277,18 @@ class AnthropicClient(ModelClient):
 
 
     @staticmethod
-    def _match_mcp_server_name(chunk_tools_call: ChatCompletionMessageToolCall, tools: Iterable[Tool]) -> None:
+    def _match_mcp_server_name(chunk_tools_call: ChatCompletionMessageToolCall, tools_index: Dict[str, Tool]) -> None:
         """
         match mcp.server name and description
         :param chunk_tools_call: the call tools
-        :param tools: mcp server tools
+        :param tools_index: mcp server tools indexed by name
         :return:
         """
-        for tool in tools:
-            if chunk_tools_call.name == tool.name:
-                chunk_tools_call.mcp_server_name = tool.mcp_server_name
-                chunk_tools_call.group_name = tool.group_name
-                chunk_tools_call.description = tool.description
+        tool = tools_index.get(chunk_tools_call.name)
+        if tool:
+            chunk_tools_call.mcp_server_name = tool.mcp_server_name
+            chunk_tools_call.group_name = tool.group_name
+            chunk_tools_call.description = tool.description
 
     @staticmethod
     def _convert_openai_tools(tools: Iterable[Tool]) -> List[ToolUnionParam]:
@@ -296,20 +299,25 @@ class AnthropicClient(ModelClient):
         """
         openai_tools: List[ToolUnionParam] = []
         for tool in tools:
-            tool_dist = tool.model_dump()
-            if "mcp_server_name" in tool_dist:
-                del tool_dist["mcp_server_name"]
-            if "group_name" in tool_dist:
-                del tool_dist["group_name"]
-            if "type" in tool_dist:
-                del tool_dist["type"]
-            # if "input_schema" in tool_dist:
-            #     tool_dist["parameters"] = tool_dist["input_schema"]
-            #     del tool_dist["input_schema"]
-            openai_tools.append(tool_dist)
+            # 转换结果缓存在工具对象上
+            openai_tools.append(tool.provider_schema("anthropic", AnthropicClient._convert_anthropic_tool))
 
         return openai_tools
 
+    @staticmethod
+    def _convert_anthropic_tool(tool: Tool) -> ToolUnionParam:
+        tool_dist = tool.model_dump()
+        if "mcp_server_name" in tool_dist:
+            del tool_dist["mcp_server_name"]
+        if "group_name" in tool_dist:
+            del tool_dist["group_name"]
+        if "type" in tool_dist:
+            del tool_dist["type"]
+        # if "input_schema" in tool_dist:
+        #     tool_dist["parameters"] = tool_dist["input_schema"]
+        #     del tool_dist["input_schema"]
+        return tool_dist
+
     @staticmethod
     def _tool_choice(**generation_kwargs) -> Literal["none", "auto", "any"]:
         tool_choice: Literal["none", "auto", "any"] = "auto"
@@ -336,6 +344,11 @@ class AnthropicClient(ModelClient):
         else:
             print("Invalid data URL format.")
 
+    def prewarm(self, api_secret: Secret = None, base_url: str = None) -> Optional[float]:
+        api_key = api_secret.resolve_value()
+        client = self._get_client(api_key=api_key, api_base_url=base_url)
+        return client_pool.prewarm(firm="anthropic", base_url=base_url, api_key=api_key, url=str(client.base_url))
+
     def _get_client(
             self,
             api_key: str,
@@ -358,9 +371,13 @@ class AnthropicClient(ModelClient):
         if max_retries is not None:
             self.max_retries = max_retries
 
-        return anthropic.Anthropic(
-            api_key=api_key,
-            base_url=api_base_url,
-            timeout=self.timeout,
-            max_retries=self.max_retries,
-        )
\ No newline at end of file
+        # 相同厂商凭证复用客户端及其连接池
+        return client_pool.get(
+            firm="anthropic", base_url=api_base_url, api_key=api_key, timeout=self.timeout,
+            factory=lambda http_client: anthropic.Anthropic(
+                api_key=api_key,
+                base_url=api_base_url,
+                timeout=self.timeout,
+                max_retries=self.max_retries,
+                http_client=http_client,
+            ))
\ No newline at end of file
@@ -49,4 +49,13 @@ class ModelClient(ABC):
                 self,
                 api_key: str = None,
                 base_url: str = None) -> List[LLMGenerator]:
-        pass
\ No newline at end of file
+        pass
+
+    def prewarm(self, api_secret: Secret = None, base_url: str = None) -> Optional[float]:
+        """
+        预热到厂商接口的连接，随后的请求复用该连接
+        :param api_secret: api key
+        :param base_url: 接口地址
+        :return: 建立连接的耗时毫秒数，连接已存在时为 0；不支持或失败时返回 None
+        """
+        return None
\ No newline at end of file
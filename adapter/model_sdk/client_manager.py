@@ -11,6 +11,8 @@ from common.utils.yaml_util import load_yaml
 from adapter.model_sdk.client import ModelClient
 from adapter.model_sdk.openai.client import OpenAIClient
 from common.utils.json_file_util import JSONFileUtil
+from common.core.metrics import register_metrics
+from adapter.model_sdk.model_catalog import ModelCatalog
 import asyncio
 import json
 import re
@@ -23,18 +25,20 @@ class ClientManager(GeneratorsPort):
     def __init__(self):
         self.config: Dict[str, Any] = load_yaml('adapter/model_sdk/setting/openai/model.yaml')
         self.user_setting = JSONFileUtil(self.user_setting_file_url)
+        # 按模型id索引的模型目录，厂商模型或用户设置文件变化时重建
+        self.model_catalog = ModelCatalog(firms=self.config, user_setting_file_url=self.user_setting_file_url)
+        register_metrics("model_catalog", self.model_catalog.stats)
+        self._model_clients: Dict[str, ModelClient] = {
+            "openai": OpenAIClient(),
+            "google": GeminiClient(),
+            "anthropic": AnthropicClient(),
+        }
 
     def load_generate(self, generate_id: str) -> Optional[LLMGenerator]:
-        # 遍历项目内置支持的所有厂商
-        for firm in self.config.keys():
-            firm_model_config_url = f"adapter/model_sdk/setting/openai/{firm}_model.json"
-            firm_model_config = JSONFileUtil(firm_model_config_url)
-            # 遍历厂商启用的所有模型
-            for model_name in firm_model_config.read().keys():
-                firm_model_dict = firm_model_config.read_key(model_name)
-                if firm_model_dict['id'] == generate_id:
-                    return LLMGenerator.model_validate(firm_model_dict)
-        return None
+        return self.model_catalog.load(generate_id)
+
+    def resolve(self, generate_id: str) -> Optional[LLMGenerator]:
+        return self.model_catalog.resolve(generate_id)
 
     def load_firm(self) -> List[GeneratorFirm]:
         firm_list: List[GeneratorFirm] = []
@@ -90,6 +94,7 @@ class ClientManager(GeneratorsPort):
             firm_model_config.update_key(model, llm_generator.model_dump())
         else:
             firm_model_config.delete(model)
+        self.model_catalog.invalidate()
         return True
 
     def generate(self,
@@ -99,8 +104,7 @@ class ClientManager(GeneratorsPort):
         **generation_kwargs,
     ) -> ChatStreamingChunk:
         client: ModelClient = self._get_model_client(firm=llm_generator.firm)
-        firm_setting = self.user_setting.read_key(llm_generator.firm)
-        url = firm_setting["base_url"]
+        url = self.model_catalog.base_url(llm_generator.firm)
         rs = client.generate(
             model=llm_generator.model,
             api_secret=llm_generator.api_key_secret,
@@ -120,8 +124,7 @@ class ClientManager(GeneratorsPort):
         **generation_kwargs,
     )-> Dict[str, Any] | None:
         client: ModelClient = self._get_model_client(firm=llm_generator.firm)
-        firm_setting = self.user_setting.read_key(llm_generator.firm)
-        url = firm_setting["base_url"]
+        url = self.model_catalog.base_url(llm_generator.firm)
         client.generate_test(
             model=llm_generator.model,
             api_secret=llm_generator.api_key_secret,
@@ -179,8 +182,7 @@ class ClientManager(GeneratorsPort):
         **generation_kwargs,
     ) -> Generator[ChatStreamingChunk, None, None]:
         client: ModelClient = self._get_model_client(firm=llm_generator.firm)
-        firm_setting = self.user_setting.read_key(llm_generator.firm)
-        url = firm_setting["base_url"]
+        url = self.model_catalog.base_url(llm_generator.firm)
         stream = client.generate_stream(
             model=llm_generator.model,
             api_secret=llm_generator.api_key_secret,
@@ -194,11 +196,12 @@ class ClientManager(GeneratorsPort):
             chunk.firm = llm_generator.firm
             yield chunk
 
+    def prewarm(self, llm_generator: LLMGenerator) -> Optional[float]:
+        client: ModelClient = self._get_model_client(firm=llm_generator.firm)
+        url = self.model_catalog.base_url(llm_generator.firm)
+        return client.prewarm(api_secret=llm_generator.api_key_secret, base_url=url)
+
 
     def _get_model_client(self, firm: str) -> ModelClient:
-        if firm == "openai":
-            return OpenAIClient()
-        if firm == "google":
-            return GeminiClient()
-        if firm == "anthropic":
-            return AnthropicClient()
\ No newline at end of file
+        # 客户端包装类无状态，按厂商复用，SDK 客户端由 client_pool 按凭证复用
+        return self._model_clients.get(firm)
\ No newline at end of file
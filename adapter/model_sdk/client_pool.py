@@ -0,0 +1,266 @@
+import hashlib
+import importlib.util
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import httpx
+
+from common.core.logger import get_logger
+from common.core.metrics import register_metrics, SampleWindow
+
+logger = get_logger(__name__)
+
+# (厂商, base url, api key 哈希, 代理)
+ClientKey = Tuple[str, Optional[str], str, Optional[str]]
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """流式响应关闭时释放客户端的使用计数"""
+
+    def __init__(self, stream: httpx.SyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            if not self._released:
+                self._released = True
+                self._release()
+
+
+class _PooledHttpClient(httpx.Client):
+    """
+    统计进行中请求（包括尚未关闭的流式响应）的 httpx 客户端：
+    移出池后没有进行中的请求时立即关闭，否则在最后一个请求结束时关闭
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._usage_lock = threading.Lock()
+        self._active = 0
+        self._retired = False
+
+    def send(self, request: httpx.Request, *, stream: bool = False, **kwargs) -> httpx.Response:
+        with self._usage_lock:
+            self._active += 1
+        try:
+            response = super().send(request, stream=stream, **kwargs)
+        except BaseException:
+            self._release()
+            raise
+        if stream:
+            response.stream = _ReleasingStream(response.stream, self._release)
+        else:
+            # 非流式响应已读取完毕并关闭
+            self._release()
+        return response
+
+    def _release(self):
+        with self._usage_lock:
+            self._active -= 1
+            close = self._retired and self._active == 0
+        if close:
+            self.close()
+
+    def retire(self):
+        """移出池，没有进行中的请求时立即关闭连接池"""
+        with self._usage_lock:
+            self._retired = True
+            close = self._active == 0
+        if close:
+            self.close()
+
+    @property
+    def active(self) -> int:
+        with self._usage_lock:
+            return self._active
+
+
+class _PooledClient:
+
+    def __init__(self, sdk_client: Any, http_client: _PooledHttpClient):
+        self.sdk_client = sdk_client
+        self.http_client = http_client
+        self.last_used = time.monotonic()
+
+
+class ClientPool:
+    """
+    模型 SDK 客户端池：按 (厂商, base url, api key 哈希, 代理) 复用 SDK 客户端及其 HTTP 连接池，
+    每轮对话不再重新建立 TCP/TLS 连接。空闲超时或超出数量上限的客户端移出池，
+    厂商凭证变化时按厂商失效。
+    """
+
+    def __init__(self, max_clients: int = 16, idle_seconds: float = 600, max_connections: int = 20,
+                 max_keepalive_connections: int = 10, keepalive_expiry: float = 60, http2: bool = False,
+                 proxy: Optional[str] = None):
+        """
+        :param max_clients: 保留的客户端数量上限
+        :param idle_seconds: 客户端空闲移出时间
+        :param max_connections: 每个客户端的最大连接数
+        :param max_keepalive_connections: 每个客户端保持的空闲连接数
+        :param keepalive_expiry: 空闲连接的保持时间
+        :param http2: 是否启用 HTTP/2，需要安装 h2
+        :param proxy: 代理地址，为空时使用环境变量中的代理
+        """
+        self.max_clients = max_clients
+        self.idle_seconds = idle_seconds
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive_connections,
+                                   keepalive_expiry=keepalive_expiry)
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("未安装 h2，模型客户端使用 HTTP/1.1")
+            http2 = False
+        self.http2 = http2
+        self.proxy = proxy
+        self._clients: "OrderedDict[ClientKey, _PooledClient]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._prewarms = 0
+        self._prewarm_connects = 0
+        # 预热时建立连接的耗时，即随后第一次请求节省的时间
+        self._prewarm_saved_ms = SampleWindow(maxlen=1024)
+
+    @staticmethod
+    def _hash(api_key: Optional[str]) -> str:
+        return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+
+    def _new_http_client(self, timeout: float) -> _PooledHttpClient:
+        return _PooledHttpClient(limits=self.limits, http2=self.http2, proxy=self.proxy,
+                            timeout=httpx.Timeout(timeout, connect=min(timeout, 10.0)), follow_redirects=True)
+
+    def get(self, firm: str, base_url: Optional[str], api_key: Optional[str], timeout: float,
+            factory: Callable[[httpx.Client], Any]) -> Any:
+        """
+        获取 SDK 客户端，不存在时创建
+        :param firm: 厂商名
+        :param base_url: 接口地址
+        :param api_key: api key，只以哈希作为键
+        :param timeout: 新建 HTTP 客户端的超时时间
+        :param factory: 以共享的 httpx.Client 构建 SDK 客户端
+        """
+        key: ClientKey = (firm, base_url, self._hash(api_key), self.proxy)
+        with self._lock:
+            self._evict_idle()
+            pooled = self._clients.get(key)
+            if pooled is not None:
+                self._hits += 1
+                pooled.last_used = time.monotonic()
+                self._clients.move_to_end(key)
+                return pooled.sdk_client
+            self._misses += 1
+        # 在锁外创建，创建较慢时不阻塞其他厂商的请求
+        http_client = self._new_http_client(timeout)
+        pooled = _PooledClient(factory(http_client), http_client)
+        with self._lock:
+            existing = self._clients.get(key)
+            if existing is not None:
+                http_client.close()
+                return existing.sdk_client
+            self._clients[key] = pooled
+            while len(self._clients) > self.max_clients:
+                self._evict(self._clients.popitem(last=False)[1])
+        logger.info(f"创建模型客户端：[{firm} - {base_url}]")
+        return pooled.sdk_client
+
+    def _evict_idle(self):
+        """调用方持有锁"""
+        now = time.monotonic()
+        for key in [key for key, pooled in self._clients.items() if now - pooled.last_used > self.idle_seconds]:
+            self._evict(self._clients.pop(key))
+
+    def _evict(self, pooled: _PooledClient):
+        """
+        从池中移除，调用方持有锁：没有进行中的请求时立即关闭连接，
+        仍有进行中的流式响应时在响应关闭后关闭
+        """
+        self._evictions += 1
+        pooled.http_client.retire()
+
+    def invalidate(self, firm: Optional[str] = None):
+        """
+        移除客户端，厂商凭证或地址变化时调用
+        :param firm: 厂商名，为空时移除全部
+        """
+        with self._lock:
+            for key in [key for key in self._clients if firm is None or key[0] == firm]:
+                self._evict(self._clients.pop(key))
+
+    def prewarm(self, firm: str, base_url: Optional[str], api_key: Optional[str], url: str) -> Optional[float]:
+        """
+        预热客户端的连接：向接口地址发送 HEAD 请求，建立的连接保留在连接池中，随后的请求直接复用
+        :param firm: 厂商名
+        :param base_url: 获取客户端时的接口地址
+        :param api_key: 获取客户端时的 api key
+        :param url: 请求地址，与 SDK 请求的地址同源
+        :return: 建立连接（DNS、TCP、TLS）的耗时毫秒数，连接已存在时为 0；客户端不在池中或请求失败时返回 None
+        """
+        with self._lock:
+            pooled = self._clients.get((firm, base_url, self._hash(api_key), self.proxy))
+        if pooled is None:
+            return None
+        started: Dict[str, float] = {}
+        connect_seconds = [0.0]
+
+        def trace(event_name: str, info: Dict[str, Any]):
+            # connection.connect_tcp / connection.start_tls 等建立连接的阶段
+            if not event_name.startswith("connection."):
+                return
+            step, _, state = event_name.rpartition(".")
+            if state == "started":
+                started[step] = time.perf_counter()
+            elif state == "complete" and step in started:
+                connect_seconds[0] += time.perf_counter() - started.pop(step)
+
+        try:
+            # 响应状态不影响连接复用，4xx 也可以
+            pooled.http_client.request("HEAD", url, extensions={"trace": trace})
+        except httpx.HTTPError as e:
+            logger.warning(f"预热模型连接失败：[{firm} - {url}] {e}")
+            return None
+        saved_ms = connect_seconds[0] * 1000
+        with self._lock:
+            self._prewarms += 1
+            if saved_ms > 0:
+                self._prewarm_connects += 1
+        self._prewarm_saved_ms.add(saved_ms)
+        logger.info(f"预热模型连接：[{firm} - {url}] 建立连接 {saved_ms:.2f}ms")
+        return saved_ms
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "clients": len(self._clients),
+                "max_clients": self.max_clients,
+                "http2": self.http2,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+                "evictions": self._evictions,
+                "prewarms": self._prewarms,
+                "prewarm_connects": self._prewarm_connects,
+                "prewarm_saved_ms": self._prewarm_saved_ms.summary(),
+            }
+
+
+# 进程内共享的模型客户端池
+client_pool = ClientPool(
+    max_clients=int(os.environ.get("EFFLUX_LLM_POOL_MAX_CLIENTS", "16")),
+    idle_seconds=float(os.environ.get("EFFLUX_LLM_POOL_IDLE_SECONDS", "600")),
+    max_connections=int(os.environ.get("EFFLUX_LLM_POOL_MAX_CONNECTIONS", "20")),
+    http2=os.environ.get("EFFLUX_LLM_HTTP2", "false").strip().lower() in ("1", "true", "yes"),
+    proxy=os.environ.get("EFFLUX_LLM_PROXY") or None,
+)
+register_metrics("llm_client_pool", client_pool.stats)
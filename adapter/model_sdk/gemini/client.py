@@ -1,4 +1,4 @@
-from typing import Iterable, Optional, List, Generator, Iterator
+from typing import Dict, Iterable, Optional, List, Generator, Iterator
 
 from google.genai import types, Client
 from google.genai.types import Content, Part, FunctionDeclaration, GenerateContentResponse, Candidate
@@ -7,7 +7,7 @@ from adapter.model_sdk.client import ModelClient
 from application.domain.generators.chat_chunk.chunk import ChatStreamingChunk, ChatCompletionContentPartParam, \
     ChatCompletionMessageToolCall
 from application.domain.generators.generator import LLMGenerator
-from application.domain.generators.tools import Tool
+from application.domain.generators.tools import Tool, index_tools
 from common.utils.auth import Secret
 from common.utils.common_utils import create_uuid
 from common.utils.time_utils import create_from_timestamp_to_int, create_from_second_now_to_int
@@ -66,6 +66,8 @@ class GeminiClient(ModelClient):
 
         if tools:
             self._convert_gemini_tools(tools=tools)
+        # 按工具名匹配工具调用所属的 mcp server
+        tools_index: Dict[str, Tool] = index_tools(tools)
 
         response: Iterator[GenerateContentResponse] = client.models.generate_content_stream(
             model=model,
@@ -73,17 +75,21 @@ class GeminiClient(ModelClient):
             config=generate_content_config,
         )
 
-        for chunk in response:
-            logger.debug(f"原始chunk返回：{chunk}")
-            logger.debug("============================================================================================")
-            # if chunk.usage_metadata:
-            #     logger.debug(f"跳过用量：{chunk.usage_metadata}")
-            #     continue
-            if chunk.function_calls: # tools调用要先返回一个空的stop标识chunk
-                yield self._convert_efflux_stream_chunk(model=model, stop_flag=True)
-                yield self._convert_efflux_stream_chunk(content_response=chunk, tools=tools)
-            else:
-                yield  self._convert_efflux_stream_chunk(content_response=chunk)
+        try:
+            for chunk in response:
+                logger.debug(f"原始chunk返回：{chunk}")
+                logger.debug("============================================================================================")
+                # if chunk.usage_metadata:
+                #     logger.debug(f"跳过用量：{chunk.usage_metadata}")
+                #     continue
+                if chunk.function_calls: # tools调用要先返回一个空的stop标识chunk
+                    yield self._convert_efflux_stream_chunk(model=model, stop_flag=True)
+                    yield self._convert_efflux_stream_chunk(content_response=chunk, tools_index=tools_index)
+                else:
+                    yield  self._convert_efflux_stream_chunk(content_response=chunk)
+        finally:
+            # 共享连接池时提前结束迭代也要关闭响应，连接才能归还
+            response.close()
 
 
     def generate_test(self, model: str = None, message_list: Iterable[ChatStreamingChunk] = None,
@@ -164,44 +170,28 @@ class GeminiClient(ModelClient):
         """
         gemini_tools: List[FunctionDeclaration] = []
         for tool in tools:
-            tool_dist = tool.model_dump()
-            if "mcp_server_name" in tool_dist:
-                del tool_dist["mcp_server_name"]
-            if "group_name" in tool_dist:
-                del tool_dist["group_name"]
-            if "type" in tool_dist:
-                del tool_dist["type"]
-            if "input_schema" in tool_dist:
-                tool_dist["parameters"] = tool_dist["input_schema"]
-                del tool_dist["input_schema"]
-            gemini_tools.append(
-                FunctionDeclaration.model_validate(tool_dist)
-                # {
-                #     "name": tool.name,
-                #     "description": tool.description,
-                #     "parameters": {
-                #         "type": "object",
-                #         "properties": {
-                #             "brightness": {
-                #                 "type": "integer",
-                #                 "description": "Light level from 0 to 100. Zero is off and 100 is full brightness",
-                #             },
-                #             "color_temp": {
-                #                 "type": "string",
-                #                 "enum": ["daylight", "cool", "warm"],
-                #                 "description": "Color temperature of the light fixture, which can be `daylight`, `cool` or `warm`.",
-                #             },
-                #         },
-                #         "required": ["brightness", "color_temp"],
-                #     }
-                # }
-            )
+            # 转换结果缓存在工具对象上
+            gemini_tools.append(tool.provider_schema("google", GeminiClient._convert_gemini_tool))
         return types.Tool(function_declarations=gemini_tools)
 
+    @staticmethod
+    def _convert_gemini_tool(tool: Tool) -> FunctionDeclaration:
+        tool_dist = tool.model_dump()
+        if "mcp_server_name" in tool_dist:
+            del tool_dist["mcp_server_name"]
+        if "group_name" in tool_dist:
+            del tool_dist["group_name"]
+        if "type" in tool_dist:
+            del tool_dist["type"]
+        if "input_schema" in tool_dist:
+            tool_dist["parameters"] = tool_dist["input_schema"]
+            del tool_dist["input_schema"]
+        return FunctionDeclaration.model_validate(tool_dist)
+
     def _convert_efflux_stream_chunk(
             self,
             content_response: Optional[GenerateContentResponse] = None,
-            tools: Optional[List[Tool]] = None,
+            tools_index: Optional[Dict[str, Tool]] = None,
             model: Optional[str] = None,
             stop_flag: Optional[bool] = False
     ) -> Optional[ChatStreamingChunk]:
@@ -227,7 +217,7 @@ class GeminiClient(ModelClient):
                         arguments=json.dumps(function_call.args),
                     )
                     # 匹配mcp-server-name
-                    self._match_mcp_server_name(chunk_tools_call=chunk_tools_call, tools=tools)
+                    self._match_mcp_server_name(chunk_tools_call=chunk_tools_call, tools_index=tools_index or {})
                     chunk_tools.append(chunk_tools_call)
                 return ChatStreamingChunk.from_assistant(
                     id=content_response.response_id if content_response.response_id else create_uuid(),
@@ -353,20 +343,21 @@ class GeminiClient(ModelClient):
         return part_list
 
     @staticmethod
-    def _match_mcp_server_name(chunk_tools_call: ChatCompletionMessageToolCall, tools: Iterable[Tool]) -> None:
+    def _match_mcp_server_name(chunk_tools_call: ChatCompletionMessageToolCall, tools_index: Dict[str, Tool]) -> None:
         """
         match mcp.server name and description
         :param chunk_tools_call: the call tools
-        :param tools: mcp server tools
+        :param tools_index: mcp server tools indexed by name
         :return:
         """
-        for tool in tools:
-            if chunk_tools_call.name == tool.name:
-                chunk_tools_call.mcp_server_name = tool.mcp_server_name
-                chunk_tools_call.group_name = tool.group_name
-                chunk_tools_call.description = tool.description
+        tool = tools_index.get(chunk_tools_call.name)
+        if tool:
+            chunk_tools_call.mcp_server_name = tool.mcp_server_name
+            chunk_tools_call.group_name = tool.group_name
+            chunk_tools_call.description = tool.description
 
     def _get_client(self, api_key: str, base_url: str) -> Client:
+        # google-genai 1.22 的 HttpOptions 不支持传入 httpx 客户端，暂不使用 client_pool 共享连接池
         return Client(
             api_key=api_key,
             http_options={
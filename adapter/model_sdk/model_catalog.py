@@ -0,0 +1,136 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from application.domain.generators.firm import GeneratorFirm
+from application.domain.generators.generator import LLMGenerator
+from common.core.logger import get_logger
+from common.utils.auth import ApiKeySecret
+from common.utils.json_file_util import JSONFileUtil
+
+logger = get_logger(__name__)
+
+
+class _FirmSetting:
+
+    def __init__(self, base_url: Optional[str], api_key: Optional[ApiKeySecret]):
+        self.base_url = base_url
+        self.api_key = api_key
+
+
+class ModelCatalog:
+    """
+    模型目录：按模型id索引全部厂商已启用的模型，并合并厂商的 api key 和 base url。
+    厂商模型文件或用户设置文件的签名变化时才重建，resolve 只需要检查文件签名和一次字典查找。
+    """
+
+    def __init__(self, firms: Dict[str, Dict[str, Any]], user_setting_file_url: str,
+                 model_file_url_pattern: str = "adapter/model_sdk/setting/openai/{firm}_model.json"):
+        """
+        :param firms: 厂商名 -> 内置配置（base_url 等）
+        :param user_setting_file_url: 用户设置文件，保存厂商的 api key 和 base url
+        :param model_file_url_pattern: 厂商已启用模型的文件路径
+        """
+        self.firms = firms
+        self.user_setting_file_url = user_setting_file_url
+        self.model_file_url_pattern = model_file_url_pattern
+        self._lock = threading.Lock()
+        self._files: Optional[List[JSONFileUtil]] = None
+        self._signature: Optional[Tuple] = None
+        self._generators: Dict[str, LLMGenerator] = {}
+        self._firm_settings: Dict[str, _FirmSetting] = {}
+        self._rebuilds = 0
+        self._last_rebuild_ms = 0.0
+        self._resolves = 0
+
+    def _open_files(self) -> List[JSONFileUtil]:
+        """厂商模型文件及用户设置文件，不存在时创建"""
+        files = [JSONFileUtil(self.model_file_url_pattern.format(firm=firm)) for firm in self.firms]
+        files.append(JSONFileUtil(self.user_setting_file_url))
+        return files
+
+    def _rebuild(self, files: List[JSONFileUtil], signature: Tuple):
+        start = time.perf_counter()
+        generators: Dict[str, LLMGenerator] = {}
+        for firm, firm_model_config in zip(self.firms, files):
+            for firm_model_dict in firm_model_config.read().values():
+                generators[firm_model_dict['id']] = LLMGenerator.model_validate(firm_model_dict)
+        firm_settings: Dict[str, _FirmSetting] = {}
+        user_setting = files[-1].read()
+        for firm, config in self.firms.items():
+            firm_setting = user_setting.get(firm)
+            if firm_setting:
+                generator_firm = GeneratorFirm.model_validate(firm_setting)
+                firm_settings[firm] = _FirmSetting(generator_firm.base_url or config.get('base_url'), generator_firm.api_key)
+            else:
+                firm_settings[firm] = _FirmSetting(config.get('base_url'), None)
+        self._generators = generators
+        self._firm_settings = firm_settings
+        self._signature = signature
+        self._rebuilds += 1
+        self._last_rebuild_ms = (time.perf_counter() - start) * 1000
+        logger.debug(f"重建模型目录：{len(generators)} 个模型，耗时 {self._last_rebuild_ms:.2f}ms")
+
+    def _check(self):
+        """调用方持有锁"""
+        if self._files is None:
+            # 首次查询
+            self._files = self._open_files()
+        try:
+            signature = tuple(file.signature() for file in self._files)
+        except FileNotFoundError:
+            # 文件被删除，重新打开
+            self._files = self._open_files()
+            signature = tuple(file.signature() for file in self._files)
+        if signature != self._signature:
+            self._rebuild(self._files, signature)
+
+    def invalidate(self):
+        """下次查询时重建"""
+        with self._lock:
+            self._signature = None
+
+    def load(self, generate_id: str) -> Optional[LLMGenerator]:
+        """
+        按模型id获取模型，不包含 api key
+        :param generate_id: 模型id
+        :return: 模型不存在或未启用时返回 None
+        """
+        with self._lock:
+            self._check()
+            self._resolves += 1
+            llm_generator = self._generators.get(generate_id)
+        return llm_generator.model_copy() if llm_generator else None
+
+    def resolve(self, generate_id: str) -> Optional[LLMGenerator]:
+        """
+        按模型id获取模型，并设置厂商的 api key
+        :param generate_id: 模型id
+        :return: 模型不存在或未启用时返回 None
+        """
+        with self._lock:
+            self._check()
+            self._resolves += 1
+            llm_generator = self._generators.get(generate_id)
+            firm_setting = self._firm_settings.get(llm_generator.firm) if llm_generator else None
+        if llm_generator is None:
+            return None
+        llm_generator = llm_generator.model_copy()
+        llm_generator.set_api_key_secret(firm_setting.api_key if firm_setting else None)
+        return llm_generator
+
+    def base_url(self, firm: str) -> Optional[str]:
+        """厂商的 base url，用户未设置时使用内置配置"""
+        with self._lock:
+            self._check()
+            firm_setting = self._firm_settings.get(firm)
+        return firm_setting.base_url if firm_setting else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "models": len(self._generators),
+                "rebuilds": self._rebuilds,
+                "last_rebuild_ms": self._last_rebuild_ms,
+                "resolves": self._resolves,
+            }
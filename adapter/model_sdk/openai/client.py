@@ -8,13 +8,14 @@ from common.utils.auth import Secret
 from common.core.errors.system_exception import ThirdPartyServiceException, ThirdPartyServiceApiCode
 from application.domain.generators.chat_chunk.chunk import ChatStreamingChunk, ChatCompletionMessageToolCall
 from openai.types.chat.chat_completion_tool_param import ChatCompletionToolParam
-from application.domain.generators.tools import Tool
+from application.domain.generators.tools import Tool, index_tools
 from openai.types.chat.chat_completion_chunk import ChatCompletionChunk
 from openai.types.chat.chat_completion_message_param import ChatCompletionMessageParam
 from openai.types.chat.chat_completion import ChatCompletion
 from openai.types.shared_params.response_format_text import ResponseFormatText
 from openai.types.shared_params.response_format_json_object import ResponseFormatJSONObject
 from common.core.logger import get_logger
+from adapter.model_sdk.client_pool import client_pool
 logger = get_logger(__name__)
 
 class OpenAIClient(ModelClient):
@@ -156,36 +157,40 @@ class OpenAIClient(ModelClient):
             raise ThirdPartyServiceException(error_code=ThirdPartyServiceApiCode.LLM_SERVICE_API_ERROR, dynamics_message=f"model:{model} - exception:{str(exc)}")
 
         tool_calls: List[ChatCompletionMessageToolCall] = []
+        # 按工具名匹配工具调用所属的 mcp server
+        tools_index: Dict[str, Tool] = index_tools(tools)
         current_role = ""
         # 记录是否已经开始返回流式事件
         started_event = False
         last_chunk = None
-        for event in stream:
-            if not started_event:
-                started_event = True
-            # logger.debug("============================================================================================")
-            # logger.debug(f"原始chunk返回：{event}")
-            # logger.debug("============================================================================================")
-            if hasattr(event, "type") and event.type == 'ping': # claude sse ping 兼容
-                logger.debug("LLM API SSE Pong")
-            else:
-                if len(event.choices) > 0:
-                    # 补充每个chunk的role
-                    if event.choices[0].delta.role:
-                        current_role = event.choices[0].delta.role
-                    else:
-                        event.choices[0].delta.role = current_role
-
-                chunk: ChatCompletionChunk = self._convert_stream_chunk_pretreatment(event, tool_calls, tools)
-                if chunk is not None and self._is_none_chunk(chunk):
-                    chat_streaming_chunk: ChatStreamingChunk = self._convert_stream_chunk(chunk)
-                    if chat_streaming_chunk is not None:
-                        # 发送stop事件
-                        group_stop_chunk = self._set_group_stop(last_chunk=last_chunk, current_chunk=chat_streaming_chunk, started_event=started_event)
-                        if group_stop_chunk:
-                            yield group_stop_chunk
-                        last_chunk = chat_streaming_chunk
-                        yield chat_streaming_chunk
+        # 共享连接池时提前结束迭代也要关闭响应，连接才能归还
+        with stream:
+            for event in stream:
+                if not started_event:
+                    started_event = True
+                # logger.debug("============================================================================================")
+                # logger.debug(f"原始chunk返回：{event}")
+                # logger.debug("============================================================================================")
+                if hasattr(event, "type") and event.type == 'ping': # claude sse ping 兼容
+                    logger.debug("LLM API SSE Pong")
+                else:
+                    if len(event.choices) > 0:
+                        # 补充每个chunk的role
+                        if event.choices[0].delta.role:
+                            current_role = event.choices[0].delta.role
+                        else:
+                            event.choices[0].delta.role = current_role
+
+                    chunk: ChatCompletionChunk = self._convert_stream_chunk_pretreatment(event, tool_calls, tools_index)
+                    if chunk is not None and self._is_none_chunk(chunk):
+                        chat_streaming_chunk: ChatStreamingChunk = self._convert_stream_chunk(chunk)
+                        if chat_streaming_chunk is not None:
+                            # 发送stop事件
+                            group_stop_chunk = self._set_group_stop(last_chunk=last_chunk, current_chunk=chat_streaming_chunk, started_event=started_event)
+                            if group_stop_chunk:
+                                yield group_stop_chunk
+                            last_chunk = chat_streaming_chunk
+                            yield chat_streaming_chunk
 
     def _is_none_chunk(self, chunk: ChatCompletionChunk) -> bool:
         """
@@ -263,13 +268,13 @@ class OpenAIClient(ModelClient):
         self,
         completion_chunk: ChatCompletionChunk,
         tool_calls: List[ChatCompletionMessageToolCall],
-        tools: List[Tool]
+        tools_index: Dict[str, Tool]
     ) -> Optional[ChatCompletionChunk]:
         """
         pretreatment of convert stream chunk to ChatStreamingChunk
         :param completion_chunk: openai api completion
         :param tool_calls: tools call list
-        :param tools: efflux tools list
+        :param tools_index: efflux tools indexed by name
         :return:
         """
         # usage: Optional[CompletionUsage] = None
@@ -285,7 +290,7 @@ class OpenAIClient(ModelClient):
 
 
             # tool call 调用最后chunk中tool_calls=None且finish_reason='tool_calls'，所以不会进入此循环，而else的消息处理
-            self._append_stream_tool_args(completion=completion_chunk, tool_calls=tool_calls, tools=tools)
+            self._append_stream_tool_args(completion=completion_chunk, tool_calls=tool_calls, tools_index=tools_index)
         else:
             # 消息处理（此次如果有tool调用，则为拼接后的完整参数列表）
             if len(completion_chunk.choices) > 0 and tool_calls:
@@ -309,7 +314,7 @@ class OpenAIClient(ModelClient):
         else:
             return None
 
-    def _append_stream_tool_args(self, completion: ChatCompletionChunk, tool_calls: List[ChatCompletionMessageToolCall], tools: List[Tool]):
+    def _append_stream_tool_args(self, completion: ChatCompletionChunk, tool_calls: List[ChatCompletionMessageToolCall], tools_index: Dict[str, Tool]):
         """
         Call parameters for the tool that concatenates stream returns
         :param completion: stream chunk
@@ -323,7 +328,7 @@ class OpenAIClient(ModelClient):
                 current_tool = ChatCompletionMessageToolCall(id=openai_tool_call.id,
                                                              name=openai_tool_call.function.name,
                                                              arguments=openai_tool_call.function.arguments)
-                self._match_mcp_server_name(chunk_tools_call=current_tool, tools=tools)
+                self._match_mcp_server_name(chunk_tools_call=current_tool, tools_index=tools_index)
                 tool_calls.append(current_tool)
             else:
                 # If there is no ID, it means that the streaming parameter is being returned
@@ -331,18 +336,18 @@ class OpenAIClient(ModelClient):
                     tool_calls[openai_tool_call.index].arguments += openai_tool_call.function.arguments
 
     @staticmethod
-    def _match_mcp_server_name(chunk_tools_call: ChatCompletionMessageToolCall, tools: Iterable[Tool]) -> None:
+    def _match_mcp_server_name(chunk_tools_call: ChatCompletionMessageToolCall, tools_index: Dict[str, Tool]) -> None:
         """
         match mcp.server name and description
         :param chunk_tools_call: the call tools
-        :param tools: mcp server tools
+        :param tools_index: mcp server tools indexed by name
         :return:
         """
-        for tool in tools:
-            if chunk_tools_call.name == tool.name:
-                chunk_tools_call.mcp_server_name = tool.mcp_server_name
-                chunk_tools_call.group_name = tool.group_name
-                chunk_tools_call.description = tool.description
+        tool = tools_index.get(chunk_tools_call.name)
+        if tool:
+            chunk_tools_call.mcp_server_name = tool.mcp_server_name
+            chunk_tools_call.group_name = tool.group_name
+            chunk_tools_call.description = tool.description
 
     @staticmethod
     def _convert_openai_tools(tools: Iterable[Tool]) -> List[ChatCompletionToolParam]:
@@ -353,12 +358,11 @@ class OpenAIClient(ModelClient):
         """
         openai_tools: List[ChatCompletionToolParam] = []
         for tool in tools:
-            openai_tools.append(
-                {
-                    "type": "function",
-                    "function": {"name": tool.name, "description": tool.description, "parameters": tool.input_schema}
-                }
-            )
+            # 转换结果缓存在工具对象上
+            openai_tools.append(tool.provider_schema("openai", lambda tool: {
+                "type": "function",
+                "function": {"name": tool.name, "description": tool.description, "parameters": tool.input_schema}
+            }))
         return openai_tools
 
     @staticmethod
@@ -368,6 +372,11 @@ class OpenAIClient(ModelClient):
             tool_choice = generation_kwargs["tool_choice"]
         return tool_choice
 
+    def prewarm(self, api_secret: Secret = None, base_url: str = None) -> Optional[float]:
+        api_key = api_secret.resolve_value()
+        client = self._get_client(api_key=api_key, api_base_url=base_url)
+        return client_pool.prewarm(firm="openai", base_url=base_url, api_key=api_key, url=str(client.base_url))
+
     def _get_client(
             self,
             api_key: str,
@@ -390,10 +399,14 @@ class OpenAIClient(ModelClient):
         if max_retries is not None:
             self.max_retries = max_retries
 
-        return OpenAI(
+        # 相同厂商凭证复用客户端及其连接池
+        return client_pool.get(
+            firm="openai", base_url=api_base_url, api_key=api_key, timeout=self.timeout,
+            factory=lambda http_client: OpenAI(
                 api_key=api_key,
                 organization=organization,
                 base_url=api_base_url,
                 timeout=self.timeout,
-                max_retries=self.max_retries
-            )
\ No newline at end of file
+                max_retries=self.max_retries,
+                http_client=http_client
+            ))
\ No newline at end of file
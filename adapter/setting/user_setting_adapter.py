@@ -4,6 +4,7 @@ from common.core.container.annotate import component
 from typing import Dict, Any, List, Optional
 from common.utils.json_file_util import JSONFileUtil
 from common.utils.yaml_util import load_yaml
+from adapter.model_sdk.client_pool import client_pool
 
 @component
 class UserSettingAdapter(UserSettingPort):
@@ -24,6 +25,8 @@ class UserSettingAdapter(UserSettingPort):
         if not generator_firm.base_url:
             generator_firm.base_url = self.config[generator_firm.name]['base_url']
         user_setting.update_key(generator_firm.name, generator_firm.model_dump())
+        # 凭证或地址变化后不再复用旧的客户端
+        client_pool.invalidate(generator_firm.name)
         return True
 
     def load_firm_setting_list(self) -> List[GeneratorFirm]:
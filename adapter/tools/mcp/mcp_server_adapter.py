@@ -4,6 +4,9 @@ from application.domain.mcp_server import MCPServer
 from application.port.outbound.mcp_server_port import MCPServerPort
 from common.core.container.annotate import component
 from common.utils.json_file_util import JSONFileUtil
+from adapter.tools.mcp.mcp_session_pool import mcp_session_pool
+from adapter.tools.mcp.tool_registry import mcp_tool_registry
+from adapter.tools.mcp.result_cache import mcp_result_cache
 
 @component
 class MCPServerAdapter(MCPServerPort):
@@ -95,6 +98,10 @@ class MCPServerAdapter(MCPServerPort):
     def cancel_apply(self, server_name: str) -> str:
         user_mcp_servers = JSONFileUtil(self.user_mcp_servers_file_url)
         user_mcp_servers.delete(server_name)
+        # 关闭已启动的 server 进程，清除缓存的工具列表和调用结果
+        mcp_session_pool.invalidate(server_name)
+        mcp_tool_registry.invalidate(server_name)
+        mcp_result_cache.invalidate(server_name)
         return server_name
 
     def load_list(self, server_name: Optional[str] = None, server_tag: Optional[str] = None) -> List[MCPServer]:
@@ -139,4 +146,8 @@ class MCPServerAdapter(MCPServerPort):
         if mcp_server_dict:
             mcp_server_dict['enabled'] = enabled
             user_mcp_servers.update_key(server_name, mcp_server_dict)
+        if not enabled:
+            mcp_session_pool.invalidate(server_name)
+            mcp_tool_registry.invalidate(server_name)
+            mcp_result_cache.invalidate(server_name)
         return server_name
\ No newline at end of file
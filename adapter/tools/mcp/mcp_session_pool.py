@@ -0,0 +1,353 @@
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from mcp import ClientSession, types
+from mcp.client.stdio import StdioServerParameters, stdio_client
+
+from common.core.logger import get_logger
+from common.core.metrics import register_metrics, SampleWindow
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class _McpSession:
+    """一个 mcp server 子进程及其会话，只在池的事件循环中访问"""
+
+    def __init__(self, server_name: str, config_hash: str, parameters: StdioServerParameters, concurrency: int):
+        self.server_name = server_name
+        self.config_hash = config_hash
+        self.parameters = parameters
+        self.session: Optional[ClientSession] = None
+        # 会话初始化完成或启动失败
+        self.ready: asyncio.Future = asyncio.get_running_loop().create_future()
+        # 通知持有会话的任务退出，子进程随之关闭
+        self.closing = asyncio.Event()
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.task: Optional[asyncio.Task] = None
+        self.in_flight = 0
+        self.last_used = time.monotonic()
+        self.last_checked = self.last_used
+        self.startup_ms = 0.0
+        # 已移出池，最后一个调用结束后关闭
+        self.retired = False
+
+    @property
+    def alive(self) -> bool:
+        return self.task is not None and not self.task.done() and not self.closing.is_set()
+
+
+class McpSessionPool:
+    """
+    stdio mcp server 会话池：按 server 名保留已完成 initialize 的长连接会话，
+    工具列表和工具调用复用会话，不再每次启动子进程。
+    配置变化时替换会话，会话崩溃或健康检查失败时在下次使用时重启，空闲超时的会话关闭。
+    会话由池内独立线程的事件循环持有，调用方可以在任意事件循环中使用。
+    """
+
+    def __init__(self, max_sessions: int = 8, idle_seconds: float = 600, concurrency: int = 4,
+                 health_interval: float = 60, read_timeout_seconds: Optional[timedelta] = None):
+        """
+        :param max_sessions: 会话数量上限，全部会话都在调用中时允许暂时超出
+        :param idle_seconds: 会话空闲关闭时间
+        :param concurrency: 单个会话同时进行的请求数
+        :param health_interval: 健康检查间隔，空闲超过该时间的会话使用前先 ping
+        :param read_timeout_seconds: 会话请求的读取超时
+        """
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.concurrency = concurrency
+        self.health_interval = health_interval
+        self.read_timeout_seconds = read_timeout_seconds
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._maintain_task: Optional[asyncio.Task] = None
+        # server 通知的监听者，参数为 (server 名, 通知)
+        self._listeners: List[Callable[[str, Any], None]] = []
+        self._start_lock = threading.Lock()
+        self._sessions: "OrderedDict[str, _McpSession]" = OrderedDict()
+        self._starts = 0
+        self._restarts = 0
+        self._reuses = 0
+        self._failures = 0
+        self._crashes = 0
+        self._evictions = 0
+        self._startup_ms = SampleWindow(maxlen=1024)
+        # 复用会话省去的启动耗时
+        self._saved_ms = SampleWindow(maxlen=4096)
+        self._saved_ms_total = 0.0
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="mcp-session-pool", daemon=True).start()
+                loop.call_soon_threadsafe(self._start_maintain)
+                self._loop = loop
+            return self._loop
+
+    def add_listener(self, listener: Callable[[str, Any], None]):
+        """
+        监听 server 发送的通知，如 notifications/tools/list_changed；在池的事件循环中调用，不能阻塞
+        :param listener: 参数为 (server 名, 通知)
+        """
+        self._listeners.append(listener)
+
+    def _message_handler(self, server_name: str):
+        async def handle(message):
+            if not isinstance(message, types.ServerNotification):
+                return
+            for listener in self._listeners:
+                try:
+                    listener(server_name, message.root)
+                except Exception as e:
+                    logger.warning(f"处理 mcp server 通知失败：[{server_name}] {e}")
+        return handle
+
+    def _start_maintain(self):
+        self._maintain_task = asyncio.get_running_loop().create_task(self._maintain())
+
+    @staticmethod
+    def config_hash(parameters: StdioServerParameters) -> str:
+        config = {"command": parameters.command, "args": parameters.args, "env": parameters.env}
+        return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+    async def run(self, server_name: str, parameters: StdioServerParameters,
+                  operation: Callable[[ClientSession], Awaitable[T]], retry: bool = False) -> T:
+        """
+        在 server 的会话上执行操作，会话不存在时启动
+        :param server_name: mcp server 名
+        :param parameters: 启动参数，变化时替换会话
+        :param operation: 使用会话的操作，在池的事件循环中执行
+        :param retry: 会话失效导致失败时是否重启会话再执行一次，只用于幂等操作
+        :return: 操作结果
+        """
+        return await asyncio.wrap_future(self.submit(server_name, parameters, operation, retry))
+
+    def submit(self, server_name: str, parameters: StdioServerParameters,
+               operation: Callable[[ClientSession], Awaitable[T]], retry: bool = False) -> "concurrent.futures.Future[T]":
+        """
+        提交操作到池的事件循环，不等待结果。调用方放弃等待后操作仍会执行完成
+        :param server_name: mcp server 名
+        :param parameters: 启动参数
+        :param operation: 使用会话的操作
+        :param retry: 会话失效时是否重启重试
+        :return: 操作结果的 future
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self._run(server_name, parameters, operation, retry), self._ensure_loop())
+
+    async def _run(self, server_name: str, parameters: StdioServerParameters,
+                   operation: Callable[[ClientSession], Awaitable[T]], retry: bool) -> T:
+        entry = await self._acquire(server_name, parameters)
+        try:
+            return await self._execute(entry, operation)
+        except Exception:
+            if entry.alive and await self._healthy(entry):
+                # 会话正常，是操作本身的错误
+                raise
+            if not entry.closing.is_set():
+                self._crashes += 1
+            self._retire(entry)
+            if not retry:
+                raise
+            logger.warning(f"mcp server 会话失效，重启后重试：[{server_name}]")
+            self._restarts += 1
+            entry = await self._acquire(server_name, parameters)
+            return await self._execute(entry, operation)
+
+    async def _acquire(self, server_name: str, parameters: StdioServerParameters) -> _McpSession:
+        config_hash = self.config_hash(parameters)
+        entry = self._sessions.get(server_name)
+        if entry is not None and entry.config_hash != config_hash:
+            logger.info(f"mcp server 配置变化，替换会话：[{server_name}]")
+            self._retire(entry)
+            entry = None
+        elif entry is not None and not entry.alive:
+            logger.warning(f"mcp server 会话已退出，重启：[{server_name}]")
+            self._retire(entry)
+            self._restarts += 1
+            entry = None
+        elif (entry is not None and entry.ready.done() and entry.in_flight == 0
+              and time.monotonic() - max(entry.last_used, entry.last_checked) > self.health_interval
+              and not await self._healthy(entry)):
+            logger.warning(f"mcp server 会话健康检查失败，重启：[{server_name}]")
+            self._retire(entry)
+            self._restarts += 1
+            entry = None
+
+        if entry is None:
+            self._make_room()
+            entry = _McpSession(server_name, config_hash, parameters, self.concurrency)
+            self._sessions[server_name] = entry
+            entry.task = asyncio.create_task(self._serve(entry))
+            self._starts += 1
+        elif entry.ready.done() and not entry.ready.cancelled() and entry.ready.exception() is None:
+            self._reuses += 1
+            self._saved_ms.add(entry.startup_ms)
+            self._saved_ms_total += entry.startup_ms
+        self._sessions.move_to_end(server_name)
+        # 同一 server 的并发调用等待同一次启动
+        await asyncio.shield(entry.ready)
+        return entry
+
+    async def _execute(self, entry: _McpSession, operation: Callable[[ClientSession], Awaitable[T]]) -> T:
+        async with entry.semaphore:
+            entry.in_flight += 1
+            try:
+                return await operation(entry.session)
+            finally:
+                entry.in_flight -= 1
+                entry.last_used = time.monotonic()
+                if entry.retired and entry.in_flight == 0:
+                    entry.closing.set()
+
+    async def _serve(self, entry: _McpSession):
+        """启动子进程并持有会话，直到关闭；进入和退出 stdio_client 必须在同一个任务中"""
+        start = time.perf_counter()
+        try:
+            async with stdio_client(entry.parameters) as (read, write):
+                async with ClientSession(read_stream=read, write_stream=write,
+                                         read_timeout_seconds=self.read_timeout_seconds,
+                                         message_handler=self._message_handler(entry.server_name)) as session:
+                    await session.initialize()
+                    entry.session = session
+                    entry.startup_ms = (time.perf_counter() - start) * 1000
+                    self._startup_ms.add(entry.startup_ms)
+                    entry.ready.set_result(session)
+                    logger.info(f"启动 mcp server 会话：[{entry.server_name}] 耗时 {entry.startup_ms:.2f}ms")
+                    await entry.closing.wait()
+        except Exception as e:
+            if not entry.ready.done():
+                self._failures += 1
+                entry.ready.set_exception(e)
+            else:
+                logger.warning(f"mcp server 会话异常退出：[{entry.server_name}] {e}")
+        finally:
+            if not entry.closing.is_set() and entry.ready.done():
+                # 子进程自行退出，下次使用时重新启动
+                self._crashes += 1
+            entry.closing.set()
+            if self._sessions.get(entry.server_name) is entry:
+                del self._sessions[entry.server_name]
+            if not entry.ready.done():
+                entry.ready.cancel()
+            logger.info(f"关闭 mcp server 会话：[{entry.server_name}]")
+
+    async def _healthy(self, entry: _McpSession) -> bool:
+        if entry.session is None:
+            return False
+        try:
+            await asyncio.wait_for(entry.session.send_ping(), timeout=5)
+        except Exception:
+            return False
+        entry.last_checked = time.monotonic()
+        return True
+
+    def _retire(self, entry: _McpSession):
+        """移出池，没有进行中的调用时立即关闭"""
+        if self._sessions.get(entry.server_name) is entry:
+            del self._sessions[entry.server_name]
+        entry.retired = True
+        if entry.in_flight == 0:
+            entry.closing.set()
+
+    def _make_room(self):
+        """超出数量上限时关闭最久未使用的空闲会话"""
+        while len(self._sessions) >= self.max_sessions:
+            idle = next((entry for entry in self._sessions.values() if entry.in_flight == 0), None)
+            if idle is None:
+                logger.warning(f"mcp server 会话全部在使用中，暂时超出上限：{self.max_sessions}")
+                return
+            self._retire(idle)
+            self._evictions += 1
+
+    async def _maintain(self):
+        """定期关闭空闲超时的会话，并检查空闲会话的健康状态"""
+        while True:
+            await asyncio.sleep(self.health_interval)
+            now = time.monotonic()
+            for entry in list(self._sessions.values()):
+                if entry.in_flight or not entry.ready.done():
+                    continue
+                if now - entry.last_used > self.idle_seconds:
+                    logger.info(f"mcp server 会话空闲超时：[{entry.server_name}]")
+                    self._retire(entry)
+                    self._evictions += 1
+                elif not await self._healthy(entry):
+                    logger.warning(f"mcp server 会话健康检查失败：[{entry.server_name}]")
+                    self._retire(entry)
+
+    def invalidate(self, server_name: Optional[str] = None):
+        """
+        关闭会话，下次使用时重新启动
+        :param server_name: mcp server 名，为空时关闭全部
+        """
+        if self._loop is None:
+            return
+
+        def retire():
+            for entry in list(self._sessions.values()):
+                if server_name is None or entry.server_name == server_name:
+                    self._retire(entry)
+
+        self._loop.call_soon_threadsafe(retire)
+
+    def shutdown(self, timeout: float = 10):
+        """关闭全部会话及其子进程"""
+        if self._loop is None:
+            return
+
+        async def close_all():
+            if self._maintain_task:
+                self._maintain_task.cancel()
+            entries = list(self._sessions.values())
+            for entry in entries:
+                entry.closing.set()
+            await asyncio.gather(*(entry.task for entry in entries if entry.task), return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(close_all(), self._loop).result(timeout=timeout)
+        except Exception as e:
+            logger.warning(f"关闭 mcp server 会话失败：{e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+    def stats(self) -> Dict[str, Any]:
+        # 会话只在池的事件循环中修改，这里复制一份快照
+        sessions = list(dict(self._sessions).values())
+        total = self._starts + self._reuses
+        return {
+            "sessions": len(sessions),
+            "max_sessions": self.max_sessions,
+            "in_flight": sum(entry.in_flight for entry in sessions),
+            "starts": self._starts,
+            "restarts": self._restarts,
+            "reuses": self._reuses,
+            "reuse_rate": self._reuses / total if total else 0.0,
+            "failures": self._failures,
+            "crashes": self._crashes,
+            "evictions": self._evictions,
+            "startup_ms": self._startup_ms.summary(),
+            "saved_ms": self._saved_ms.summary(),
+            "saved_ms_total": self._saved_ms_total,
+        }
+
+
+# 进程内共享的 mcp server 会话池
+mcp_session_pool = McpSessionPool(
+    max_sessions=int(os.environ.get("EFFLUX_MCP_POOL_MAX_SESSIONS", "8")),
+    idle_seconds=float(os.environ.get("EFFLUX_MCP_POOL_IDLE_SECONDS", "600")),
+    concurrency=int(os.environ.get("EFFLUX_MCP_SESSION_CONCURRENCY", "4")),
+    health_interval=float(os.environ.get("EFFLUX_MCP_HEALTH_INTERVAL_SECONDS", "60")),
+    read_timeout_seconds=timedelta(seconds=120),
+)
+register_metrics("mcp_session_pool", mcp_session_pool.stats)
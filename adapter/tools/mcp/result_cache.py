@@ -0,0 +1,152 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from adapter.tools.tools import get_tool_cache_metadata, load_tool_cache_metadata
+from common.core.metrics import register_metrics, SampleWindow
+
+# (server 名, 启动参数哈希, 工具名, 规范化的参数)
+ResultKey = Tuple[str, str, str, str]
+
+
+class _CachedResult:
+
+    def __init__(self, result: List[str], expires_at: float, call_ms: float):
+        self.result = result
+        self.expires_at = expires_at
+        # 原调用耗时，即每次命中节省的时间
+        self.call_ms = call_ms
+
+
+class McpResultCache:
+    """
+    mcp 工具调用结果缓存：同一 server 的同一工具以相同参数重复调用时，在有效期内直接返回上次的结果。
+    只缓存显式配置为可缓存（adapter/tools/tools.py 中的缓存配置）或声明了 readOnlyHint 的工具，
+    调用失败的结果不缓存。server 配置变化或被移除时失效。
+    """
+
+    def __init__(self, enabled: bool = False, ttl: float = 300, max_entries: int = 256):
+        """
+        :param enabled: 是否启用，默认关闭
+        :param ttl: 未单独配置有效期的工具使用的缓存秒数
+        :param max_entries: 缓存的结果数量上限，超出时移除最久未使用的
+        """
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._results: "OrderedDict[ResultKey, _CachedResult]" = OrderedDict()
+        # server 名 -> 声明了 readOnlyHint 的工具名集合，列出工具时更新
+        self._read_only: Dict[str, frozenset] = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._saved_ms = SampleWindow(maxlen=1024)
+        self._saved_ms_total = 0.0
+
+    @staticmethod
+    def canonical_arguments(arguments: Optional[Dict[str, Any]]) -> str:
+        """参数规范化为键顺序无关的 json"""
+        return json.dumps(arguments or {}, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+    def set_read_only_tools(self, server_name: str, tool_names: List[str]):
+        """
+        记录 server 中声明了 readOnlyHint 的工具
+        :param server_name: mcp server 名
+        :param tool_names: 只读工具名集合
+        """
+        with self._lock:
+            self._read_only[server_name] = frozenset(tool_names)
+
+    def ttl_of(self, server_name: str, tool_name: str) -> Optional[float]:
+        """
+        工具调用结果的缓存秒数
+        :return: 未启用或工具不可缓存时返回 None
+        """
+        if not self.enabled:
+            return None
+        metadata = get_tool_cache_metadata(server_name, tool_name)
+        if metadata is not None:
+            return metadata.get("ttl", self.ttl) if metadata["cacheable"] else None
+        with self._lock:
+            read_only = tool_name in self._read_only.get(server_name, ())
+        return self.ttl if read_only else None
+
+    def get(self, key: ResultKey) -> Optional[List[str]]:
+        """
+        获取缓存的调用结果
+        :param key: 调用键
+        :return: 未缓存或已过期时返回 None
+        """
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None and cached.expires_at <= time.monotonic():
+                del self._results[key]
+                self._expirations += 1
+                cached = None
+            if cached is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._saved_ms_total += cached.call_ms
+            self._results.move_to_end(key)
+        self._saved_ms.add(cached.call_ms)
+        return list(cached.result)
+
+    def put(self, key: ResultKey, result: List[str], ttl: float, call_ms: float):
+        """
+        缓存调用结果
+        :param key: 调用键
+        :param result: 调用结果
+        :param ttl: 缓存秒数
+        :param call_ms: 调用耗时
+        """
+        with self._lock:
+            self._results[key] = _CachedResult(list(result), time.monotonic() + ttl, call_ms)
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, server_name: Optional[str] = None):
+        """
+        移除缓存的调用结果
+        :param server_name: mcp server 名，为空时全部移除
+        """
+        with self._lock:
+            for key in [key for key in self._results if server_name is None or key[0] == server_name]:
+                del self._results[key]
+            if server_name is None:
+                self._read_only.clear()
+            else:
+                self._read_only.pop(server_name, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._results),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "saved_ms": self._saved_ms.summary(),
+                "saved_ms_total": self._saved_ms_total,
+            }
+
+
+load_tool_cache_metadata(os.environ.get("EFFLUX_MCP_RESULT_CACHE_TOOLS", ""))
+# 进程内共享的 mcp 工具调用结果缓存
+mcp_result_cache = McpResultCache(
+    enabled=os.environ.get("EFFLUX_MCP_RESULT_CACHE", "false").strip().lower() in ("1", "true", "yes"),
+    ttl=float(os.environ.get("EFFLUX_MCP_RESULT_CACHE_TTL_SECONDS", "300")),
+    max_entries=int(os.environ.get("EFFLUX_MCP_RESULT_CACHE_MAX_ENTRIES", "256")),
+)
+register_metrics("mcp_result_cache", mcp_result_cache.stats)
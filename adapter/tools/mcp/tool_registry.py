@@ -0,0 +1,110 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from mcp import types
+
+from adapter.tools.mcp.mcp_session_pool import mcp_session_pool
+from application.domain.generators.tools import Tool
+from common.core.logger import get_logger
+from common.core.metrics import register_metrics
+
+logger = get_logger(__name__)
+
+
+class _ServerTools:
+
+    def __init__(self, config_hash: str, tools: List[Tool], load_ms: float):
+        self.config_hash = config_hash
+        self.tools = tools
+        self.load_ms = load_ms
+        self.loaded_at = time.time()
+
+
+class McpToolRegistry:
+    """
+    mcp 工具注册表：缓存每个 server 的 list_tools 结果，每轮对话不再启动 server 列出工具。
+    server 启动参数变化、收到 notifications/tools/list_changed 或配置被移除时失效。
+    注册表中的工具对象跨轮次共享，按厂商转换后的定义缓存在工具对象上（Tool.provider_schema）。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._servers: Dict[str, _ServerTools] = {}
+        # server 名 -> 失效次数，加载期间失效的结果不写入
+        self._versions: Dict[str, int] = {}
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def get(self, server_name: str, config_hash: str) -> Optional[List[Tool]]:
+        """
+        获取 server 的工具集合
+        :param server_name: mcp server 名
+        :param config_hash: server 当前的启动参数哈希，与缓存时不同则视为失效
+        :return: 未缓存或已失效时返回 None；返回的工具对象共享，调用方不应修改
+        """
+        with self._lock:
+            server_tools = self._servers.get(server_name)
+            if server_tools is not None and server_tools.config_hash == config_hash:
+                self._hits += 1
+                return list(server_tools.tools)
+            self._misses += 1
+            return None
+
+    def version(self, server_name: str) -> int:
+        """加载前获取版本，写入时校验"""
+        with self._lock:
+            return self._versions.get(server_name, 0)
+
+    def put(self, server_name: str, config_hash: str, tools: List[Tool], version: int, load_ms: float = 0.0):
+        """
+        缓存 server 的工具集合
+        :param server_name: mcp server 名
+        :param config_hash: 加载时的启动参数哈希
+        :param tools: 工具集合
+        :param version: 加载前获取的版本，加载期间注册表失效过则不写入
+        :param load_ms: 加载耗时
+        """
+        with self._lock:
+            if self._versions.get(server_name, 0) != version:
+                logger.info(f"mcp server 工具列表加载期间已变化，不缓存：[{server_name}]")
+                return
+            self._servers[server_name] = _ServerTools(config_hash, list(tools), load_ms)
+
+    def invalidate(self, server_name: Optional[str] = None):
+        """
+        使 server 的工具集合失效
+        :param server_name: mcp server 名，为空时全部失效
+        """
+        with self._lock:
+            server_names = list(self._servers) if server_name is None else [server_name]
+            for name in server_names:
+                self._versions[name] = self._versions.get(name, 0) + 1
+                if self._servers.pop(name, None) is not None:
+                    self._invalidations += 1
+
+    def on_notification(self, server_name: str, notification: Any):
+        """mcp server 通知，工具列表变化时失效"""
+        if isinstance(notification, types.ToolListChangedNotification):
+            logger.info(f"mcp server 工具列表变化：[{server_name}]")
+            self.invalidate(server_name)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "servers": len(self._servers),
+                "tools": sum(len(server_tools.tools) for server_tools in self._servers.values()),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+                "invalidations": self._invalidations,
+                "load_ms": {name: server_tools.load_ms for name, server_tools in self._servers.items()},
+            }
+
+
+# 进程内共享的 mcp 工具注册表
+mcp_tool_registry = McpToolRegistry()
+mcp_session_pool.add_listener(mcp_tool_registry.on_notification)
+register_metrics("mcp_tool_registry", mcp_tool_registry.stats)
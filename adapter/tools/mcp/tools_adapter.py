@@ -1,6 +1,6 @@
 from mcp.types import CallToolResult
-from mcp import ClientSession, types
-from mcp.client.stdio import StdioServerParameters, stdio_client
+from mcp import types
+from mcp.client.stdio import StdioServerParameters
 import injector
 import jsonlines
 from common.utils.file_util import check_file_and_create, check_file
@@ -10,15 +10,16 @@ from common.core.errors.system_exception import ThirdPartyServiceException, Thir
 from application.port.outbound.mcp_server_port import MCPServerPort
 from application.domain.mcp_server import MCPServer
 from typing import List, Optional
-from datetime import timedelta
+import asyncio
 import json
+import time
 from common.core.logger import get_logger
+from adapter.tools.mcp.mcp_session_pool import mcp_session_pool
+from adapter.tools.mcp.tool_registry import mcp_tool_registry
+from adapter.tools.mcp.result_cache import mcp_result_cache
 
 logger = get_logger(__name__)
 
-# mcp 访问超时时间
-delta = timedelta(seconds=120)
-
 @component
 class McpToolsAdapter:
     """
@@ -79,39 +80,87 @@ class McpToolsAdapter:
     #     else:
     #         return None  # 如果没有找到匹配的工具实例对象，则返回 None
 
-    async def load_tools(self, mcp_server_name: str) -> List[Tool]:
+    def cached_tools(self, mcp_server_name: str) -> Optional[List[Tool]]:
+        """
+        从工具注册表获取 server 的工具集合，不启动 server
+        :param mcp_server_name: mcp server 名
+        :return: 未缓存或 server 配置已变化时返回 None
+        """
+        stdio_server_parameters: StdioServerParameters = self._load_config(mcp_server_name)
+        return mcp_tool_registry.get(mcp_server_name, mcp_session_pool.config_hash(stdio_server_parameters))
+
+    async def load_tools(self, mcp_server_name: str, timeout: Optional[float] = None) -> List[Tool]:
+        """
+        获取 server 的工具集合，优先从工具注册表获取
+        :param mcp_server_name: mcp server 名
+        :param timeout: 等待时间，超时抛出 asyncio.TimeoutError；为空时一直等待
+        :return: 工具集合
+        """
         stdio_server_parameters: StdioServerParameters = self._load_config(mcp_server_name)
-        tools = []
-        async with stdio_client(stdio_server_parameters) as (read, write):
-            async with ClientSession(read_stream=read, write_stream=write, read_timeout_seconds=delta) as session:
-                await session.initialize()
-                tools_rs: types.ListToolsResult = await session.list_tools()
-                for mcp_tool in tools_rs.tools:
-                    logger.debug(f"load Tool: {mcp_tool.name} Description: {mcp_tool.description} InputSchema: {mcp_tool.inputSchema} ModelConfig: {mcp_tool.model_config}")
-                    tool = Tool(mcp_server_name=mcp_server_name,name=mcp_tool.name, description=mcp_tool.description, input_schema=mcp_tool.inputSchema, type=ToolType.MCP)
-                    tools.append(tool)
-        return tools
+        config_hash = mcp_session_pool.config_hash(stdio_server_parameters)
+        tools = mcp_tool_registry.get(mcp_server_name, config_hash)
+        if tools is not None:
+            return tools
+        version = mcp_tool_registry.version(mcp_server_name)
+        start = time.perf_counter()
+
+        async def list_tools(session) -> List[Tool]:
+            tools_rs: types.ListToolsResult = await session.list_tools()
+            server_tools = []
+            read_only_tools = []
+            for mcp_tool in tools_rs.tools:
+                annotations = getattr(mcp_tool, "annotations", None)
+                if annotations is not None and getattr(annotations, "readOnlyHint", None):
+                    read_only_tools.append(mcp_tool.name)
+                logger.debug(f"load Tool: {mcp_tool.name} Description: {mcp_tool.description} InputSchema: {mcp_tool.inputSchema} ModelConfig: {mcp_tool.model_config}")
+                tool = Tool(mcp_server_name=mcp_server_name,name=mcp_tool.name, description=mcp_tool.description, input_schema=mcp_tool.inputSchema, type=ToolType.MCP)
+                server_tools.append(tool)
+            mcp_result_cache.set_read_only_tools(mcp_server_name, read_only_tools)
+            # 在池的事件循环中写入注册表，调用方超时放弃等待后加载结果仍可供下一轮对话使用
+            mcp_tool_registry.put(mcp_server_name, config_hash, server_tools, version, load_ms=(time.perf_counter() - start) * 1000)
+            return server_tools
+
+        # 复用会话池中已初始化的会话，列出工具是幂等的，会话失效时重启重试
+        future = asyncio.wrap_future(mcp_session_pool.submit(mcp_server_name, stdio_server_parameters, list_tools, retry=True))
+        # 超时后无人等待，取走异常避免告警
+        future.add_done_callback(lambda done: done.cancelled() or done.exception())
+        # 超时只取消等待，不取消池中的加载
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
 
     async def call_tools(self, tool_instance: ToolInstance) -> dict[str, list[types.TextContent | types.ImageContent | types.EmbeddedResource] | str]:
         stdio_server_parameters: StdioServerParameters = self._load_config(tool_instance.mcp_server_name)
-        async with stdio_client(stdio_server_parameters) as (read, write):
-            async with ClientSession(read_stream=read, write_stream=write, read_timeout_seconds=delta) as session:
-                await session.initialize()
-                logger.debug(f"工具调用参数：{tool_instance.arguments}")
-                try:
-                    result: CallToolResult = await session.call_tool(name=tool_instance.name, arguments=tool_instance.arguments)
-                except Exception as e:
-                    raise ThirdPartyServiceException(
-                        error_code=ThirdPartyServiceApiCode.MCP_SERVER_API_ERROR,
-                        dynamics_message=f"tools call: {tool_instance.mcp_server_name} {tool_instance.name} failed - message: {str(e)}")
-                if result.isError:
-                    raise ThirdPartyServiceException(
-                        error_code=ThirdPartyServiceApiCode.MCP_SERVER_API_ERROR,
-                        dynamics_message=f"tools call: {tool_instance.mcp_server_name} {tool_instance.name} failed - message: {str(result.content)}")
-                data_list = []
-                for result_content in result.content:
-                    data_list.append(result_content.model_dump_json())
-                return {"id": tool_instance.tool_call_id, "result": data_list}
+        logger.debug(f"工具调用参数：{tool_instance.arguments}")
+        # 只读工具以相同参数重复调用时使用缓存的结果
+        cache_ttl = mcp_result_cache.ttl_of(tool_instance.mcp_server_name, tool_instance.name)
+        cache_key = None
+        if cache_ttl is not None:
+            cache_key = (tool_instance.mcp_server_name, mcp_session_pool.config_hash(stdio_server_parameters),
+                         tool_instance.name, mcp_result_cache.canonical_arguments(tool_instance.arguments))
+            cached_result = mcp_result_cache.get(cache_key)
+            tool_instance.cache_hit = cached_result is not None
+            if cached_result is not None:
+                logger.info(f"工具调用命中结果缓存：[{tool_instance.mcp_server_name} - {tool_instance.name}]")
+                return {"id": tool_instance.tool_call_id, "result": cached_result}
+        start = time.perf_counter()
+        try:
+            # 工具调用可能有副作用，会话失效时不重试
+            result: CallToolResult = await mcp_session_pool.run(
+                tool_instance.mcp_server_name, stdio_server_parameters,
+                lambda session: session.call_tool(name=tool_instance.name, arguments=tool_instance.arguments))
+        except Exception as e:
+            raise ThirdPartyServiceException(
+                error_code=ThirdPartyServiceApiCode.MCP_SERVER_API_ERROR,
+                dynamics_message=f"tools call: {tool_instance.mcp_server_name} {tool_instance.name} failed - message: {str(e)}")
+        if result.isError:
+            raise ThirdPartyServiceException(
+                error_code=ThirdPartyServiceApiCode.MCP_SERVER_API_ERROR,
+                dynamics_message=f"tools call: {tool_instance.mcp_server_name} {tool_instance.name} failed - message: {str(result.content)}")
+        data_list = []
+        for result_content in result.content:
+            data_list.append(result_content.model_dump_json())
+        if cache_key is not None:
+            mcp_result_cache.put(cache_key, data_list, cache_ttl, call_ms=(time.perf_counter() - start) * 1000)
+        return {"id": tool_instance.tool_call_id, "result": data_list}
 
     def _load_config(self, mcp_server_name: str) -> StdioServerParameters:
         mcp_server: MCPServer = self.mcp_server_port.load_applied(mcp_server_name)
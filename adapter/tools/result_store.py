@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from application.domain.generators.tools import ToolInstance
+from common.core.logger import get_logger
+from common.core.metrics import register_metrics, SampleWindow
+
+logger = get_logger(__name__)
+
+_result_id_pattern = re.compile(r"^[0-9a-f]{64}$")
+
+
+class ToolResultStore:
+    """
+    工具调用结果外置：超过大小阈值的结果完整保存在 conversations/tool_results/{前2位}/{sha256}.json，
+    工具调用实例只保留按 token 截取的首尾摘要和结果id，事件、调用记录和之后每轮的模型上下文都只携带摘要。
+    完整结果按结果id读取。
+    """
+
+    result_dir = "conversations/tool_results"
+
+    def __init__(self, spill_bytes: int = 32768, excerpt_tokens: int = 2000):
+        """
+        :param spill_bytes: 结果超过该字节数时外置，0 表示不外置
+        :param excerpt_tokens: 摘要保留的 token 数，首尾各一半
+        """
+        self.spill_bytes = spill_bytes
+        self.excerpt_tokens = excerpt_tokens
+        self._lock = threading.Lock()
+        self._encoding = None
+        self._encoding_loaded = False
+        self._spilled = 0
+        self._bytes_saved_total = 0
+        self._tokens_saved_total = 0
+        self._bytes_saved = SampleWindow(maxlen=1024)
+        self._tokens_saved = SampleWindow(maxlen=1024)
+        self._turn_bytes_saved = SampleWindow(maxlen=1024)
+        self._turn_tokens_saved = SampleWindow(maxlen=1024)
+
+    def _result_path(self, result_id: str) -> str:
+        return f"{self.result_dir}/{result_id[:2]}/{result_id}.json"
+
+    def _tokenizer(self):
+        """加载 tiktoken 编码，离线等原因加载失败时按字节估算"""
+        if not self._encoding_loaded:
+            with self._lock:
+                if not self._encoding_loaded:
+                    try:
+                        import tiktoken
+                        self._encoding = tiktoken.encoding_for_model("gpt-4o")
+                    except Exception as e:
+                        logger.warning(f"加载 tiktoken 编码失败，工具结果按字节估算 token：{e}")
+                    self._encoding_loaded = True
+        return self._encoding
+
+    def _excerpt(self, text: str) -> Tuple[str, str, int, int]:
+        """
+        截取首尾摘要
+        :return: (开头, 结尾, 原文 token 数, 省略的 token 数)
+        """
+        head_tokens = self.excerpt_tokens - self.excerpt_tokens // 2
+        tail_tokens = self.excerpt_tokens // 2
+        encoding = self._tokenizer()
+        if encoding is not None:
+            tokens = encoding.encode(text, disallowed_special=())
+            if len(tokens) <= self.excerpt_tokens:
+                return text, "", len(tokens), 0
+            return (encoding.decode(tokens[:head_tokens]), encoding.decode(tokens[-tail_tokens:]) if tail_tokens else "",
+                    len(tokens), len(tokens) - self.excerpt_tokens)
+        # 约 4 字节 1 token
+        data = text.encode("utf-8")
+        total_tokens = (len(data) + 3) // 4
+        if total_tokens <= self.excerpt_tokens:
+            return text, "", total_tokens, 0
+        head = data[:head_tokens * 4].decode("utf-8", errors="ignore")
+        tail = data[len(data) - tail_tokens * 4:].decode("utf-8", errors="ignore") if tail_tokens else ""
+        return head, tail, total_tokens, total_tokens - self.excerpt_tokens
+
+    def apply(self, tool_instance: ToolInstance, result: List[str]) -> List[str]:
+        """
+        按大小策略处理工具调用结果，超过阈值时保存完整结果并返回摘要
+        :param tool_instance: 工具调用实例，外置时记录结果id和原始大小
+        :param result: 完整结果
+        :return: 交给模型和持久化的结果
+        """
+        if not self.spill_bytes or not result:
+            return result
+        payload = json.dumps(result, ensure_ascii=False)
+        data = payload.encode("utf-8")
+        if len(data) <= self.spill_bytes:
+            return result
+        head, tail, total_tokens, omitted_tokens = self._excerpt("\n".join(result))
+        if not omitted_tokens:
+            # 字节数超过阈值但 token 数在摘要范围内，不需要截取
+            return result
+        result_id = hashlib.sha256(data).hexdigest()
+        path = self._result_path(result_id)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_file = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_file, "wb") as f:
+                f.write(data)
+            os.replace(tmp_file, path)
+        excerpt_result = [f"[工具结果过长，完整结果已保存（result_id: {result_id}，{len(data)} 字节，约 {total_tokens} tokens），"
+                          f"以下为开头和结尾部分]\n{head}\n...[省略约 {omitted_tokens} tokens]...\n{tail}"]
+        tool_instance.result_ref = result_id
+        tool_instance.result_bytes = len(data)
+        tool_instance.result_tokens = total_tokens
+        bytes_saved = len(data) - len(json.dumps(excerpt_result, ensure_ascii=False).encode("utf-8"))
+        tokens_saved = omitted_tokens
+        with self._lock:
+            self._spilled += 1
+            self._bytes_saved_total += bytes_saved
+            self._tokens_saved_total += tokens_saved
+        self._bytes_saved.add(bytes_saved)
+        self._tokens_saved.add(tokens_saved)
+        logger.info(f"工具结果外置：[{tool_instance.name} - {result_id}] {len(data)} 字节，约 {total_tokens} tokens，"
+                    f"节省 {bytes_saved} 字节，约 {tokens_saved} tokens")
+        return excerpt_result
+
+    def record_turn(self, tool_instances: List[ToolInstance]):
+        """统计一轮工具调用外置结果节省的字节数和 token 数"""
+        spilled = [tool_instance for tool_instance in tool_instances if tool_instance.result_ref]
+        if not spilled:
+            return
+        bytes_saved = sum(tool_instance.result_bytes - len(json.dumps(tool_instance.result, ensure_ascii=False).encode("utf-8"))
+                          for tool_instance in spilled)
+        tokens_saved = sum(max(tool_instance.result_tokens - self.excerpt_tokens, 0) for tool_instance in spilled)
+        self._turn_bytes_saved.add(bytes_saved)
+        self._turn_tokens_saved.add(tokens_saved)
+        logger.info(f"本轮工具结果外置 {len(spilled)} 个：节省 {bytes_saved} 字节，约 {tokens_saved} tokens")
+
+    def load(self, result_id: str) -> Optional[List[str]]:
+        """
+        读取完整结果
+        :param result_id: 结果id
+        :return: 不存在时返回 None
+        """
+        if not _result_id_pattern.match(result_id or ""):
+            return None
+        path = self._result_path(result_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "spill_bytes": self.spill_bytes,
+                "excerpt_tokens": self.excerpt_tokens,
+                "tokenizer": self._encoding.name if self._encoding is not None else ("bytes" if self._encoding_loaded else None),
+                "spilled": self._spilled,
+                "bytes_saved_total": self._bytes_saved_total,
+                "tokens_saved_total": self._tokens_saved_total,
+                "bytes_saved": self._bytes_saved.summary(),
+                "tokens_saved": self._tokens_saved.summary(),
+                "turn_bytes_saved": self._turn_bytes_saved.summary(),
+                "turn_tokens_saved": self._turn_tokens_saved.summary(),
+            }
+
+
+# 进程内共享的工具结果外置存储
+tool_result_store = ToolResultStore(
+    spill_bytes=int(os.environ.get("EFFLUX_TOOL_RESULT_SPILL_BYTES", "32768")),
+    excerpt_tokens=int(os.environ.get("EFFLUX_TOOL_RESULT_EXCERPT_TOKENS", "2000")),
+)
+register_metrics("tool_result_store", tool_result_store.stats)
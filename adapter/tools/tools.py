@@ -1,6 +1,6 @@
 from collections.abc import Sequence
 from typing_extensions import NotRequired, TypedDict
-from typing import Any, Dict, List, Literal, Mapping, Protocol, Type, TypeVar, cast, runtime_checkable
+from typing import Any, Dict, List, Literal, Mapping, Optional, Protocol, Type, TypeVar, cast, runtime_checkable
 
 MaybeRequiresApproval = Literal["always", "maybe", "never"]
 
@@ -53,6 +53,46 @@ def get_tool_metadata(tool_name_or_schema: str | ToolSchema) -> ToolMetadata:
 
     return metadata
 
+class ToolCacheMetadata(TypedDict):
+    """工具调用结果缓存配置"""
+    # 调用结果是否可以缓存，只用于只读、幂等的工具
+    cacheable: bool
+    # 缓存有效秒数，缺省时使用全局配置
+    ttl: NotRequired[float]
+
+# "server名/工具名" 或 "工具名" -> 缓存配置
+_tool_cache_metadata: dict[str, ToolCacheMetadata] = {}
+
+def set_tool_cache_metadata(tool_name: str, metadata: ToolCacheMetadata, server_name: Optional[str] = None) -> None:
+    """
+    设置工具调用结果的缓存配置
+    :param tool_name: 工具名
+    :param metadata: 缓存配置
+    :param server_name: mcp server 名，为空时对所有 server 的同名工具生效
+    """
+    _tool_cache_metadata[f"{server_name}/{tool_name}" if server_name else tool_name] = metadata
+
+def get_tool_cache_metadata(server_name: Optional[str], tool_name: str) -> Optional[ToolCacheMetadata]:
+    """获取工具的缓存配置，server 下的配置优先，未配置时返回 None"""
+    metadata = _tool_cache_metadata.get(f"{server_name}/{tool_name}") if server_name else None
+    return metadata if metadata is not None else _tool_cache_metadata.get(tool_name)
+
+def load_tool_cache_metadata(spec: str) -> None:
+    """
+    从配置字符串加载缓存配置，格式为逗号分隔的 "server名/工具名=秒数" 或 "工具名=秒数"，秒数为 0 表示不缓存
+    例如：fetch/fetch=600,read_file=60,filesystem/write_file=0
+    """
+    for item in spec.split(","):
+        name, _, ttl = item.strip().partition("=")
+        if not name:
+            continue
+        server_name, _, tool_name = name.rpartition("/")
+        ttl_seconds = float(ttl) if ttl else None
+        metadata = ToolCacheMetadata(cacheable=ttl_seconds != 0)
+        if ttl_seconds:
+            metadata["ttl"] = ttl_seconds
+        set_tool_cache_metadata(tool_name, metadata, server_name or None)
+
 REQUIRE_APPROVAL_KEY = "require_approval"
 REQUIRE_APPROVAL_PROMPT_FORMAT = "Is this action something that would require human approval before being done? Example: {guarded_examples}; but {unguarded_examples} are not {category}."
 IRREVERSIBLE_ACTION_PROMPT_FORMAT = REQUIRE_APPROVAL_PROMPT_FORMAT
@@ -1,15 +1,22 @@
-from typing import Any, List, Optional
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional
 
-from application.domain.generators.tools import ToolInstance, Tool, ToolType
+from application.domain.generators.tools import ToolInstance, Tool, ToolType, ToolsLoadResult
 from application.port.outbound.tools_port import ToolsPort
 from common.core.container.annotate import component
-from common.utils.file_util import check_file_and_create, check_file
+from common.utils.jsonl_log_util import JsonlLog
+from common.utils.jsonl_offset_index import JsonlOffsetIndex
 from adapter.tools.mcp.tools_adapter import McpToolsAdapter
 from adapter.tools.local.tools_adapter import LocalToolsAdapter
+from adapter.tools.result_store import tool_result_store
+from common.core.logger import get_logger
 
-import jsonlines
 import injector
 
+logger = get_logger(__name__)
+
 @component
 class ToolsManager(ToolsPort):
 
@@ -22,12 +29,16 @@ class ToolsManager(ToolsPort):
         self.mcp_tools_adapter = mcp_tools_adapter
         self.local_tools_adapter = local_tools_adapter
         self.tool_calls_file_pre_url = "conversations/tool_calls_record/"
+        # 工具调用记录为追加写日志，结果以更新记录追加
+        self.tool_calls_log = JsonlLog(key_field="tool_call_id")
+        # 按工具调用id和对话片段id定位记录的偏移索引，按条件查询时不再解析整个文件
+        self.tool_calls_index = JsonlOffsetIndex(self.tool_calls_log, group_field="dialog_segment_id")
+        # 每个 mcp server 加载工具的等待时间，超时的 server 本轮不使用，加载在后台继续并写入工具注册表
+        self.mcp_tools_deadline = float(os.environ.get("EFFLUX_MCP_TOOLS_DEADLINE_SECONDS", "10"))
 
     def save_instance(self, tool_instance: ToolInstance) -> ToolInstance:
         tool_calls_file = f"{self.tool_calls_file_pre_url}{tool_instance.conversation_id}.jsonl"
-        check_file_and_create(tool_calls_file)
-        with jsonlines.open(tool_calls_file, mode='a') as writer:
-            writer.write(tool_instance.model_dump())
+        self.tool_calls_log.append(tool_calls_file, tool_instance.to_record())
         return tool_instance
 
     def load_instance(self,
@@ -36,42 +47,72 @@ class ToolsManager(ToolsPort):
                       tool_call_id: Optional[str] = None
                       ) -> List[ToolInstance]:
         tool_calls_file = f"{self.tool_calls_file_pre_url}{conversation_id}.jsonl"
+        if dialog_segment_id is None and tool_call_id is None:
+            return [ToolInstance.from_record(obj) for obj in self.tool_calls_log.read(tool_calls_file)]
         tool_calls_list: List[ToolInstance] = []
-        if check_file(tool_calls_file):
-            with jsonlines.open(tool_calls_file, mode='r') as reader:
-                for obj in reader:
-                    if dialog_segment_id is None and tool_call_id is None:
-                        tool_calls_list.append(ToolInstance.model_validate(obj))
-                    if obj['dialog_segment_id'] == dialog_segment_id:
-                        tool_calls_list.append(ToolInstance.model_validate(obj))
-                    if tool_call_id and obj['tool_call_id'] == tool_call_id:
-                        tool_calls_list.append(ToolInstance.model_validate(obj))
+        if dialog_segment_id is not None:
+            for obj in self.tool_calls_index.find_group(tool_calls_file, dialog_segment_id):
+                tool_calls_list.append(ToolInstance.from_record(obj))
+        if tool_call_id:
+            for obj in self.tool_calls_index.find(tool_calls_file, [tool_call_id]):
+                tool_calls_list.append(ToolInstance.from_record(obj))
         return tool_calls_list
 
+    def load_instance_map(self, conversation_id: str,
+                          dialog_segment_ids: Optional[List[str]] = None) -> Dict[str, List[ToolInstance]]:
+        tool_calls_file = f"{self.tool_calls_file_pre_url}{conversation_id}.jsonl"
+        tool_calls_map: Dict[str, List[ToolInstance]] = {}
+        if dialog_segment_ids is None:
+            records = self.tool_calls_log.read(tool_calls_file)
+        else:
+            # 只读取指定对话片段的记录，分页加载时不再解析整个文件
+            records = self.tool_calls_index.find_groups(tool_calls_file, dialog_segment_ids)
+        for obj in records:
+            tool_calls_map.setdefault(obj['dialog_segment_id'], []).append(ToolInstance.from_record(obj))
+        return tool_calls_map
+
     def update_instance(self, tool_instance: ToolInstance) -> Optional[ToolInstance]:
         tool_calls_file = f"{self.tool_calls_file_pre_url}{tool_instance.conversation_id}.jsonl"
-        updated = False
-        updated_instance_list = []  # 用于存储更新后的工具实例
-        with jsonlines.open(tool_calls_file, mode='r') as reader:
-            # 读取所有现有的工具实例
-            for obj in reader:
-                old_tool_instance = ToolInstance.model_validate(obj)
-                if old_tool_instance and old_tool_instance.tool_call_id == tool_instance.tool_call_id:
-                    # 更新目标工具实例
-                    old_tool_instance.result = tool_instance.result
-                    updated = True
-                # 将修改后的工具实例添加到列表中
-                updated_instance_list.append(old_tool_instance)
-        # 如果找到了匹配的工具实例并进行了更新
-        if updated:
-            # 将所有更新后的工具实例重新写入到 JSONL 文件
-            with jsonlines.open(tool_calls_file, mode='w') as writer:
-                for updated_instance in updated_instance_list:
-                    writer.write(updated_instance.model_dump())  # 将对象写为字典
+        # 只追加结果的更新记录，不再重写整个文件
+        if self.tool_calls_log.update(tool_calls_file, tool_instance.tool_call_id, self._result_fields(tool_instance)):
             return tool_instance  # 返回更新后的工具实例对象
         else:
             return None  # 如果没有找到匹配的工具实例对象，则返回 None
 
+    @staticmethod
+    def _result_fields(tool_instance: ToolInstance) -> Dict[str, Any]:
+        """调用结果相关的字段，以更新记录追加"""
+        return {
+            "result": tool_instance.result,
+            "cache_hit": tool_instance.cache_hit,
+            "result_ref": tool_instance.result_ref,
+            "result_bytes": tool_instance.result_bytes,
+            "result_tokens": tool_instance.result_tokens,
+        }
+
+    def update_instances(self, tool_instances: List[ToolInstance]) -> List[ToolInstance]:
+        # 一轮工具调用的结果一次写入，按轮统计外置结果节省的大小
+        tool_result_store.record_turn(tool_instances)
+        updated: List[ToolInstance] = []
+        # 按会话分组，每个记录文件一次追加全部结果
+        grouped: Dict[str, List[ToolInstance]] = {}
+        for tool_instance in tool_instances:
+            grouped.setdefault(tool_instance.conversation_id, []).append(tool_instance)
+        for conversation_id, instances in grouped.items():
+            tool_calls_file = f"{self.tool_calls_file_pre_url}{conversation_id}.jsonl"
+            applied = self.tool_calls_log.update_many(
+                tool_calls_file, [(instance.tool_call_id, self._result_fields(instance)) for instance in instances])
+            updated.extend(instance for instance, ok in zip(instances, applied) if ok)
+        return updated
+
+    def remove_instances(self, conversation_id: str):
+        tool_calls_file = f"{self.tool_calls_file_pre_url}{conversation_id}.jsonl"
+        with self.tool_calls_log.lock(tool_calls_file):
+            self.tool_calls_index.forget(tool_calls_file)
+            self.tool_calls_log.forget(tool_calls_file)
+            if os.path.exists(tool_calls_file):
+                os.remove(tool_calls_file)
+
     # def save_instance(self, tool_instance: ToolInstance) -> ToolInstance:
     #     if tool_instance.type == ToolType.MCP:
     #         return self.mcp_tools_adapter.save_instance(tool_instance)
@@ -93,14 +134,53 @@ class ToolsManager(ToolsPort):
     #     if tool_instance.type == ToolType.LOCAL:
     #         return self.local_tools_adapter.update_instance(tool_instance)
 
+    def cached_tools(self, group_name: str, tool_type: ToolType) -> Optional[List[Tool]]:
+        if tool_type == ToolType.MCP:
+            return self.mcp_tools_adapter.cached_tools(mcp_server_name=group_name)
+        return None
+
     async def load_tools(self, group_name: str, tool_type: ToolType) -> List[Tool]:
         if tool_type == ToolType.MCP:
             return await self.mcp_tools_adapter.load_tools(mcp_server_name=group_name)
         if tool_type == ToolType.LOCAL:
             return await self.local_tools_adapter.load_tools(group_name=group_name)
 
+    async def load_tools_concurrently(self,
+                                      mcp_name_list: Optional[List[str]] = None,
+                                      tools_group_name_list: Optional[List[str]] = None,
+                                      timeout: Optional[float] = None
+                                      ) -> ToolsLoadResult:
+        mcp_name_list = mcp_name_list or []
+        timeout = self.mcp_tools_deadline if timeout is None else timeout
+        start = time.perf_counter()
+        mcp_results = await asyncio.gather(
+            *[self.mcp_tools_adapter.load_tools(mcp_server_name=mcp_name, timeout=timeout) for mcp_name in mcp_name_list],
+            return_exceptions=True)
+        result = ToolsLoadResult()
+        for mcp_name, mcp_result in zip(mcp_name_list, mcp_results):
+            if isinstance(mcp_result, asyncio.TimeoutError):
+                result.degraded[mcp_name] = f"加载超时（{timeout}s）"
+            elif isinstance(mcp_result, BaseException):
+                result.degraded[mcp_name] = str(mcp_result) or type(mcp_result).__name__
+            else:
+                result.tools.extend(mcp_result)
+        for tools_group_name in tools_group_name_list or []:
+            result.tools.extend(await self.local_tools_adapter.load_tools(group_name=tools_group_name))
+        if result.degraded:
+            logger.warning(f"mcp server 工具未能加载，本轮不使用：{result.degraded}")
+        logger.debug(f"工具装载：[mcp server：{len(mcp_name_list)} - 耗时：{(time.perf_counter() - start) * 1000:.2f}ms]")
+        return result
+
     async def call_tools(self, tool_instance: ToolInstance) -> dict[str, Any]:
+        result = None
         if tool_instance.type == ToolType.MCP:
-            return await self.mcp_tools_adapter.call_tools(tool_instance)
+            result = await self.mcp_tools_adapter.call_tools(tool_instance)
         if tool_instance.type == ToolType.LOCAL:
-            return await self.local_tools_adapter.call_tools(tool_instance)
\ No newline at end of file
+            result = await self.local_tools_adapter.call_tools(tool_instance)
+        if result and result.get('result'):
+            # 过大的结果外置保存，之后的事件、记录和模型上下文只携带摘要
+            result['result'] = tool_result_store.apply(tool_instance, result['result'])
+        return result
+
+    def load_result(self, result_id: str) -> Optional[List[str]]:
+        return tool_result_store.load(result_id)
\ No newline at end of file
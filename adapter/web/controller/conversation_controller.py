@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from common.core.logger import get_logger
 from common.core.container.container import get_container
 from application.port.inbound.conversation_case import ConversationCase
-from application.domain.conversation import DialogSegment
+from application.domain.conversation import DialogSegment, Conversation
 from adapter.web.vo.base_response import BaseResponse
 from adapter.web.vo.conversation_vo import DialogSegmentDelVo, ConversationDelVo
 
 from typing import Optional
+import json
 logger = get_logger(__name__)
 
 router = APIRouter(prefix="/api/conversation", tags=["CONVERSATION"])
@@ -19,8 +22,31 @@ async def load_conversation_list(conversation_service: ConversationCase = Depend
     return BaseResponse.from_success(data=await conversation_service.conversation_load_list())
 
 @router.get("")
-async def load_conversation(conversation_id: Optional[str] = None, conversation_service: ConversationCase = Depends(conversation_case)) -> BaseResponse:
-    return BaseResponse.from_success(data=await conversation_service.conversation_load(conversation_id=conversation_id))
+async def load_conversation(
+        conversation_id: Optional[str] = None,
+        limit: Optional[int] = Query(default=None, ge=1),
+        before: Optional[str] = None,
+        stream: bool = False,
+        conversation_service: ConversationCase = Depends(conversation_case)
+):
+    """
+    获取会话，limit/before 按游标分页（before 为当前页第一条对话片段的id），
+    stream=true 时以 NDJSON 逐行返回：先返回会话信息，再逐条返回对话片段
+    """
+    if stream:
+        return StreamingResponse(_conversation_ndjson(conversation_service, conversation_id, limit, before),
+                                 media_type="application/x-ndjson")
+    return BaseResponse.from_success(data=await conversation_service.conversation_load(conversation_id=conversation_id, limit=limit, before=before))
+
+async def _conversation_ndjson(conversation_service: ConversationCase, conversation_id: str, limit: Optional[int], before: Optional[str]):
+    async for item in conversation_service.conversation_stream(conversation_id=conversation_id, limit=limit, before=before):
+        item_type = "conversation" if isinstance(item, Conversation) else "dialog_segment"
+        yield json.dumps({"type": item_type, "data": jsonable_encoder(item)}, ensure_ascii=False) + "\n"
+
+@router.get("/tool_result")
+async def load_tool_result(result_id: str, conversation_service: ConversationCase = Depends(conversation_case)) -> BaseResponse:
+    """获取外置保存的完整工具调用结果，result_id 为工具调用记录的 result_ref"""
+    return BaseResponse.from_success(data=await conversation_service.tool_result_load(result_id))
 
 @router.put("/theme")
 async def update_conversation_theme(conversation_id: str, conversation_theme: str, conversation_service: ConversationCase = Depends(conversation_case)) -> BaseResponse:
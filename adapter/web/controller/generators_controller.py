@@ -4,7 +4,7 @@ from adapter.web.vo.conform_vo import ConfirmVo
 from common.core.logger import get_logger
 from common.core.container.container import get_container
 from application.port.inbound.generators_case import GeneratorsCase
-from adapter.web.vo.generators_vo import GeneratorsVo
+from adapter.web.vo.generators_vo import GeneratorsVo, PrewarmVo
 from adapter.web.vo.base_response import BaseResponse
 logger = get_logger(__name__)
 
@@ -31,6 +31,13 @@ async def chat(generators_vo: GeneratorsVo, generators_service: GeneratorsCase =
 
     return BaseResponse.from_success(data={"conversation_id": conversation_id, "dialog_segment_id": uuid})
 
+@router.post("/prewarm")
+async def prewarm(prewarm_vo: PrewarmVo, generators_service: GeneratorsCase = Depends(generators_case)):
+    return BaseResponse.from_success(data=await generators_service.prewarm(
+        generator_id=prewarm_vo.generator_id,
+        mcp_name_list=prewarm_vo.mcp_name_list,
+    ))
+
 @router.put("/stop")
 async def stop(conversation_id: str, client_id: str, generators_service: GeneratorsCase = Depends(generators_case)):
     return BaseResponse.from_success(data={"conversation_id": await generators_service.stop_generate(client_id=client_id, conversation_id=conversation_id)})
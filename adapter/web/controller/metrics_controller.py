@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from adapter.web.vo.base_response import BaseResponse
+from common.core.metrics import collect_metrics
+
+router = APIRouter(prefix="/api/metrics", tags=["METRICS"])
+
+@router.get("")
+async def load_metrics() -> BaseResponse:
+    """运行指标（写入批次、缓存命中率等）"""
+    return BaseResponse.from_success(data=collect_metrics())
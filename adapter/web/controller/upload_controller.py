@@ -1,36 +1,60 @@
 from fastapi import APIRouter, Depends, File, UploadFile, Form
-import uuid
-import aiofiles
+from typing import AsyncIterator
 from common.core.logger import get_logger
+from common.core.container.container import get_container
+from application.port.inbound.attachment_case import AttachmentCase
+from adapter.web.vo.base_response import BaseResponse
 logger = get_logger(__name__)
 
 router = APIRouter(prefix="/api/upload", tags=["Upload"])
 
+# 每次读取的分块大小
+CHUNK_SIZE = 1024 * 1024
+# 上传目录，客户端按 uploads/{id} 引用上传的文件
+UPLOAD_DIR = "uploads/"
+
+def attachment_case() -> AttachmentCase:
+    return get_container().get(AttachmentCase)
+
+async def _read_chunks(file: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await file.read(CHUNK_SIZE):
+        yield chunk
+
 @router.post("/upload")
 async def upload(
         file: UploadFile = File(...),
         #description: str = Form(...)
+        attachment_service: AttachmentCase = Depends(attachment_case)
     ):
-    # 获取文件类型
-    content_type = file.content_type
-
-    unique_id = uuid.uuid4()
-
-    # 读取文件内容并转为base64
-    content = await file.read()
-    # base64_str = base64.b64encode(content).decode("utf-8")
-    # 可选：保存文件到本地（调试用）
-    async with aiofiles.open(f"uploads/{unique_id}", 'wb') as out_file:
-        await out_file.write(content)
-        
+    # 分块读取并写入内容寻址存储，不再一次性读入内存
+    attachment = await attachment_service.upload(_read_chunks(file), filename=file.filename, mime_type=file.content_type)
+
     return {
         "code": 200,
         "message": "success",
         "sub_code": 200,
         "sub_message": "success",
         "data": {
-            "id": unique_id,
+            # 保持 uploads/{id} 指向上传文件的约定，id 为文件相对上传目录的路径
+            "id": attachment.path.removeprefix(UPLOAD_DIR),
             "filename": file.filename,
+            # 内容 sha256，用于查询附件元数据
+            "attachment_id": attachment.id,
+            "path": attachment.path,
+            "mime_type": attachment.mime_type,
+            "size": attachment.size,
+            "width": attachment.width,
+            "height": attachment.height,
+            "deduplicated": attachment.deduplicated,
         }
     }
 
+@router.get("/attachment")
+async def load_attachment(attachment_id: str, attachment_service: AttachmentCase = Depends(attachment_case)) -> BaseResponse:
+    """获取附件元数据"""
+    return BaseResponse.from_success(data=await attachment_service.load(attachment_id))
+
+@router.post("/gc")
+async def collect_garbage(attachment_service: AttachmentCase = Depends(attachment_case)) -> BaseResponse:
+    """删除没有被任何会话引用的附件"""
+    return BaseResponse.from_success(data=await attachment_service.collect_garbage())
@@ -18,4 +18,8 @@ class GeneratorsVo(BaseModel):
     mcp_name_list: Optional[List[str]] = None
     agent_name: Optional[str] = None
     tools_group_name_list: Optional[List[str]] = None
-    task_confirm: Optional[TaskConfirm] = None
\ No newline at end of file
+    task_confirm: Optional[TaskConfirm] = None
+
+class PrewarmVo(BaseModel):
+    generator_id: str
+    mcp_name_list: Optional[List[str]] = None
@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import Optional
+
+
+class Attachment(BaseModel):
+    """附件领域对象，内容相同的上传文件共用一个内容寻址的文件"""
+    # 附件id，文件内容的 sha256
+    id: str
+    # 附件文件路径，对话片段中引用附件时使用
+    path: str
+    # 上传时的文件名
+    filename: Optional[str] = None
+    # 文件类型
+    mime_type: Optional[str] = None
+    # 文件大小（字节）
+    size: int = 0
+    # 图片宽度
+    width: Optional[int] = None
+    # 图片高度
+    height: Optional[int] = None
+    # 引用该附件的对话片段数量，由垃圾回收时统计
+    ref_count: int = 0
+    # 最后一次上传时间戳
+    uploaded: int = 0
+    # 本次上传是否与已有附件重复
+    deduplicated: bool = False
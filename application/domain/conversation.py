@@ -2,7 +2,8 @@ from datetime import datetime
 from enum import Enum
 
 from common.utils.common_utils import create_uuid
-from common.utils.file_util import open_and_base64
+from common.utils.image_cache import image_cache
+from common.utils.model_util import construct_trusted
 from common.utils.time_utils import create_from_second_now, create_from_timestamp, create_from_timestamp_to_int
 from application.domain.generators.tools import ToolInstance
 from pydantic import BaseModel
@@ -20,10 +21,25 @@ class MetadataType(Enum):
     AGENT_RESULT = "AGENT_RESULT"
     USER_CONFIRMATION = "USER_CONFIRMATION"
 
+# 枚举值 -> 枚举的查找表，受信任数据加载时使用，避免 Enum(value) 的查找开销
+_METADATA_SOURCES = {member.value: member for member in MetadataSource}
+_METADATA_TYPES = {member.value: member for member in MetadataType}
+
 class DialogSegmentMetadata(BaseModel):
     source: MetadataSource
     type: MetadataType
 
+    @classmethod
+    def from_record(cls, obj: Dict[str, Any]) -> "DialogSegmentMetadata":
+        """从自身持久化的数据构建，不做校验"""
+        return construct_trusted(cls, {'source': _METADATA_SOURCES.get(obj.get('source')), 'type': _METADATA_TYPES.get(obj.get('type'))})
+
+    def to_record(self) -> Dict[str, Any]:
+        return {
+            'source': self.source.value if self.source else None,
+            'type': self.type.value if self.type else None,
+        }
+
     def model_dump(self, **kwargs):
         # 使用 super() 获取字典格式
         data = super().model_dump()
@@ -121,7 +137,11 @@ class DialogSegment(BaseModel):
             metadata=metadata if metadata is not None else default_metadata,
         )
 
-    def convert_chat_streaming_chunk(self) -> ChatStreamingChunk:
+    def convert_chat_streaming_chunk(self, image_profile: Optional[str] = None) -> ChatStreamingChunk:
+        """
+        转换为模型消息，图片文件按厂商尺寸预处理为 base64
+        :param image_profile: 图片预处理参数名（厂商名）
+        """
         dialog_segment_content_copy = self.content
         if self.role == 'user' and self.content and isinstance(self.content, List):
             content_list = []
@@ -137,12 +157,11 @@ class DialogSegment(BaseModel):
                             }
                         })
                     else:
-                        base64_image = open_and_base64(dialog_segment_content_item.content)
-                        # print(base64_image)
+                        # 预处理结果按文件内容缓存，重复构建上下文时不再读取和编码
                         content_list.append({
                             "type": "image_url",
                             "image_url":{
-                                "url": f"data:image/png;base64,{base64_image}"
+                                "url": image_cache.data_url(dialog_segment_content_item.content, image_profile)
                             }
                         })
             dialog_segment_content_copy = content_list
@@ -166,6 +185,54 @@ class DialogSegment(BaseModel):
         data['metadata'] = self.metadata.model_dump(**kwargs)
         return data
 
+    @classmethod
+    def from_record(cls, obj: Dict[str, Any]) -> "DialogSegment":
+        """
+        从适配器自身写入的数据构建对话片段，跳过 pydantic 校验，只做类型还原
+        :param obj: to_record / model_dump 生成的字典
+        """
+        data = dict(obj)
+        content = data.get('content')
+        if isinstance(content, list):
+            data['content'] = [construct_trusted(DialogSegmentContent, {'type': item['type'], 'content': item['content']}) for item in content]
+        tool_calls = data.get('tool_calls')
+        if tool_calls:
+            data['tool_calls'] = [ToolInstance.from_record(tool_call) for tool_call in tool_calls]
+        created = data.get('created')
+        if isinstance(created, str):
+            data['created'] = datetime.fromisoformat(created)
+        metadata = data.get('metadata')
+        if isinstance(metadata, dict):
+            data['metadata'] = DialogSegmentMetadata.from_record(metadata)
+        return construct_trusted(cls, data)
+
+    def to_record(self) -> Dict[str, Any]:
+        """
+        单次遍历生成持久化字典，供 from_record 读回：created 为 ISO 格式字符串，content 列表项只保留 type 和 content，
+        payload 中的模型转为字典，tool_calls 和 metadata 使用各自的 to_record 格式。
+        与 model_dump 不同，嵌套的工具调用只保存持久化字段，枚举保存为值
+        """
+        content = self.content
+        if isinstance(content, list):
+            content = [{'type': item.type, 'content': item.content} for item in content]
+        payload = self.payload
+        if payload is not None:
+            payload = {key: value.model_dump() if isinstance(value, BaseModel) else value for key, value in payload.items()}
+        return {
+            'id': self.id,
+            'conversation_id': self.conversation_id,
+            'model': self.model,
+            'firm': self.firm,
+            'content': content,
+            'reasoning_content': self.reasoning_content,
+            'payload': payload,
+            'finish_reason': self.finish_reason,
+            'role': self.role,
+            'tool_calls': [tool_call.to_record() for tool_call in self.tool_calls] if self.tool_calls is not None else None,
+            'created': self.created.isoformat() if self.created else None,
+            'metadata': self.metadata.to_record() if self.metadata else None,
+        }
+
     @classmethod
     def model_validate(cls, obj, **kwargs):
         # 确保将创建的字符串转换为 datetime 对象
@@ -192,6 +259,8 @@ class Conversation(BaseModel):
     type: Optional[Literal["chat", "plan"]]
     # 对话片段集合
     dialog_segment_list: Optional[List[DialogSegment]] = None
+    # 分页加载时是否还有更早的对话片段
+    has_more: Optional[bool] = None
 
     @classmethod
     def init(cls, conversation_type: Optional[Literal["chat", "plan"]]) -> "Conversation":
@@ -201,21 +270,21 @@ class Conversation(BaseModel):
     def from_update_theme(cls, id: str, theme: str):
         return cls(id=id, theme=theme, type="chat")
 
-    def convert_sort_memory(self) -> List[ChatStreamingChunk]:
-        """用于普通会话的消息集合拼装，由于LLM任务开始的时候用户的输入已经保存，所以这里处理最后条消息，可能base64个图片"""
+    def convert_sort_memory(self, image_profile: Optional[str] = None) -> List[ChatStreamingChunk]:
+        """用于普通会话的消息集合拼装，由于LLM任务开始的时候用户的输入已经保存，所以这里处理最后条消息，可能base64个图片，image_profile 为图片预处理参数名（厂商名）"""
         rs_list: List[ChatStreamingChunk] = []
         for i, dialog_segment in enumerate(self.dialog_segment_list):
             if dialog_segment.metadata.type != MetadataType.MESSAGE and dialog_segment.metadata.type != MetadataType.AGENT_RESULT:
                 continue
             if i == len(self.dialog_segment_list) - 1:
                 # 最后一个元素解析图片，非最后的对话则删除图片记录
-                chat_streaming_chunk = dialog_segment.convert_chat_streaming_chunk()
+                chat_streaming_chunk = dialog_segment.convert_chat_streaming_chunk(image_profile)
                 rs_list.append(chat_streaming_chunk)
             else:
                 if dialog_segment.role == 'user' and dialog_segment.content and isinstance(dialog_segment.content, List):
                     continue
                 else:
-                    chat_streaming_chunk = dialog_segment.convert_chat_streaming_chunk()
+                    chat_streaming_chunk = dialog_segment.convert_chat_streaming_chunk(image_profile)
                     rs_list.append(chat_streaming_chunk)
         return rs_list
 
@@ -33,6 +33,7 @@ class EventSubType(Enum):
     ERROR = "ERROR" # 错误
     HEARTBEAT = "HEARTBEAT" # 心跳事件
     STOP = "STOP"
+    TOOLS_DEGRADED = "TOOLS_DEGRADED" # 部分 mcp server 工具未能加载
     # user_confirm
     CALL_USER = "CALL_USER" # 交互用户
     USER_CONFIRM = "USER_CONFIRM" # 用户确认
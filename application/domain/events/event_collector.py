@@ -1,105 +1,243 @@
-from application.domain.events.event import Event, EventGroupStatus
-from typing import Dict, List, Optional, Callable
+from application.domain.events.event import Event, EventGroupStatus, EventSubType
+from typing import Any, Dict, List, Optional, Callable, Tuple
+import heapq
+import os
 import threading
 import time
-import uuid
 
 from common.core.logger import get_logger
+from common.core.metrics import register_metrics
 logger = get_logger(__name__)
 
+
+class MessageAccumulator:
+    """
+    单条流式消息的累加器：内容片段追加到列表中，只保留最新的一个事件作为消息元数据
+    """
+    __slots__ = ("_content_parts", "_reasoning_parts", "last_event", "chunks")
+
+    def __init__(self):
+        self._content_parts: List[str] = []
+        self._reasoning_parts: List[str] = []
+        # 最新的事件，模型、时间、组状态、payload 等元数据以它为准
+        self.last_event: Optional[Event] = None
+        self.chunks = 0
+
+    def add(self, event: Event):
+        content = event.data.get('content')
+        if content:
+            self._content_parts.append(content)
+        reasoning_content = event.data.get('reasoning_content')
+        if reasoning_content:
+            self._reasoning_parts.append(reasoning_content)
+        self.last_event = event
+        self.chunks += 1
+
+    @staticmethod
+    def _join(parts: List[str]) -> str:
+        if len(parts) > 1:
+            # 合并后只保留一个片段，重复读取不再拼接
+            parts[:] = ["".join(parts)]
+        return parts[0] if parts else ""
+
+    @property
+    def content(self) -> str:
+        return self._join(self._content_parts)
+
+    @property
+    def reasoning_content(self) -> str:
+        return self._join(self._reasoning_parts)
+
+
+class GroupAccumulator:
+    """
+    事件组累加器：按消息ID累加组内的流式消息（MESSAGE）事件，不保留每个 chunk 事件
+    """
+    __slots__ = ("group_id", "messages", "last_event", "event_count")
+
+    def __init__(self, group_id: str):
+        self.group_id = group_id
+        # 消息ID -> 消息累加器，按消息首次出现的顺序
+        self.messages: Dict[str, MessageAccumulator] = {}
+        self.last_event: Optional[Event] = None
+        self.event_count = 0
+
+    def add(self, event: Event):
+        self.last_event = event
+        self.event_count += 1
+        if event.sub_type == EventSubType.MESSAGE:
+            message_id = event.data['id']
+            message = self.messages.get(message_id)
+            if message is None:
+                message = MessageAccumulator()
+                self.messages[message_id] = message
+            message.add(event)
+
+
+class _GroupState:
+    __slots__ = ("accumulator", "handler", "completed", "last_activity", "timeout")
+
+    def __init__(self, timeout: float):
+        self.accumulator: Optional[GroupAccumulator] = None
+        self.handler: Optional[Callable[[str, GroupAccumulator], None]] = None
+        # 已完成的组保留标记一个超时周期，拒绝之后迟到的事件
+        self.completed = False
+        self.last_activity = time.monotonic()
+        self.timeout = timeout
+
+
+class _Stripe:
+    __slots__ = ("lock", "groups")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.groups: Dict[str, _GroupState] = {}
+
+
 class EventCollector:
     """
-    事件收集器，用于收集组事件并在组事件完成后进行处理
+    事件收集器，用于收集组事件并在组事件完成后进行处理。
+    组内事件由事件总线按发布顺序逐个处理，收集时直接累加到组累加器中，组完成时处理器收到累加结果。
+    事件组按组id分散到多个分段锁中；过期检查使用按截止时间排序的堆，收集事件只更新最后活动时间，
+    到期检查时发现仍有活动则按新的截止时间重新排入，过期线程只处理到期的组。
+    超时时间可以按组类型（组内第一个事件的类型）配置。
     """
-    # 事件组映射 {group_id: List[Event]}
-    _group_events: Dict[str, List[Event]] = {}
-    # 事件组状态映射 {group_id: bool} - True表示已完成
-    _group_completed: Dict[str, bool] = {}
-    # 事件组最后活动时间 {group_id: float}
-    _group_last_activity: Dict[str, float] = {}
-    # 事件组处理器映射 {group_id: Callable}
-    _group_handlers: Dict[str, Callable[[str, List[Event]], None]] = {}
-    # 锁
-    _lock = threading.Lock()
-    # 清理线程
+    # 分段数量
+    _stripe_count = 16
+    # 分段 {group_id 哈希: 组状态映射}
+    _stripes: List[_Stripe] = [_Stripe() for _ in range(_stripe_count)]
+    # 过期堆 [(截止时间, group_id)] 及其条件变量
+    _expiry_heap: List[Tuple[float, str]] = []
+    _expiry_cond = threading.Condition()
+    # 过期线程
     _cleanup_thread = None
     # 是否运行中
     _running = False
-    # 超时时间（秒）
+    # 默认超时时间（秒）
     _timeout_seconds = 10
+    # 组类型 -> 超时时间（秒）
+    _group_timeouts: Dict[str, float] = {}
+    _expired = 0
+    _completed = 0
 
     @classmethod
-    def initialize(cls, timeout_seconds: int = 10):
+    def initialize(cls, timeout_seconds: int = 10, group_timeouts: Optional[Dict[str, float]] = None):
         """
         初始化事件收集器
-        :param timeout_seconds: 超时时间（秒）
+        :param timeout_seconds: 默认超时时间（秒）
+        :param group_timeouts: 按组类型（事件类型）的超时时间，未指定时读取 EFFLUX_EVENT_GROUP_TIMEOUTS
         """
         cls._timeout_seconds = timeout_seconds
+        cls._group_timeouts = group_timeouts if group_timeouts is not None else \
+            cls._load_group_timeouts(os.environ.get("EFFLUX_EVENT_GROUP_TIMEOUTS", ""))
         cls._start_cleanup_thread()
+        register_metrics("event_collector", cls.stats)
+
+    @staticmethod
+    def _load_group_timeouts(spec: str) -> Dict[str, float]:
+        """解析 "ASSISTANT_MESSAGE=30,TOOL=120" 格式的超时配置"""
+        group_timeouts: Dict[str, float] = {}
+        for item in spec.split(","):
+            group_type, _, seconds = item.strip().partition("=")
+            if not group_type:
+                continue
+            try:
+                group_timeouts[group_type.strip()] = float(seconds)
+            except ValueError:
+                logger.warning(f"事件组超时配置格式错误，已忽略：{item}")
+        return group_timeouts
+
+    @classmethod
+    def _stripe(cls, group_id: str) -> _Stripe:
+        return cls._stripes[hash(group_id) % cls._stripe_count]
 
     @classmethod
     def _start_cleanup_thread(cls):
-        """启动清理线程"""
+        """启动过期线程"""
         if cls._cleanup_thread is None or not cls._cleanup_thread.is_alive():
             cls._running = True
             cls._cleanup_thread = threading.Thread(target=cls._cleanup_expired_groups, daemon=True)
             cls._cleanup_thread.start()
-            logger.info("事件收集器清理线程已启动")
+            logger.info("事件收集器过期线程已启动")
+
+    @classmethod
+    def _schedule(cls, group_id: str, deadline: float):
+        """把组按截止时间排入过期堆，早于当前最早截止时间时唤醒过期线程"""
+        with cls._expiry_cond:
+            heapq.heappush(cls._expiry_heap, (deadline, group_id))
+            if cls._expiry_heap[0][1] == group_id:
+                cls._expiry_cond.notify()
 
     @classmethod
     def _cleanup_expired_groups(cls):
-        """清理过期的事件组"""
+        """等待到最早的截止时间，只处理到期的组"""
         while cls._running:
             try:
-                # 获取当前时间
-                current_time = time.time()
-                expired_groups = []
-
-                # 查找过期的事件组
-                with cls._lock:
-                    for group_id, last_activity in cls._group_last_activity.items():
-                        if current_time - last_activity > cls._timeout_seconds:
-                            expired_groups.append(group_id)
-
-                # 处理过期的事件组
-                for group_id in expired_groups:
-                    cls._process_expired_group(group_id)
+                with cls._expiry_cond:
+                    while cls._running:
+                        now = time.monotonic()
+                        if cls._expiry_heap and cls._expiry_heap[0][0] <= now:
+                            break
+                        cls._expiry_cond.wait(cls._expiry_heap[0][0] - now if cls._expiry_heap else None)
+                    due = []
+                    while cls._expiry_heap and cls._expiry_heap[0][0] <= now:
+                        due.append(heapq.heappop(cls._expiry_heap)[1])
 
-                # 休眠一段时间
-                time.sleep(1)
+                # 处理到期的事件组
+                for group_id in due:
+                    cls._process_expired_group(group_id)
             except Exception as e:
                 logger.error(f"清理过期事件组时发生错误: {str(e)}")
 
     @classmethod
     def _process_expired_group(cls, group_id: str):
         """
-        处理过期的事件组
+        处理到期的事件组：仍有活动的重新排入，已完成的移除标记，未完成的超时完成
         :param group_id: 组ID
         """
-        with cls._lock:
-            if group_id not in cls._group_events:
+        stripe = cls._stripe(group_id)
+        with stripe.lock:
+            state = stripe.groups.get(group_id)
+            if state is None:
                 return
-
-            events = cls._group_events[group_id].copy()  # 复制事件列表，保持原始顺序
-            handler = cls._group_handlers.get(group_id)
-
-            # 从映射中移除
-            del cls._group_events[group_id]
-            del cls._group_last_activity[group_id]
-            cls._group_completed[group_id] = True
-            if group_id in cls._group_handlers:
-                del cls._group_handlers[group_id]
+            deadline = state.last_activity + state.timeout
+            now = time.monotonic()
+            if deadline > now:
+                events = None
+            elif state.completed:
+                # 已正常完成的组（未注册处理器时累积器保留到此时）直接移除，不计为超时
+                del stripe.groups[group_id]
+                return
+            else:
+                events = state.accumulator
+                handler = state.handler
+                state.accumulator = None
+                state.handler = None
+                state.completed = True
+                state.last_activity = now
+                deadline = now + state.timeout
+                cls._expired += 1
+        cls._schedule(group_id, deadline)
+        if events is None:
+            return
 
         # 记录日志
-        logger.warning(f"事件组[{group_id}]超过{cls._timeout_seconds}秒无活动，自动完成处理")
+        logger.warning(f"事件组[{group_id}]超过{state.timeout}秒无活动，自动完成处理")
 
         # 调用处理器
-        if handler and events:
+        if handler and events.event_count:
             try:
-                handler(group_id, events)  # 直接传递事件列表，保持原始顺序
+                handler(group_id, events)
             except Exception as e:
                 logger.error(f"调用事件组[{group_id}]处理器时发生错误: {str(e)}")
 
+    @classmethod
+    def _new_state(cls, stripe: _Stripe, group_id: str, group_type: Optional[str]) -> _GroupState:
+        """创建组状态，调用方持有分段锁，释放锁后排入过期堆"""
+        state = _GroupState(cls._group_timeouts.get(group_type, cls._timeout_seconds))
+        stripe.groups[group_id] = state
+        return state
+
     @classmethod
     def collect_event(cls, event: Event) -> bool:
         """
@@ -113,96 +251,101 @@ class EventCollector:
             return False
 
         group_id = event.group.id
-        current_time = time.time()
+        stripe = cls._stripe(group_id)
+        scheduled = None
 
-        with cls._lock:
+        with stripe.lock:
+            state = stripe.groups.get(group_id)
             # 如果组已完成，不再收集
-            if group_id in cls._group_completed and cls._group_completed[group_id]:
+            if state is not None and state.completed:
                 logger.warning(f"事件组[{group_id}]已完成，不再收集事件")
                 return False
 
-            # 更新最后活动时间
-            cls._group_last_activity[group_id] = current_time
-
             # 如果是新组，初始化
-            if group_id not in cls._group_events:
-                cls._group_events[group_id] = []
-                cls._group_completed[group_id] = False
+            if state is None:
+                state = cls._new_state(stripe, group_id, event.type.value)
+                scheduled = state.last_activity + state.timeout
+            elif state.accumulator is None:
+                # 先注册了处理器的组，按第一个事件的类型确定超时时间
+                state.timeout = cls._group_timeouts.get(event.type.value, cls._timeout_seconds)
+            if state.accumulator is None:
+                state.accumulator = GroupAccumulator(group_id)
 
-            # 添加事件到组
-            cls._group_events[group_id].append(event)
+            # 更新最后活动时间，累加事件到组
+            state.last_activity = time.monotonic()
+            state.accumulator.add(event)
 
             # 如果是结束事件，标记组为已完成
+            events = None
+            handler = None
             if event.group.status == EventGroupStatus.ENDED or event.group.status == EventGroupStatus.STOPPED:
-                cls._group_completed[group_id] = True
-                completed = True
-                events = cls._group_events[group_id].copy()  # 复制事件列表，保持原始顺序
-                handler = cls._group_handlers.get(group_id)
-            else:
-                completed = False
-                events = None
-                handler = None
+                state.completed = True
+                handler = state.handler
+                # 处理器未注册时保留累加结果，注册时处理
+                if handler:
+                    events = state.accumulator
+                    state.accumulator = None
+                    state.handler = None
+                cls._completed += 1
+
+        if scheduled is not None:
+            cls._schedule(group_id, scheduled)
 
         # 如果组已完成，调用处理器
-        if completed and handler and events:
+        if handler and events:
             try:
-                handler(group_id, events)  # 直接传递事件列表，保持原始顺序
+                handler(group_id, events)
             except Exception as e:
                 logger.error(f"调用事件组[{group_id}]处理器时发生错误: {str(e)}")
 
-            # 清理组数据
-            with cls._lock:
-                if group_id in cls._group_events:
-                    del cls._group_events[group_id]
-                if group_id in cls._group_last_activity:
-                    del cls._group_last_activity[group_id]
-                if group_id in cls._group_handlers:
-                    del cls._group_handlers[group_id]
-
-            logger.info(f"事件组[{group_id}]处理完成，共{len(events)}个事件")
+            logger.info(f"事件组[{group_id}]处理完成，共{events.event_count}个事件")
 
         return True
 
     @classmethod
-    def register_group_handler(cls, group_id: str, handler: Callable[[str, List[Event]], None]):
+    def register_group_handler(cls, group_id: str, handler: Callable[[str, GroupAccumulator], None]):
         """
         注册事件组处理器
         :param group_id: 组ID
-        :param handler: 处理器函数，接收组ID和事件列表作为参数
+        :param handler: 处理器函数，接收组ID和组累加器作为参数
         """
-        with cls._lock:
-            cls._group_handlers[group_id] = handler
-            
+        stripe = cls._stripe(group_id)
+        scheduled = None
+        events = None
+        with stripe.lock:
+            state = stripe.groups.get(group_id)
+            if state is None:
+                state = cls._new_state(stripe, group_id, None)
+                scheduled = state.last_activity + state.timeout
             # 如果组已完成，立即调用处理器
-            if group_id in cls._group_completed and cls._group_completed[group_id]:
-                if group_id in cls._group_events:
-                    events = cls._group_events[group_id].copy()  # 复制事件列表，保持原始顺序
-                    
-                    # 清理组数据
-                    del cls._group_events[group_id]
-                    if group_id in cls._group_last_activity:
-                        del cls._group_last_activity[group_id]
-                    del cls._group_handlers[group_id]
-                    
-                    # 调用处理器
-                    try:
-                        handler(group_id, events)  # 直接传递事件列表，保持原始顺序
-                    except Exception as e:
-                        logger.error(f"调用事件组[{group_id}]处理器时发生错误: {str(e)}")
-                    
-                    logger.info(f"事件组[{group_id}]已完成，立即处理，共{len(events)}个事件")
+            if state.completed and state.accumulator is not None:
+                events = state.accumulator
+                state.accumulator = None
+            elif not state.completed:
+                state.handler = handler
+
+        if scheduled is not None:
+            cls._schedule(group_id, scheduled)
+
+        if events is not None:
+            try:
+                handler(group_id, events)
+            except Exception as e:
+                logger.error(f"调用事件组[{group_id}]处理器时发生错误: {str(e)}")
+
+            logger.info(f"事件组[{group_id}]已完成，立即处理，共{events.event_count}个事件")
 
     @classmethod
-    def get_group_events(cls, group_id: str) -> Optional[List[Event]]:
+    def get_group_events(cls, group_id: str) -> Optional[GroupAccumulator]:
         """
-        获取组事件
+        获取组累加器
         :param group_id: 组ID
-        :return: 事件列表，如果组不存在则返回None
+        :return: 组累加器，如果组不存在则返回None
         """
-        with cls._lock:
-            if group_id in cls._group_events:
-                return cls._group_events[group_id].copy()
-            return None
+        stripe = cls._stripe(group_id)
+        with stripe.lock:
+            state = stripe.groups.get(group_id)
+            return state.accumulator if state is not None else None
 
     @classmethod
     def is_group_completed(cls, group_id: str) -> bool:
@@ -211,33 +354,54 @@ class EventCollector:
         :param group_id: 组ID
         :return: 是否已完成
         """
-        with cls._lock:
-            if group_id in cls._group_completed:
-                return cls._group_completed[group_id]
-            return False
+        stripe = cls._stripe(group_id)
+        with stripe.lock:
+            state = stripe.groups.get(group_id)
+            return state is not None and state.completed
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        groups = 0
+        completed = 0
+        for stripe in cls._stripes:
+            with stripe.lock:
+                groups += len(stripe.groups)
+                completed += sum(1 for state in stripe.groups.values() if state.completed)
+        with cls._expiry_cond:
+            scheduled = len(cls._expiry_heap)
+        return {
+            "groups": groups - completed,
+            "completed_markers": completed,
+            "scheduled": scheduled,
+            "completed": cls._completed,
+            "expired": cls._expired,
+            "timeout_seconds": cls._timeout_seconds,
+            "group_timeouts": dict(cls._group_timeouts),
+        }
 
     @classmethod
     def shutdown(cls):
         """关闭事件收集器"""
-        cls._running = False
+        with cls._expiry_cond:
+            cls._running = False
+            cls._expiry_cond.notify_all()
         
-        # 等待清理线程结束
+        # 等待过期线程结束
         if cls._cleanup_thread and cls._cleanup_thread.is_alive():
             cls._cleanup_thread.join(timeout=3)
-            logger.info("事件收集器清理线程已关闭")
+            logger.info("事件收集器过期线程已关闭")
         
         # 处理所有未完成的事件组
-        with cls._lock:
-            for group_id, events in cls._group_events.items():
-                handler = cls._group_handlers.get(group_id)
-                if handler:
-                    try:
-                        handler(group_id, events)
-                    except Exception as e:
-                        logger.error(f"关闭时处理事件组[{group_id}]时发生错误: {str(e)}")
-            
-            # 清空所有映射
-            cls._group_events.clear()
-            cls._group_completed.clear()
-            cls._group_last_activity.clear()
-            cls._group_handlers.clear()
+        for stripe in cls._stripes:
+            with stripe.lock:
+                pending = [(group_id, state.handler, state.accumulator) for group_id, state in stripe.groups.items()
+                           if state.handler and state.accumulator is not None]
+                # 清空所有映射
+                stripe.groups.clear()
+            for group_id, handler, events in pending:
+                try:
+                    handler(group_id, events)
+                except Exception as e:
+                    logger.error(f"关闭时处理事件组[{group_id}]时发生错误: {str(e)}")
+        with cls._expiry_cond:
+            cls._expiry_heap.clear()
@@ -1,9 +1,10 @@
 from enum import Enum
-from pydantic import BaseModel
-from typing import Any, Optional, List, Dict
+from pydantic import BaseModel, PrivateAttr
+from typing import Any, Callable, Optional, List, Dict
 from application.domain.events.event import Event
 from application.domain.tasks.task import Task
 import json
+from common.utils.model_util import construct_trusted
 
 class ToolType(Enum):
     """
@@ -12,6 +13,9 @@ class ToolType(Enum):
     MCP="MCP"
     LOCAL="LOCAL"
 
+# 枚举值 -> 枚举的查找表，受信任数据加载时使用
+_TOOL_TYPES = {member.value: member for member in ToolType}
+
 class Tool(BaseModel):
     """
     工具定义
@@ -27,6 +31,21 @@ class Tool(BaseModel):
     input_schema: Optional[Dict[str, Any]] = None
     # type
     type: ToolType
+    # 按模型厂商格式转换后的工具定义，工具注册表中的工具对象跨轮次共享，只转换一次
+    _provider_schemas: Dict[str, Any] = PrivateAttr(default_factory=dict)
+
+    def provider_schema(self, provider: str, convert: Callable[["Tool"], Any]) -> Any:
+        """
+        获取按厂商格式转换后的工具定义，结果缓存在工具对象上，工具字段不应再修改
+        :param provider: 厂商名
+        :param convert: 转换方法
+        :return: 转换结果，调用方不应修改
+        """
+        schema = self._provider_schemas.get(provider)
+        if schema is None:
+            schema = convert(self)
+            self._provider_schemas[provider] = schema
+        return schema
 
     def instance(self) -> "ToolInstance":
         return ToolInstance(
@@ -46,6 +65,23 @@ class Tool(BaseModel):
             data['type'] = data['type'].value
         return data
 
+def index_tools(tools: Optional[List[Tool]]) -> Dict[str, Tool]:
+    """
+    按工具名索引工具集合，同名工具以后出现的为准
+    :param tools: 工具集合
+    :return: 工具名 -> 工具
+    """
+    return {tool.name: tool for tool in tools} if tools else {}
+
+class ToolsLoadResult(BaseModel):
+    """
+    多个工具分组并发加载的结果
+    """
+    # 已加载的工具，按分组顺序排列
+    tools: List[Tool] = []
+    # 超时或加载失败的 mcp server 名 -> 原因，本轮对话不使用其工具
+    degraded: Dict[str, str] = {}
+
 class ToolInstance(Tool):
     """
     工具调用实例
@@ -58,6 +94,13 @@ class ToolInstance(Tool):
     arguments: Optional[Dict[str, Any]] = None
     # results of the tool instance
     result: Optional[List[str]] = None
+    # 是否命中调用结果缓存，工具不可缓存或未启用缓存时为空
+    cache_hit: Optional[bool] = None
+    # 结果过大时完整结果外置保存，result 中只保留摘要，按结果id读取完整结果
+    result_ref: Optional[str] = None
+    # 外置前完整结果的字节数和 token 数
+    result_bytes: Optional[int] = None
+    result_tokens: Optional[int] = None
 
     # 自定义处理模型转化为字典的方法
     def model_dump(self, **kwargs):
@@ -71,6 +114,35 @@ class ToolInstance(Tool):
             del data['input_schema']
         return data
 
+    @classmethod
+    def from_record(cls, obj: Dict[str, Any]) -> "ToolInstance":
+        """从自身持久化的数据构建，跳过 pydantic 校验"""
+        data = dict(obj)
+        data['type'] = _TOOL_TYPES.get(data.get('type'), data.get('type'))
+        return construct_trusted(cls, data)
+
+    def to_record(self) -> Dict[str, Any]:
+        """
+        单次遍历生成工具调用记录，供 from_record 读回：type 保存为枚举值，不包含 input_schema，
+        结果相关字段之后以更新记录追加
+        """
+        return {
+            'mcp_server_name': self.mcp_server_name,
+            'group_name': self.group_name,
+            'name': self.name,
+            'description': self.description,
+            'type': self.type.value if isinstance(self.type, ToolType) else self.type,
+            'conversation_id': self.conversation_id,
+            'dialog_segment_id': self.dialog_segment_id,
+            'tool_call_id': self.tool_call_id,
+            'arguments': self.arguments,
+            'result': self.result,
+            'cache_hit': self.cache_hit,
+            'result_ref': self.result_ref,
+            'result_bytes': self.result_bytes,
+            'result_tokens': self.result_tokens,
+        }
+
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> List["ToolInstance"]:
         tool_call_list = []
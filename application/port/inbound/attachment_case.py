@@ -0,0 +1,31 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, List, Optional
+from application.domain.attachment import Attachment
+
+
+class AttachmentCase(ABC):
+
+    @abstractmethod
+    async def upload(self, chunks: AsyncIterator[bytes], filename: Optional[str] = None, mime_type: Optional[str] = None) -> Attachment:
+        """
+        上传附件
+        :param chunks: 文件内容分块
+        :param filename: 文件名
+        :param mime_type: 文件类型
+        :return: 附件对象
+        """
+
+    @abstractmethod
+    async def load(self, attachment_id: str) -> Optional[Attachment]:
+        """
+        获取附件信息
+        :param attachment_id: 附件id
+        :return:
+        """
+
+    @abstractmethod
+    async def collect_garbage(self) -> List[str]:
+        """
+        删除没有被任何会话引用的附件
+        :return: 删除的附件id集合
+        """
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from application.domain.conversation import Conversation, DialogSegment
-from typing import List, Optional
+from typing import List, Optional, AsyncIterator
 
 class ConversationCase(ABC):
 
@@ -9,8 +9,24 @@ class ConversationCase(ABC):
         """获取会话列表"""
 
     @abstractmethod
-    async def conversation_load(self, conversation_id: str) -> Optional[Conversation]:
-        """获取会话"""
+    async def conversation_load(self, conversation_id: str, limit: Optional[int] = None, before: Optional[str] = None) -> Optional[Conversation]:
+        """
+        获取会话
+        :param conversation_id: 会话id
+        :param limit: 分页加载的对话片段数量，为空时加载全部
+        :param before: 游标，对话片段id，只加载该片段之前的对话片段
+        :return:
+        """
+
+    @abstractmethod
+    def conversation_stream(self, conversation_id: str, limit: Optional[int] = None, before: Optional[str] = None) -> AsyncIterator[Conversation | DialogSegment]:
+        """
+        流式获取会话，先返回不含对话片段的会话对象，再逐条返回装载了工具调用记录的对话片段
+        :param conversation_id: 会话id
+        :param limit: 分页加载的对话片段数量，为空时加载全部
+        :param before: 游标，对话片段id，只加载该片段之前的对话片段
+        :return: 会话不存在时不返回任何数据
+        """
 
     @abstractmethod
     async def conversation_update_theme(self, conversation_id: str, theme: str) -> Conversation:
@@ -36,4 +52,12 @@ class ConversationCase(ABC):
         批量删除会话
         :param conversation_id_list: 会话id集合
         :return:
-        """
\ No newline at end of file
+        """
+
+    @abstractmethod
+    async def tool_result_load(self, result_id: str) -> Optional[List[str]]:
+        """
+        获取外置保存的完整工具调用结果
+        :param result_id: 结果id，即工具调用实例的 result_ref
+        :return:
+        """
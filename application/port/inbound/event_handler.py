@@ -9,7 +9,7 @@ class EventHandler(ABC):
     @abstractmethod
     def handle(self, event: Event) -> None:
         """
-        处理事件
+        处理事件，使用 asyncio 事件总线（EFFLUX_EVENT_BUS=asyncio）时可以实现为 async def
         :param event:
         :return:
         """
@@ -68,6 +68,19 @@ class GeneratorsCase(ABC):
         """
 
 
+    @abstractmethod
+    async def prewarm(
+        self,
+        generator_id: str,
+        mcp_name_list: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        预热对话：建立到模型厂商的连接，并加载mcp工具，用户输入时调用以减少首 token 延迟
+        :param generator_id: 生成模型id
+        :param mcp_name_list: mcp名列表
+        :return: 建立连接的耗时及加载的工具数
+        """
+
     @abstractmethod
     async def generate(self,
         generator_id: str,
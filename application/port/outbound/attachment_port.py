@@ -0,0 +1,41 @@
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, List, Optional
+from application.domain.attachment import Attachment
+
+
+class AttachmentPort(ABC):
+
+    @abstractmethod
+    async def save(self, chunks: AsyncIterator[bytes], filename: Optional[str] = None, mime_type: Optional[str] = None) -> Attachment:
+        """
+        流式保存附件，边写入边计算哈希，内容已存在时不重复保存
+        :param chunks: 文件内容分块
+        :param filename: 文件名
+        :param mime_type: 文件类型
+        :return: 附件对象
+        """
+
+    @abstractmethod
+    def load(self, attachment_id: str) -> Optional[Attachment]:
+        """
+        获取附件
+        :param attachment_id: 附件id
+        :return:
+        """
+
+    @abstractmethod
+    def attachment_id(self, path: str) -> Optional[str]:
+        """
+        从文件路径中解析附件id
+        :param path: 文件路径
+        :return: 不是附件文件时返回 None
+        """
+
+    @abstractmethod
+    def collect_garbage(self, ref_counts: Dict[str, int], grace_seconds: int) -> List[str]:
+        """
+        更新引用计数并删除没有被引用的附件
+        :param ref_counts: 附件id -> 引用数量
+        :param grace_seconds: 最近上传、尚未被对话引用的附件保留时间
+        :return: 删除的附件id集合
+        """
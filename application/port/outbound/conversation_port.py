@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from application.domain.conversation import Conversation, DialogSegment
-from typing import List, Optional, Any
+from typing import List, Optional, Any, Iterator, Tuple
 
 class ConversationPort(ABC):
 
@@ -45,8 +45,30 @@ class ConversationPort(ABC):
         pass
 
     @abstractmethod
-    def conversation_load(self, conversation_id: str) -> Conversation:
-        """获取会话"""
+    def agent_record_id_list(self) -> List[str]:
+        """获取保存了执行记录的 agent 实例id"""
+        pass
+
+    @abstractmethod
+    def conversation_load(self, conversation_id: str, limit: Optional[int] = None, before: Optional[str] = None) -> Conversation:
+        """
+        获取会话
+        :param conversation_id: 会话id
+        :param limit: 分页加载的对话片段数量，为空时加载全部，为0时只加载会话信息
+        :param before: 游标，对话片段id，只加载该片段之前的对话片段
+        :return: 会话对象，分页加载时 has_more 标识是否还有更早的对话片段
+        """
+        pass
+
+    @abstractmethod
+    def dialog_segment_iter(self, conversation_id: str, limit: Optional[int] = None, before: Optional[str] = None) -> Tuple[Iterator[DialogSegment], bool]:
+        """
+        按游标分页读取对话片段，只解析当前页
+        :param conversation_id: 会话id
+        :param limit: 每页数量，为空时返回游标之前的全部对话片段
+        :param before: 游标，对话片段id，为空时从最后一条开始
+        :return: 按时间顺序的对话片段生成器，以及是否还有更早的对话片段
+        """
         pass
 
     @abstractmethod
@@ -76,6 +76,14 @@ class GeneratorsPort(ABC):
         """
         pass
 
+    @abstractmethod
+    def prewarm(self, llm_generator: LLMGenerator) -> Optional[float]:
+        """
+        预热到模型厂商接口的连接，随后的对话请求复用该连接
+        :param llm_generator: 生成模型对象，需要包含 api key
+        :return: 建立连接的耗时毫秒数，连接已存在时为 0，失败时返回 None
+        """
+
     @abstractmethod
     def load_generate(self, generate_id: str) -> LLMGenerator:
         """
@@ -83,6 +91,14 @@ class GeneratorsPort(ABC):
         :param generate_id: 模型生成器id
         :return:
         """
+
+    @abstractmethod
+    def resolve(self, generate_id: str) -> Optional[LLMGenerator]:
+        """
+        获取llm生成器并设置厂商的 api key，从内存中的模型目录查询
+        :param generate_id: 模型生成器id
+        :return: 模型不存在或未启用时返回 None
+        """
     @abstractmethod
     def load_firm(self) -> List[GeneratorFirm]:
         """
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import List, Any, Optional
-from application.domain.generators.tools import Tool, ToolInstance, ToolType
+from typing import Dict, List, Any, Optional
+from application.domain.generators.tools import Tool, ToolInstance, ToolType, ToolsLoadResult
 
 class ToolsPort(ABC):
 
@@ -28,6 +28,16 @@ class ToolsPort(ABC):
         :return:
         """
 
+    @abstractmethod
+    def load_instance_map(self, conversation_id: str,
+                          dialog_segment_ids: Optional[List[str]] = None) -> Dict[str, List[ToolInstance]]:
+        """
+        一次读取会话的工具调用实例，按对话片段分组
+        :param conversation_id: 会话id
+        :param dialog_segment_ids: 只读取这些对话片段的工具调用实例，为空时读取全部
+        :return: 对话片段id -> 工具调用实例集合
+        """
+
     @abstractmethod
     def update_instance(self, tool_instance: ToolInstance) -> Optional[ToolInstance]:
         """
@@ -36,6 +46,30 @@ class ToolsPort(ABC):
         :return:
         """
 
+    @abstractmethod
+    def update_instances(self, tool_instances: List[ToolInstance]) -> List[ToolInstance]:
+        """
+        批量更新工具调用实例结果，一次写入
+        :param tool_instances: 工具调用实例集合
+        :return: 更新成功的工具调用实例集合
+        """
+
+    @abstractmethod
+    def remove_instances(self, conversation_id: str):
+        """
+        删除会话的全部工具调用实例记录，会话删除时调用
+        :param conversation_id: 会话id
+        """
+
+    @abstractmethod
+    def cached_tools(self, group_name: str, tool_type: ToolType) -> Optional[List[Tool]]:
+        """
+        同步获取已缓存的工具集合，不启动 mcp server
+        :param group_name: 工具分组名字
+        :param tool_type: 工具类型
+        :return: 未缓存时返回 None，需要调用 load_tools
+        """
+
     @abstractmethod
     async def load_tools(self, group_name: str, tool_type: ToolType) -> List[Tool]:
         """
@@ -46,11 +80,33 @@ class ToolsPort(ABC):
         """
         pass
 
+    @abstractmethod
+    async def load_tools_concurrently(self,
+                                      mcp_name_list: Optional[List[str]] = None,
+                                      tools_group_name_list: Optional[List[str]] = None,
+                                      timeout: Optional[float] = None
+                                      ) -> ToolsLoadResult:
+        """
+        并发加载多个 mcp server 和本地工具分组的工具集合，每个 mcp server 单独计时
+        :param mcp_name_list: mcp server 名集合
+        :param tools_group_name_list: 本地工具分组名集合
+        :param timeout: 每个 mcp server 的等待时间，为空时使用默认配置
+        :return: 已加载的工具和超时或失败的 mcp server
+        """
+
     @abstractmethod
     async def call_tools(self, tool_instance: ToolInstance) -> dict[str, Any]:
         """
-        工具调用
+        工具调用，结果过大时外置保存，返回的结果为摘要
         :param tool_instance: 工具实例对象
         :return: 工具调用结果
         """
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def load_result(self, result_id: str) -> Optional[List[str]]:
+        """
+        读取外置保存的完整工具调用结果
+        :param result_id: 结果id，即工具调用实例的 result_ref
+        :return: 不存在时返回 None
+        """
\ No newline at end of file
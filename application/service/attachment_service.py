@@ -0,0 +1,56 @@
+import os
+from collections import Counter
+from typing import AsyncIterator, List, Optional
+
+import injector
+
+from application.domain.attachment import Attachment
+from application.domain.conversation import DialogSegment
+from application.port.inbound.attachment_case import AttachmentCase
+from application.port.outbound.attachment_port import AttachmentPort
+from application.port.outbound.conversation_port import ConversationPort
+from common.core.container.annotate import component
+from common.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+@component
+class AttachmentService(AttachmentCase):
+
+    # 上传后尚未发送的附件在该时间内不会被回收
+    gc_grace_seconds = int(os.environ.get("EFFLUX_ATTACHMENT_GC_GRACE_SECONDS", "86400"))
+
+    @injector.inject
+    def __init__(self, attachment_port: AttachmentPort, conversation_port: ConversationPort):
+        self.attachment_port = attachment_port
+        self.conversation_port = conversation_port
+
+    async def upload(self, chunks: AsyncIterator[bytes], filename: Optional[str] = None, mime_type: Optional[str] = None) -> Attachment:
+        return await self.attachment_port.save(chunks, filename=filename, mime_type=mime_type)
+
+    async def load(self, attachment_id: str) -> Optional[Attachment]:
+        # 也接受上传接口返回的 id（文件相对上传目录的路径）
+        return self.attachment_port.load(self.attachment_port.attachment_id(attachment_id) or attachment_id)
+
+    def _count_refs(self, dialog_segments: List[DialogSegment], ref_counts: Counter):
+        for dialog_segment in dialog_segments:
+            if not isinstance(dialog_segment.content, list):
+                continue
+            for content_item in dialog_segment.content:
+                if content_item.type != 'image':
+                    continue
+                attachment_id = self.attachment_port.attachment_id(content_item.content)
+                if attachment_id:
+                    ref_counts[attachment_id] += 1
+
+    async def collect_garbage(self) -> List[str]:
+        # 标记：统计全部会话和 agent 执行记录中图片内容引用的附件
+        ref_counts: Counter = Counter()
+        for conversation in self.conversation_port.conversation_load_list():
+            conversation = self.conversation_port.conversation_load(conversation.id)
+            if conversation:
+                self._count_refs(conversation.dialog_segment_list, ref_counts)
+        for agent_instance_id in self.conversation_port.agent_record_id_list():
+            self._count_refs(self.conversation_port.load_agent_record(agent_instance_id), ref_counts)
+        # 清除：删除没有被引用的附件
+        return self.attachment_port.collect_garbage(ref_counts, grace_seconds=self.gc_grace_seconds)
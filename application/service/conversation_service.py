@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Optional, AsyncIterator
 
 from application.domain.conversation import Conversation, DialogSegment
 from common.core.container.annotate import component
@@ -25,26 +25,54 @@ class ConversationService(ConversationCase):
     async def conversation_load_list(self) -> List[Conversation]:
         return self.conversation_port.conversation_load_list()
 
-    async def conversation_load(self, conversation_id: str) -> Optional[Conversation]:
-        conversation: Conversation = self.conversation_port.conversation_load(conversation_id)
+    async def conversation_load(self, conversation_id: str, limit: Optional[int] = None, before: Optional[str] = None) -> Optional[Conversation]:
+        conversation: Conversation = self.conversation_port.conversation_load(conversation_id, limit=limit, before=before)
         if not conversation:
             return None
-        # 装载工具调用记录
+        # 装载工具调用记录，一次读取后按对话片段分配；分页时只读取本页对话片段的记录
+        dialog_segment_ids = None if limit is None and before is None else [dialog_segment.id for dialog_segment in conversation.dialog_segment_list]
+        tool_calls_map = self.tools_port.load_instance_map(conversation_id, dialog_segment_ids=dialog_segment_ids)
         for dialog_segment in conversation.dialog_segment_list:
-            dialog_segment.tool_calls = self.tools_port.load_instance(conversation_id=conversation_id, dialog_segment_id=dialog_segment.id)
+            dialog_segment.tool_calls = tool_calls_map.get(dialog_segment.id, [])
         return conversation
 
+    async def conversation_stream(self, conversation_id: str, limit: Optional[int] = None, before: Optional[str] = None) -> AsyncIterator[Conversation | DialogSegment]:
+        # 只读取会话信息，对话片段按页懒加载
+        conversation: Conversation = self.conversation_port.conversation_load(conversation_id, limit=0)
+        if not conversation:
+            return
+        dialog_segments, conversation.has_more = self.conversation_port.dialog_segment_iter(conversation_id, limit=limit, before=before)
+        conversation.dialog_segment_list = None
+        yield conversation
+        dialog_segment_ids = None
+        if limit is not None or before is not None:
+            # 一页的对话片段数量有限，先取出本页再只读取这些片段的工具调用记录
+            dialog_segments = list(dialog_segments)
+            dialog_segment_ids = [dialog_segment.id for dialog_segment in dialog_segments]
+        tool_calls_map = self.tools_port.load_instance_map(conversation_id, dialog_segment_ids=dialog_segment_ids)
+        for dialog_segment in dialog_segments:
+            dialog_segment.tool_calls = tool_calls_map.get(dialog_segment.id, [])
+            yield dialog_segment
+
     async def conversation_update_theme(self, conversation_id: str, theme: str) -> Conversation:
         return self.conversation_port.conversation_update(Conversation.from_update_theme(id=conversation_id, theme=theme))
 
     async def conversation_remove_dialog_segment(self, conversation_id: str, dialog_segment_id: str) -> str:
         logger.info(f"删除会话片段 ---> [dialog_segment_id={dialog_segment_id}, conversation_id={conversation_id}]")
-        return self.conversation_port.dialog_segment_remove(dialog_segment_id=dialog_segment_id, conversation_id=conversation_id)
+        result = self.conversation_port.dialog_segment_remove(dialog_segment_id=dialog_segment_id, conversation_id=conversation_id)
+        if not self.conversation_port.conversation_load(conversation_id, limit=0):
+            # 只剩一条对话片段时会话随之删除，同时删除工具调用记录
+            self.tools_port.remove_instances(conversation_id)
+        return result
 
     async def conversation_remove(self, conversation_id_list: List[str]) -> int:
         logger.info(f"删除会话集合 ---> {conversation_id_list}")
         count = 0
         for conversation_id in conversation_id_list:
             self.conversation_port.conversation_remove(conversation_id)
+            self.tools_port.remove_instances(conversation_id)
             count += 1
         return count
+
+    async def tool_result_load(self, result_id: str) -> Optional[List[str]]:
+        return self.tools_port.load_result(result_id)
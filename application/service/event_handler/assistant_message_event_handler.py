@@ -5,10 +5,9 @@ from application.port.outbound.task_port import TaskPort
 from common.core.container.annotate import component
 from application.port.outbound.ws_message_port import WsMessagePort
 from application.port.outbound.tools_port import ToolsPort
-from application.domain.events.event_collector import EventCollector
+from application.domain.events.event_collector import EventCollector, GroupAccumulator
 from application.port.outbound.conversation_port import ConversationPort
 from application.domain.conversation import DialogSegment
-from copy import deepcopy
 from common.core.logger import get_logger
 import injector
 from typing import List, Dict, Any
@@ -67,56 +66,40 @@ class AssistantMessageEventHandler(EventHandler):
             logger.error(f"[{EventType.ASSISTANT_MESSAGE.value}]事件[{event.id}]处理异常[{e}]")
         # 注意同步方法中的执行的异步方法，后续的逻辑无法保证事件的顺序性
     
-    def _handle_message_group(self, group_id: str, events: List[Event]):
+    def _handle_message_group(self, group_id: str, group: GroupAccumulator):
         """
         处理消息事件组
         :param group_id: 组ID
-        :param events: 事件列表
+        :param group: 组累加器，按消息ID累加了消息内容
         """
-        # 按照消息ID分组，但保持每个消息ID内的事件顺序
-        message_groups = {}
-        for event in events:
-            if event.sub_type == EventSubType.MESSAGE:
-                message_id = event.data['id']
-                if message_id not in message_groups:
-                    message_groups[message_id] = []
-                message_groups[message_id].append(event)
-        
-        # 处理每个消息组
-        for message_id, message_events in message_groups.items():
-            # 合并消息内容，按照事件的原始顺序
-            full_content = ""
-            full_reasoning_content = ""
-            for event in message_events:
-                if event.data['content']:
-                    full_content += event.data['content']
-                if event.data['reasoning_content']:
-                    full_reasoning_content += event.data['reasoning_content']
-            if len(message_events) > 0:
-                copy_last_event = deepcopy(message_events[-1])
-                copy_last_event.data['content'] = full_content
-                copy_last_event.data['reasoning_content'] = full_reasoning_content
-                # 保存完整消息到会话历史
-                logger.info(f"组事件[{group_id}]结束，结果：{copy_last_event.group} - {copy_last_event.data['content']}")
-                if copy_last_event.group.status == EventGroupStatus.ENDED: # 只保存正常结束的组消息
-                    # if copy_last_event.data['content']: # 连续调用工具，可能消息内容为空
-                    assistant_dialog_segment = DialogSegment.make_assistant_message(
-                        conversation_id=copy_last_event.data['conversation_id'], id=copy_last_event.data['dialog_segment_id'],
-                        content=copy_last_event.data['content'], reasoning_content=copy_last_event.data['reasoning_content'],
-                        model=copy_last_event.data['model'], firm=copy_last_event.data['firm'], timestamp=copy_last_event.data['created'], payload=copy_last_event.payload)
-                    agent_instance_id = copy_last_event.payload['agent_instance_id'] if 'agent_instance_id' in copy_last_event.payload else None
-                    if agent_instance_id:
-                        assistant_dialog_segment.payload = {"agent_instance_id": agent_instance_id}
-                        self.conversation_port.add_agent_record(dialog_segment=assistant_dialog_segment)
-                        # 创建agent call任务
-                        task = Task.from_singleton(task_type=TaskType.AGENT_CALL, data=copy_last_event.data,
-                                                   payload=copy_last_event.payload,
-                                                   client_id=copy_last_event.client_id)
-                        TaskPort.get_task_port().execute_task(task)
-                        logger.info(
-                            f"组事件[{group_id}]JSON结果发送->Agent[{agent_instance_id}]")
-                    else:
-                        self.conversation_port.conversation_add(dialog_segment=assistant_dialog_segment)
+        # 处理每个消息，按消息首次出现的顺序
+        for message_id, message in group.messages.items():
+            last_event = message.last_event
+            # 最后一个事件的数据浅拷贝后替换为完整内容，不修改原事件
+            data = dict(last_event.data)
+            data['content'] = message.content
+            data['reasoning_content'] = message.reasoning_content
+            # 保存完整消息到会话历史
+            logger.info(f"组事件[{group_id}]结束，结果：{last_event.group} - {data['content']}")
+            if last_event.group.status == EventGroupStatus.ENDED: # 只保存正常结束的组消息
+                # if data['content']: # 连续调用工具，可能消息内容为空
+                assistant_dialog_segment = DialogSegment.make_assistant_message(
+                    conversation_id=data['conversation_id'], id=data['dialog_segment_id'],
+                    content=data['content'], reasoning_content=data['reasoning_content'],
+                    model=data['model'], firm=data['firm'], timestamp=data['created'], payload=last_event.payload)
+                agent_instance_id = last_event.payload['agent_instance_id'] if 'agent_instance_id' in last_event.payload else None
+                if agent_instance_id:
+                    assistant_dialog_segment.payload = {"agent_instance_id": agent_instance_id}
+                    self.conversation_port.add_agent_record(dialog_segment=assistant_dialog_segment)
+                    # 创建agent call任务
+                    task = Task.from_singleton(task_type=TaskType.AGENT_CALL, data=data,
+                                               payload=last_event.payload,
+                                               client_id=last_event.client_id)
+                    TaskPort.get_task_port().execute_task(task)
+                    logger.info(
+                        f"组事件[{group_id}]JSON结果发送->Agent[{agent_instance_id}]")
+                else:
+                    self.conversation_port.conversation_add(dialog_segment=assistant_dialog_segment)
 
     def type(self) -> str:
         return EventType.ASSISTANT_MESSAGE.value
\ No newline at end of file
@@ -7,6 +7,7 @@ from application.port.inbound.event_handler import EventHandler
 from common.core.container.annotate import component
 from application.port.outbound.task_port import TaskPort
 from application.port.outbound.conversation_port import ConversationPort
+from application.port.outbound.generators_port import GeneratorsPort
 from common.core.errors.business_error_code import GeneratorErrorCode
 from common.core.errors.business_exception import BusinessException
 from common.core.logger import get_logger
@@ -20,14 +21,15 @@ class MessageEventHandler(EventHandler):
     用户事件处理器-普通消息
     """
     @injector.inject
-    def __init__(self, conversation_port: ConversationPort):
+    def __init__(self, conversation_port: ConversationPort, generators_port: GeneratorsPort):
         self.conversation_port = conversation_port
+        self.generators_port = generators_port
 
     def handle(self, event: Event) -> None:
         if 'context_message_list' not in event.payload:
             system = event.payload['system'] if 'system' in event.payload else None
             conversation_id = event.data['conversation_id']
-            message_list = self._make_message_list(system=system, conversation_id=conversation_id)
+            message_list = self._make_message_list(system=system, conversation_id=conversation_id, generator_id=event.data.get('generator_id'))
             event.payload['context_message_list'] = message_list
         # 构建LLM_CALL任务
         task = Task.from_singleton(task_type=TaskType.LLM_CALL, data=event.data, payload=event.payload, client_id=event.client_id)
@@ -37,7 +39,7 @@ class MessageEventHandler(EventHandler):
     def type(self) -> str:
         return EventType.USER_MESSAGE.value
 
-    def _make_message_list(self, conversation_id: str, system: Optional[str] = None) -> List[ChatStreamingChunk]:
+    def _make_message_list(self, conversation_id: str, system: Optional[str] = None, generator_id: Optional[str] = None) -> List[ChatStreamingChunk]:
         # 查询会话历史
         history_conversation = self.conversation_port.conversation_load(conversation_id=conversation_id)
         if not history_conversation:
@@ -49,6 +51,8 @@ class MessageEventHandler(EventHandler):
         if system:
             messages.append(ChatStreamingChunk.from_system(system))
         # 拼装对话上下文
-        history_message_list = history_conversation.convert_sort_memory()
+        # 图片按所用模型厂商的尺寸预处理
+        llm_generator = self.generators_port.load_generate(generator_id) if generator_id else None
+        history_message_list = history_conversation.convert_sort_memory(image_profile=llm_generator.firm if llm_generator else None)
         messages.extend(history_message_list)
         return messages
\ No newline at end of file
@@ -13,6 +13,7 @@ from application.domain.conversation import DialogSegment
 from application.port.outbound.ws_message_port import WsMessagePort
 from application.port.outbound.conversation_port import ConversationPort
 from application.port.outbound.tools_port import ToolsPort
+from application.port.outbound.generators_port import GeneratorsPort
 from typing import List, Dict, Any, Optional
 from common.core.logger import get_logger
 import json
@@ -31,10 +32,12 @@ class ToolEventHandler(EventHandler):
         ws_message_port: WsMessagePort,
         conversation_port: ConversationPort,
         tools_port: ToolsPort,
+        generators_port: GeneratorsPort,
     ):
         self.ws_message_port = ws_message_port
         self.conversation_port = conversation_port
         self.tools_port = tools_port
+        self.generators_port = generators_port
 
     def handle(self, event: Event) -> None:
         # 如果是工具调用事件，创建工具调用任务
@@ -68,7 +71,7 @@ class ToolEventHandler(EventHandler):
                 system = event.payload['system'] if 'system' in event.payload else None
                 conversation_id = event.data['conversation_id']
                 event.data['dialog_segment_id'] = create_uuid()
-                message_list = self._make_message_list(system=system, conversation_id=conversation_id)
+                message_list = self._make_message_list(system=system, conversation_id=conversation_id, generator_id=event.data.get('generator_id'))
                 event.payload['context_message_list'] = message_list
 
             event.data['tools_call_result'] = True
@@ -103,7 +106,7 @@ class ToolEventHandler(EventHandler):
         )
         self.ws_message_port.send(event)
 
-    def _make_message_list(self, conversation_id: str, system: Optional[str] = None) -> List[ChatStreamingChunk]:
+    def _make_message_list(self, conversation_id: str, system: Optional[str] = None, generator_id: Optional[str] = None) -> List[ChatStreamingChunk]:
         # 查询会话历史
         history_conversation = self.conversation_port.conversation_load(conversation_id=conversation_id)
         if not history_conversation:
@@ -115,6 +118,8 @@ class ToolEventHandler(EventHandler):
         if system:
             messages.append(ChatStreamingChunk.from_system(system))
         # 拼装对话上下文
-        history_message_list = history_conversation.convert_sort_memory()
+        # 图片按所用模型厂商的尺寸预处理，工具调用结果事件不携带厂商，按模型id查询
+        llm_generator = self.generators_port.load_generate(generator_id) if generator_id else None
+        history_message_list = history_conversation.convert_sort_memory(image_profile=llm_generator.firm if llm_generator else None)
         messages.extend(history_message_list)
         return messages
\ No newline at end of file
@@ -112,9 +112,7 @@ class GeneratorService(ModelCase, GeneratorsCase):
         #     print(a)
 
         # 工具装载
-        tools: List[Tool] = []
-        for mcp_name in mcp_name_list:
-            tools.extend(await self.tools_port.load_tools(group_name=mcp_name, tool_type=ToolType.MCP))
+        tools: List[Tool] = (await self.tools_port.load_tools_concurrently(mcp_name_list=mcp_name_list)).tools
 
         di = self.generators_port.generate_test(llm_generator=llm_generator, messages=message_list, tools=tools, json_object=False)
         print(di)
@@ -134,9 +132,7 @@ class GeneratorService(ModelCase, GeneratorsCase):
         # 获取LLMGenerator
         llm_generator: LLMGenerator = self._llm_generator(generator_id)
         # 工具装载
-        tools: List[Tool] = []
-        for mcp_name in mcp_name_list:
-            tools.extend(await self.tools_port.load_tools(group_name=mcp_name, tool_type=ToolType.MCP))
+        tools: List[Tool] = (await self.tools_port.load_tools_concurrently(mcp_name_list=mcp_name_list)).tools
         message_list = []
         message_list.append(ChatStreamingChunk.from_system(message=read("test_prompt.md")))
         message_list.append(ChatStreamingChunk.from_user(message=query))
@@ -236,6 +232,16 @@ class GeneratorService(ModelCase, GeneratorsCase):
             self.event_port.emit_event(event)
         return conversation_id, dialog_segment_id
 
+    async def prewarm(self, generator_id: str, mcp_name_list: Optional[List[str]] = None) -> Dict[str, Any]:
+        llm_generator = self._llm_generator(generator_id)
+        # 建立连接是阻塞调用，在线程中执行，同时加载mcp工具
+        connect = asyncio.create_task(asyncio.to_thread(self.generators_port.prewarm, llm_generator))
+        # 超时的 server 在后台继续加载，完成后写入工具注册表
+        tools_count = len((await self.tools_port.load_tools_concurrently(mcp_name_list=mcp_name_list)).tools)
+        connect_ms = await connect
+        logger.info(f"预热对话：[模型：{generator_id} - 建立连接：{connect_ms}ms - 工具：{tools_count}]")
+        return {"generator_id": generator_id, "firm": llm_generator.firm, "connect_ms": connect_ms, "tools": tools_count}
+
     async def stop_generate(self, conversation_id: str, client_id: str) -> str:
         self.cache_port.set_data(name=CONVERSATION_STOP_FLAG_KEY, key=conversation_id, value=True)
         return conversation_id
@@ -352,11 +358,9 @@ class GeneratorService(ModelCase, GeneratorsCase):
 
     def _llm_generator(self, generator_id: str) -> LLMGenerator:
         # 获取厂商api key
-        llm_generator: LLMGenerator = self.generators_port.load_generate(generator_id)
+        llm_generator: LLMGenerator = self.generators_port.resolve(generator_id)
         if llm_generator is None:
             raise BusinessException(error_code=GeneratorErrorCode.GENERATOR_NOT_FOUND, dynamics_message=generator_id)
-        firm: GeneratorFirm = self.user_setting_port.load_firm_setting(llm_generator.firm)
-        llm_generator.set_api_key_secret(firm.api_key)
         llm_generator.check_firm_api_key()
         return llm_generator
 
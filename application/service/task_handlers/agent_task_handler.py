@@ -11,8 +11,6 @@ from application.port.outbound.agent_port import AgentPort
 from application.port.outbound.tools_port import ToolsPort
 from application.port.outbound.generators_port import GeneratorsPort
 from application.domain.generators.generator import LLMGenerator
-from application.port.outbound.user_setting_port import UserSettingPort
-from application.domain.generators.firm import GeneratorFirm
 from common.core.errors.business_error_code import GeneratorErrorCode
 from common.core.errors.business_exception import BusinessException
 
@@ -33,14 +31,12 @@ class AgentTaskHandler(TaskHandler):
         conversation_port: ConversationPort,
         generators_port: GeneratorsPort,
         ws_message_port: WsMessagePort,
-        user_setting_port: UserSettingPort,
     ):
         self.agent_port = agent_port
         self.tools_port = tools_port
         self.event_port = event_port
         self.generators_port = generators_port
         self.ws_message_port = ws_message_port
-        self.user_setting_port = user_setting_port
         self.conversation_port = conversation_port
 
     def execute(self, task: Task):
@@ -101,10 +97,8 @@ class AgentTaskHandler(TaskHandler):
 
     def _llm_generator(self, generator_id: str) -> LLMGenerator:
         # 获取厂商api key
-        llm_generator: LLMGenerator = self.generators_port.load_generate(generator_id)
+        llm_generator: LLMGenerator = self.generators_port.resolve(generator_id)
         if llm_generator is None:
             raise BusinessException(error_code=GeneratorErrorCode.GENERATOR_NOT_FOUND, dynamics_message=generator_id)
-        firm: GeneratorFirm = self.user_setting_port.load_firm_setting(llm_generator.firm)
-        llm_generator.set_api_key_secret(firm.api_key)
         llm_generator.check_firm_api_key()
         return llm_generator
\ No newline at end of file
@@ -17,8 +17,6 @@ from application.port.outbound.agent_port import AgentPort
 from application.port.outbound.tools_port import ToolsPort
 from application.port.outbound.generators_port import GeneratorsPort
 from application.domain.generators.generator import LLMGenerator
-from application.port.outbound.user_setting_port import UserSettingPort
-from application.domain.generators.firm import GeneratorFirm
 from application.service.prompts.orchestration import ORCHESTRATOR_PROGRESS_LEDGER_PROMPT, ORCHESTRATOR_SYSTEM_MESSAGE_EXECUTION, INSTRUCTION_AGENT_FORMAT
 from common.core.errors.business_error_code import GeneratorErrorCode
 from common.core.errors.business_exception import BusinessException
@@ -43,7 +41,6 @@ class AgentTaskResultHandler(TaskHandler):
         conversation_port: ConversationPort,
         generators_port: GeneratorsPort,
         ws_message_port: WsMessagePort,
-        user_setting_port: UserSettingPort,
         plan_port: PlanPort,
     ):
         self.agent_port = agent_port
@@ -52,7 +49,6 @@ class AgentTaskResultHandler(TaskHandler):
         self.cache_port = cache_port
         self.generators_port = generators_port
         self.ws_message_port = ws_message_port
-        self.user_setting_port = user_setting_port
         self.conversation_port = conversation_port
         self.plan_port = plan_port
 
@@ -162,11 +158,9 @@ class AgentTaskResultHandler(TaskHandler):
 
     def _llm_generator(self, generator_id: str) -> LLMGenerator:
         # 获取厂商api key
-        llm_generator: LLMGenerator = self.generators_port.load_generate(generator_id)
+        llm_generator: LLMGenerator = self.generators_port.resolve(generator_id)
         if llm_generator is None:
             raise BusinessException(error_code=GeneratorErrorCode.GENERATOR_NOT_FOUND, dynamics_message=generator_id)
-        firm: GeneratorFirm = self.user_setting_port.load_firm_setting(llm_generator.firm)
-        llm_generator.set_api_key_secret(firm.api_key)
         llm_generator.check_firm_api_key()
         return llm_generator
 
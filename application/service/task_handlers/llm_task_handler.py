@@ -8,8 +8,6 @@ from common.utils.common_utils import create_uuid, CONVERSATION_STOP_FLAG_KEY
 from common.utils.json_file_util import JSONFileUtil
 from common.utils.time_utils import create_from_second_now_to_int
 from application.port.outbound.event_port import EventPort
-from application.domain.generators.firm import GeneratorFirm
-from application.port.outbound.user_setting_port import UserSettingPort
 from application.port.outbound.generators_port import GeneratorsPort
 from application.port.outbound.tools_port import ToolsPort
 from application.port.outbound.mcp_server_port import MCPServerPort
@@ -39,14 +37,12 @@ class LLMTaskHandler(TaskHandler):
     @injector.inject
     def __init__(
         self,
-        user_setting_port: UserSettingPort,
         generators_port: GeneratorsPort,
         tools_port: ToolsPort,
         mcp_server_port: MCPServerPort,
         conversation_port: ConversationPort,
         cache_port: CachePort,
     ):
-        self.user_setting_port = user_setting_port
         self.generators_port = generators_port
         self.tools_port = tools_port
         self.mcp_server_port = mcp_server_port
@@ -71,6 +67,33 @@ class LLMTaskHandler(TaskHandler):
         )
         EventPort.get_event_port().emit_event(event)
 
+    def _load_tools(self, client_id: str, mcp_name_list: List[str], tools_group_name_list: List[str]) -> List[Tool]:
+        """
+        装载工具，各 mcp server 并发加载并单独计时，超时或失败的 server 本轮不使用
+        :param client_id: 客户端id
+        :param mcp_name_list: mcp server 名集合
+        :param tools_group_name_list: 本地工具分组名集合
+        :return: 已加载的工具集合
+        """
+        if not tools_group_name_list:
+            # 工具注册表全部命中时不需要新建事件循环
+            cached_tools_list = [self.tools_port.cached_tools(group_name=mcp_name, tool_type=ToolType.MCP) for mcp_name in mcp_name_list]
+            if all(cached_tools is not None for cached_tools in cached_tools_list):
+                return [tool for cached_tools in cached_tools_list for tool in cached_tools]
+        tools_load_result = asyncio.run(self.tools_port.load_tools_concurrently(
+            mcp_name_list=mcp_name_list, tools_group_name_list=tools_group_name_list))
+        if tools_load_result.degraded:
+            EventPort.get_event_port().emit_event(Event.from_init(
+                client_id=client_id,
+                event_type=EventType.SYSTEM,
+                event_sub_type=EventSubType.TOOLS_DEGRADED,
+                source=EventSource.LLM_HANDLER,
+                data={
+                    'degraded': tools_load_result.degraded,
+                }
+            ))
+        return tools_load_result.tools
+
     @handle_exception(default_func=_calculate_default_value)
     def execute(self, task: Task):
         logger.info(f"LLM调用任务：[任务：{task.id}]")
@@ -90,14 +113,12 @@ class LLMTaskHandler(TaskHandler):
         # 获取LLMGenerator
         llm_generator: LLMGenerator = self._llm_generator(generator_id)
         # 工具装载
-        tools: List[Tool] = []
-        for mcp_name in mcp_name_list:
-            tools.extend(asyncio.run(self.tools_port.load_tools(group_name=mcp_name, tool_type=ToolType.MCP)))
-        for tools_group_name in tools_group_name_list:
-            tools.extend(asyncio.run(self.tools_port.load_tools(group_name=tools_group_name, tool_type=ToolType.LOCAL)))
+        tools: List[Tool] = self._load_tools(client_id, mcp_name_list, tools_group_name_list)
 
         messages = []
         dialog_segment_id_list = []
+        # 工具调用记录一次读取，按对话片段取用
+        tool_calls_map = self.tools_port.load_instance_map(conversation_id) if tools_call_result else {}
         for history_message in message_list:
             messages.append(history_message)
             # 拼装工具调用历史
@@ -107,7 +128,7 @@ class LLMTaskHandler(TaskHandler):
                 if history_message.id in dialog_segment_id_list: # 避免多个相同的dialog_segment_id的工具调用查询
                     continue
                 dialog_segment_id_list.append(history_message.id)
-                tool_instance_list = self.tools_port.load_instance(conversation_id=conversation_id, dialog_segment_id=history_message.id)
+                tool_instance_list = tool_calls_map.get(history_message.id)
                 if tool_instance_list:
                     messages.extend(self._tool_calls_history(tool_instance_list))
 
@@ -248,11 +269,9 @@ class LLMTaskHandler(TaskHandler):
 
     def _llm_generator(self, generator_id: str) -> LLMGenerator:
         # 获取厂商api key
-        llm_generator: LLMGenerator = self.generators_port.load_generate(generator_id)
+        llm_generator: LLMGenerator = self.generators_port.resolve(generator_id)
         if llm_generator is None:
             raise BusinessException(error_code=GeneratorErrorCode.GENERATOR_NOT_FOUND, dynamics_message=generator_id)
-        firm: GeneratorFirm = self.user_setting_port.load_firm_setting(llm_generator.firm)
-        llm_generator.set_api_key_secret(firm.api_key)
         llm_generator.check_firm_api_key()
         return llm_generator
 
@@ -104,9 +104,12 @@ class ToolTaskHandler(TaskHandler):
             logger.info(f"需要调用工具：{tool_call.tool_call_id}-{tool_call.name}-{tool_call.arguments}")
         results = await asyncio.gather(*tool_call_task_list)
         logger.debug(f"工具调用结果：{results}")
+        tool_call_map = {tool_call.tool_call_id: tool_call for tool_call in tool_call_list}
+        finished: List[ToolInstance] = []
         for tool_call_result in results:
-            for tool_call in tool_call_list:
-                if tool_call.tool_call_id == tool_call_result['id']:
-                    tool_call.result = tool_call_result['result']
-                    # 更新工具调用实例记录的结果
-                    self.tools_port.update_instance(tool_call)
\ No newline at end of file
+            tool_call = tool_call_map.get(tool_call_result['id'])
+            if tool_call:
+                tool_call.result = tool_call_result['result']
+                finished.append(tool_call)
+        # 一次写入全部工具调用实例记录的结果
+        self.tools_port.update_instances(finished)
@@ -0,0 +1,101 @@
+"""
+模型客户端池基准测试：在本地启动 OpenAI 兼容的流式接口桩，
+对比每次新建 SDK 客户端（冷）与从 client_pool 复用客户端（热）的首 token 延迟。
+
+用法（在项目根目录下执行）：python -m benchmarks.client_pool_benchmark --count 50
+本地桩使用明文 HTTP，不包含 DNS 和 TLS 握手，真实厂商接口的差距更大。
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List
+
+from openai import OpenAI
+
+from adapter.model_sdk.client_pool import client_pool
+from adapter.model_sdk.openai.client import OpenAIClient
+from application.domain.generators.chat_chunk.chunk import ChatStreamingChunk
+from common.core.metrics import summarize
+from common.utils.auth import Secret
+
+
+def _sse_body() -> bytes:
+    chunks = []
+    for index, content in enumerate(["你好", "，", "世界"]):
+        chunks.append({
+            "id": "chatcmpl-benchmark", "object": "chat.completion.chunk", "created": 0, "model": "stub",
+            "choices": [{"index": 0, "delta": {"role": "assistant", "content": content},
+                         "finish_reason": "stop" if index == 2 else None}],
+        })
+    lines = [f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n" for chunk in chunks]
+    lines.append("data: [DONE]\n\n")
+    return "".join(lines).encode("utf-8")
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    body = _sse_body()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def measure(name: str, count: int, first_token: Callable[[], None]) -> List[float]:
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        first_token()
+        samples.append((time.perf_counter() - start) * 1000)
+    summary = summarize(samples)
+    print(f"{name:<28}avg {summary['avg']:>8.2f} ms   p50 {summary['p50']:>8.2f} ms   p99 {summary['p99']:>8.2f} ms")
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=50, help="每项测量的请求次数")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    messages = [ChatStreamingChunk.from_user(message="你好")]
+
+    def cold():
+        # 原有实现：每轮对话新建 SDK 客户端和连接池
+        client = OpenAI(api_key="sk-benchmark", base_url=base_url, timeout=30, max_retries=0)
+        stream = client.chat.completions.create(model="stub", messages=[{"role": "user", "content": "你好"}], stream=True)
+        next(iter(stream))
+        stream.close()
+        client.close()
+
+    model_client = OpenAIClient()
+
+    def warm():
+        stream = model_client.generate_stream(model="stub", message_list=messages,
+                                              api_secret=Secret.from_api_key("sk-benchmark"), base_url=base_url, tools=[])
+        next(stream)
+        stream.close()
+
+    try:
+        warm()
+        print(f"本地桩 {base_url}，{args.count} 次请求")
+        cold_samples = measure("cold (new client)", args.count, cold)
+        warm_samples = measure("warm (client_pool)", args.count, warm)
+        print(f"首 token 平均节省 {summarize(cold_samples)['avg'] - summarize(warm_samples)['avg']:.2f} ms，{client_pool.stats()}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+对话片段序列化/反序列化基准测试：对比 pydantic 校验路径（model_dump / model_validate）
+与受信任快速路径（to_record / from_record）在同一个 jsonl 文件上的吞吐量。
+
+用法（在项目根目录下执行）：python -m benchmarks.dialog_segment_codec_benchmark --count 100000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Callable, List
+
+from application.domain.conversation import DialogSegment, DialogSegmentContent, DialogSegmentMetadata, \
+    MetadataSource, MetadataType
+
+
+def make_segments(count: int, conversation_id: str) -> List[DialogSegment]:
+    segments = []
+    for i in range(count):
+        if i % 2 == 0:
+            content = [DialogSegmentContent(type="text", content=f"问题 {i}")] if i % 10 == 0 else f"问题 {i}"
+            segments.append(DialogSegment.make_user_message(content=content, conversation_id=conversation_id))
+        else:
+            segments.append(DialogSegment.make_assistant_message(
+                content=f"回答 {i} " * 20, conversation_id=conversation_id, model="gpt-4o", firm="openai",
+                timestamp=1700000000 + i, reasoning_content="思考过程", payload={"index": i},
+                metadata=DialogSegmentMetadata(source=MetadataSource.ASSISTANT, type=MetadataType.MESSAGE)))
+    return segments
+
+
+def measure(name: str, count: int, fn: Callable[[], None]) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed
+    print(f"{name:<36}{elapsed:>10.3f}s{rate:>14,.0f} records/s")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100_000, help="对话片段数量")
+    args = parser.parse_args()
+
+    segments = make_segments(args.count, conversation_id="benchmark")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_url = os.path.join(tmp_dir, "benchmark.jsonl")
+
+        def dump_validated():
+            with open(file_url, "w", encoding="utf-8") as f:
+                for segment in segments:
+                    f.write(json.dumps(segment.model_dump(), ensure_ascii=False) + "\n")
+
+        def dump_trusted():
+            with open(file_url, "w", encoding="utf-8") as f:
+                for segment in segments:
+                    f.write(json.dumps(segment.to_record(), ensure_ascii=False) + "\n")
+
+        def load_validated():
+            with open(file_url, "r", encoding="utf-8") as f:
+                for line in f:
+                    DialogSegment.model_validate(json.loads(line))
+
+        def load_trusted():
+            with open(file_url, "r", encoding="utf-8") as f:
+                for line in f:
+                    DialogSegment.from_record(json.loads(line))
+
+        print(f"{args.count:,} 条对话片段")
+        dump_before = measure("dump  model_dump", args.count, dump_validated)
+        dump_after = measure("dump  to_record", args.count, dump_trusted)
+        load_before = measure("load  model_validate", args.count, load_validated)
+        load_after = measure("load  from_record", args.count, load_trusted)
+        print(f"dump 提升 {dump_after / dump_before:.2f}x，load 提升 {load_after / load_before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
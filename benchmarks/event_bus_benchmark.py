@@ -0,0 +1,109 @@
+"""
+事件总线基准测试：多个生产者线程并发发布流式事件组（模拟多个会话同时输出），
+对比 EventAdapter（固定线程池，EFFLUX_EVENT_BUS=thread）与 AsyncEventAdapter（asyncio，EFFLUX_EVENT_BUS=asyncio）
+的吞吐量、分发延迟（发布到处理器开始执行）和线程数峰值。
+
+用法（在项目根目录下执行）：python -m benchmarks.event_bus_benchmark --groups 50 --events 200
+--work-ms 模拟处理器中的阻塞操作（如 WebSocket 发送），--interval-ms 模拟模型逐 token 输出的间隔，
+为 0 时生产者尽快发布，延迟主要是排队时间。
+"""
+import argparse
+import threading
+import time
+from typing import Dict, List, Type
+
+from adapter.event.async_event_adapter import AsyncEventAdapter
+from adapter.event.event_adapter import EventAdapter
+from application.domain.events.event import Event, EventGroup, EventGroupStatus, EventSource, EventSubType, EventType
+from application.port.inbound.event_handler import EventHandler
+from application.port.outbound.event_port import EventPort
+from common.core.metrics import summarize
+
+
+class _RecordingHandler(EventHandler):
+
+    def __init__(self, total: int, work_seconds: float):
+        self.total = total
+        self.work_seconds = work_seconds
+        self.emitted: Dict[str, float] = {}
+        self.latencies_ms: List[float] = []
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+
+    def handle(self, event: Event) -> None:
+        latency_ms = (time.perf_counter() - self.emitted[event.id]) * 1000
+        if self.work_seconds:
+            time.sleep(self.work_seconds)
+        with self.lock:
+            self.latencies_ms.append(latency_ms)
+            if len(self.latencies_ms) == self.total:
+                self.done.set()
+
+    def type(self) -> str:
+        return EventType.ASSISTANT_MESSAGE.value
+
+
+def _produce(event_port: EventPort, handler: _RecordingHandler, events: int, interval_seconds: float):
+    group_id = f"group-{threading.get_ident()}-{time.perf_counter_ns()}"
+    for index in range(events):
+        status = EventGroupStatus.SENDING
+        if index == 0:
+            status = EventGroupStatus.STARTED
+        elif index == events - 1:
+            status = EventGroupStatus.ENDED
+        event = Event.from_init(client_id="benchmark", data={"content": "字"}, event_type=EventType.ASSISTANT_MESSAGE,
+                                event_sub_type=EventSubType.MESSAGE, source=EventSource.LLM_HANDLER,
+                                group=EventGroup(id=group_id, status=status))
+        handler.emitted[event.id] = time.perf_counter()
+        event_port.emit_event(event)
+        if interval_seconds:
+            time.sleep(interval_seconds)
+
+
+def run(name: str, adapter_cls: Type[EventPort], groups: int, events: int, work_ms: float, interval_ms: float):
+    handler = _RecordingHandler(total=groups * events, work_seconds=work_ms / 1000)
+    event_port = adapter_cls([])
+    event_port.register_handler(handler)
+    peak_threads = [threading.active_count()]
+    monitoring = threading.Event()
+
+    def monitor():
+        while not monitoring.is_set():
+            peak_threads[0] = max(peak_threads[0], threading.active_count())
+            time.sleep(0.005)
+
+    threading.Thread(target=monitor, daemon=True).start()
+    producers = [threading.Thread(target=_produce, args=(event_port, handler, events, interval_ms / 1000)) for _ in range(groups)]
+    start = time.perf_counter()
+    for producer in producers:
+        producer.start()
+    for producer in producers:
+        producer.join()
+    finished = handler.done.wait(timeout=120)
+    elapsed = time.perf_counter() - start
+    monitoring.set()
+    event_port.shutdown()
+    summary = summarize(handler.latencies_ms)
+    print(f"{name:<10}{len(handler.latencies_ms) / elapsed:>10.0f} events/s   dispatch p50 {summary.get('p50', 0):>8.2f} ms"
+          f"   p99 {summary.get('p99', 0):>8.2f} ms   peak threads {peak_threads[0]:>4}"
+          f"{'' if finished else f'   未完成 {len(handler.latencies_ms)}/{groups * events}'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", type=int, default=50, help="并发的事件组（会话）数")
+    parser.add_argument("--events", type=int, default=200, help="每个事件组的事件数")
+    parser.add_argument("--work-ms", type=float, default=0.0, help="处理器每个事件的阻塞耗时")
+    parser.add_argument("--interval-ms", type=float, default=0.0, help="每个事件组发布事件的间隔")
+    parser.add_argument("--bus", choices=["thread", "asyncio", "both"], default="both", help="测试的事件总线实现")
+    args = parser.parse_args()
+
+    print(f"{args.groups} 个事件组 x {args.events} 个事件，发布间隔 {args.interval_ms} ms，处理器耗时 {args.work_ms} ms")
+    if args.bus in ("thread", "both"):
+        run("thread", EventAdapter, args.groups, args.events, args.work_ms, args.interval_ms)
+    if args.bus in ("asyncio", "both"):
+        run("asyncio", AsyncEventAdapter, args.groups, args.events, args.work_ms, args.interval_ms)
+
+
+if __name__ == "__main__":
+    main()
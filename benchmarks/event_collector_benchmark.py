@@ -0,0 +1,87 @@
+"""
+流式回复收集基准测试：模拟模型逐 token 输出一条很长的回复，事件依次交给 AssistantMessageEventHandler
+（EventCollector 收集，组结束时合并保存），统计收集期间的 Python 内存峰值（tracemalloc）、进程 RSS 峰值
+和组结束时合并保存的耗时。
+
+用法（在项目根目录下执行）：python -m benchmarks.event_collector_benchmark --tokens 30000
+每次运行只测一条回复，RSS 峰值是进程级的，对比不同实现时分别在新进程中运行。
+"""
+import argparse
+import resource
+import sys
+import time
+import tracemalloc
+
+from application.domain.conversation import DialogSegment
+from application.domain.events.event import Event, EventGroup, EventGroupStatus, EventSource, EventSubType, EventType
+from application.service.event_handler.assistant_message_event_handler import AssistantMessageEventHandler
+
+
+class _DiscardWsMessagePort:
+
+    def send(self, event: Event):
+        pass
+
+
+class _RecordingConversationPort:
+
+    def __init__(self):
+        self.saved: list = []
+
+    def conversation_add(self, dialog_segment: DialogSegment):
+        self.saved.append(dialog_segment)
+
+
+def _rss_mb() -> float:
+    # Linux 上 ru_maxrss 单位为 KB，macOS 上为字节
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=30000, help="回复的 token（chunk）数")
+    parser.add_argument("--token-text", default="字", help="每个 chunk 的内容")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="不统计 Python 内存峰值，tracemalloc 本身会增加 RSS 和耗时")
+    args = parser.parse_args()
+
+    conversation_port = _RecordingConversationPort()
+    handler = AssistantMessageEventHandler(_DiscardWsMessagePort(), conversation_port, None)
+    group_id = "benchmark-group"
+    payload = {"agent_instance_id": None, "mcp_name_list": [], "tools_group_name_list": [], "json_result": False, "json_type": None}
+    rss_before = _rss_mb()
+    if not args.no_tracemalloc:
+        tracemalloc.start()
+    finalize_ms = 0.0
+    start = time.perf_counter()
+    for index in range(args.tokens):
+        status = EventGroupStatus.SENDING
+        if index == 0:
+            status = EventGroupStatus.STARTED
+        elif index == args.tokens - 1:
+            status = EventGroupStatus.ENDED
+        event = Event.from_init(client_id="benchmark", event_type=EventType.ASSISTANT_MESSAGE, event_sub_type=EventSubType.MESSAGE,
+                                source=EventSource.LLM_HANDLER, group=EventGroup(id=group_id, status=status), payload=dict(payload),
+                                data={"id": group_id, "conversation_id": "benchmark", "dialog_segment_id": "segment", "generator_id": "gpt-4o",
+                                      "model": "gpt-4o", "firm": "openai", "content": args.token_text, "reasoning_content": None,
+                                      "created": 1700000000 + index, "finish_reason": "stop" if status == EventGroupStatus.ENDED else None})
+        if status == EventGroupStatus.ENDED:
+            finalize_start = time.perf_counter()
+            handler.handle(event)
+            finalize_ms = (time.perf_counter() - finalize_start) * 1000
+        else:
+            handler.handle(event)
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if not args.no_tracemalloc:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    saved = conversation_port.saved[0].content if conversation_port.saved else ""
+    print(f"{args.tokens} 个 chunk：总耗时 {elapsed:.2f}s，组结束合并保存 {finalize_ms:.2f} ms，"
+          f"Python 内存峰值 {peak / 1024 / 1024:.1f} MB，进程 RSS 峰值 {_rss_mb():.1f} MB（开始前 {rss_before:.1f} MB），"
+          f"保存内容 {len(saved)} 字符{'' if len(saved) == args.tokens * len(args.token_text) else '（不完整）'}")
+
+
+if __name__ == "__main__":
+    main()
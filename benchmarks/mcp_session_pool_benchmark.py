@@ -0,0 +1,90 @@
+"""
+mcp 会话池基准测试：启动一个本地 stdio mcp server，对比每次调用新建子进程和会话（冷）
+与从 mcp_session_pool 复用会话（热）的工具调用耗时。
+
+用法（在项目根目录下执行）：python -m benchmarks.mcp_session_pool_benchmark --count 20
+本地 server 直接用 python 启动，不包含 npx/uvx 解析和下载依赖的时间，真实 server 的差距更大。
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, List
+
+from mcp import ClientSession
+from mcp.client.stdio import StdioServerParameters, stdio_client
+
+from adapter.tools.mcp.mcp_session_pool import McpSessionPool
+from common.core.metrics import summarize
+
+SERVER_SOURCE = '''
+try:
+    from mcp.server.fastmcp import FastMCP
+except ImportError:
+    # mcp 2.x 中 FastMCP 改名为 MCPServer
+    from mcp.server.mcpserver import MCPServer as FastMCP
+
+app = FastMCP("benchmark")
+
+
+@app.tool()
+def add(a: int, b: int) -> int:
+    """两数相加"""
+    return a + b
+
+
+app.run()
+'''
+
+
+async def measure(name: str, count: int, call: Callable[[], Awaitable[None]]) -> List[float]:
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - start) * 1000)
+    summary = summarize(samples)
+    print(f"{name:<28}avg {summary['avg']:>9.2f} ms   p50 {summary['p50']:>9.2f} ms   p99 {summary['p99']:>9.2f} ms")
+    return samples
+
+
+async def run(count: int, parameters: StdioServerParameters):
+    pool = McpSessionPool()
+
+    async def cold():
+        # 原有实现：每次调用启动子进程并 initialize
+        async with stdio_client(parameters) as (read, write):
+            async with ClientSession(read_stream=read, write_stream=write) as session:
+                await session.initialize()
+                await session.call_tool(name="add", arguments={"a": 1, "b": 2})
+
+    async def warm():
+        await pool.run("benchmark", parameters, lambda session: session.call_tool(name="add", arguments={"a": 1, "b": 2}))
+
+    try:
+        await warm()
+        print(f"本地 stdio server，{count} 次工具调用")
+        cold_samples = await measure("cold (spawn per call)", count, cold)
+        warm_samples = await measure("warm (mcp_session_pool)", count, warm)
+        print(f"每次调用平均节省 {summarize(cold_samples)['avg'] - summarize(warm_samples)['avg']:.2f} ms，{pool.stats()}")
+    finally:
+        pool.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=20, help="每项测量的调用次数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        server_file = os.path.join(tmp_dir, "benchmark_server.py")
+        with open(server_file, "w", encoding="utf-8") as f:
+            f.write(SERVER_SOURCE)
+        parameters = StdioServerParameters(command=sys.executable, args=[server_file])
+        asyncio.run(run(args.count, parameters))
+
+
+if __name__ == "__main__":
+    main()
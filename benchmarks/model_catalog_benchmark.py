@@ -0,0 +1,86 @@
+"""
+模型目录基准测试：对比逐个厂商扫描模型文件的旧查询方式与 ModelCatalog.resolve，
+并测量厂商模型文件变化后目录重建的耗时。
+
+用法（在项目根目录下执行）：python -m benchmarks.model_catalog_benchmark --firms 8 --models 50
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Callable, Optional
+
+from adapter.model_sdk.model_catalog import ModelCatalog
+from application.domain.generators.generator import LLMGenerator
+from common.utils.json_file_util import JSONFileUtil
+
+MODEL_FILE_URL_PATTERN = "models/{firm}_model.json"
+USER_SETTING_FILE_URL = "user_setting.json"
+
+
+def legacy_load_generate(firms, generate_id: str) -> Optional[LLMGenerator]:
+    """ClientManager.load_generate 原有的实现：遍历厂商文件，每个模型再读一次文件"""
+    for firm in firms:
+        firm_model_config = JSONFileUtil(MODEL_FILE_URL_PATTERN.format(firm=firm))
+        for model_name in firm_model_config.read().keys():
+            firm_model_dict = firm_model_config.read_key(model_name)
+            if firm_model_dict['id'] == generate_id:
+                return LLMGenerator.model_validate(firm_model_dict)
+    return None
+
+
+def measure(name: str, count: int, fn: Callable[[], None]):
+    start = time.perf_counter()
+    for _ in range(count):
+        fn()
+    elapsed = (time.perf_counter() - start) / count
+    print(f"{name:<36}{elapsed * 1e6:>12.1f} us")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--firms", type=int, default=8, help="厂商数量")
+    parser.add_argument("--models", type=int, default=50, help="每个厂商启用的模型数量")
+    parser.add_argument("--count", type=int, default=200, help="每项测量的重复次数")
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            os.makedirs("models")
+            firms = {f"firm{i}": {"base_url": f"https://firm{i}.example.com/v1"} for i in range(args.firms)}
+            user_setting = {}
+            for firm in firms:
+                models = {f"{firm}-model{j}": LLMGenerator.from_init(firm=firm, model=f"{firm}-model{j}").model_dump()
+                          for j in range(args.models)}
+                with open(MODEL_FILE_URL_PATTERN.format(firm=firm), "w", encoding="utf-8") as f:
+                    json.dump(models, f, indent=4)
+                user_setting[firm] = {"id": firm, "name": firm, "model_list": None, "base_url": None, "api_key": "sk-test"}
+            with open(USER_SETTING_FILE_URL, "w", encoding="utf-8") as f:
+                json.dump(user_setting, f, indent=4)
+            # 最后一个厂商的最后一个模型，旧实现需要扫描全部文件
+            last_firm = list(firms)[-1]
+            generate_id = JSONFileUtil(MODEL_FILE_URL_PATTERN.format(firm=last_firm)).read_key(f"{last_firm}-model{args.models - 1}")["id"]
+
+            catalog = ModelCatalog(firms=firms, user_setting_file_url=USER_SETTING_FILE_URL,
+                                   model_file_url_pattern=MODEL_FILE_URL_PATTERN)
+            print(f"{args.firms} 个厂商 x {args.models} 个模型")
+            legacy = measure("legacy load_generate", args.count, lambda: legacy_load_generate(firms, generate_id))
+            catalog.resolve(generate_id)
+            resolved = measure("catalog resolve (warm)", args.count * 10, lambda: catalog.resolve(generate_id))
+
+            def rebuild():
+                catalog.invalidate()
+                catalog.resolve(generate_id)
+
+            measure("catalog rebuild + resolve", args.count, rebuild)
+            print(f"resolve 提升 {legacy / resolved:.0f}x，{catalog.stats()}")
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
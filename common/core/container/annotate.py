@@ -1,4 +1,24 @@
+import os
+
 
 def component(cls):
     setattr(cls, '__component__', True)  # 标记这个类是 injectable
-    return cls
\ No newline at end of file
+    return cls
+
+def conditional_on_env(env_key: str, env_value: str, match_if_missing: bool = False):
+    """
+    按环境变量决定是否标记为组件，用于同一个端口存在多个实现时按配置选择
+    :param env_key: 环境变量名
+    :param env_value: 期望的环境变量值（忽略大小写）
+    :param match_if_missing: 环境变量未设置（或为空）时是否注册
+    """
+    def decorator(cls):
+        value = os.environ.get(env_key)
+        if not value:
+            matched = match_if_missing
+        else:
+            matched = value.strip().lower() == env_value.lower()
+        if matched:
+            setattr(cls, '__component__', True)
+        return cls
+    return decorator
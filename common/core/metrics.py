@@ -0,0 +1,59 @@
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Iterable
+
+# 指标提供者，名字 -> 返回指标字典的函数
+_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+_providers_lock = threading.Lock()
+
+
+def register_metrics(name: str, provider: Callable[[], Dict[str, Any]]):
+    """
+    注册指标提供者，同名覆盖
+    :param name: 指标分组名
+    :param provider: 返回指标字典的函数
+    """
+    with _providers_lock:
+        _providers[name] = provider
+
+
+def collect_metrics() -> Dict[str, Any]:
+    """收集所有已注册的指标"""
+    with _providers_lock:
+        providers = dict(_providers)
+    return {name: provider() for name, provider in providers.items()}
+
+
+def summarize(samples: Iterable[float]) -> Dict[str, Any]:
+    """统计样本的数量、平均值和分位数"""
+    values = sorted(samples)
+    if not values:
+        return {"count": 0}
+
+    def percentile(p: float) -> float:
+        return values[min(len(values) - 1, int(p * len(values)))]
+
+    return {
+        "count": len(values),
+        "avg": sum(values) / len(values),
+        "p50": percentile(0.5),
+        "p99": percentile(0.99),
+        "max": values[-1],
+    }
+
+
+class SampleWindow:
+    """保留最近若干个样本，用于计算分布"""
+
+    def __init__(self, maxlen: int = 4096):
+        self._samples = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, value: float):
+        with self._lock:
+            self._samples.append(value)
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            samples = list(self._samples)
+        return summarize(samples)
@@ -11,3 +11,7 @@ CURRENT_CONVERSATION_AGENT_INSTANCE_ID = "CURRENT_CONVERSATION_AGENT_INSTANCE_ID
 
 # 常量
 SINGLETON_WEBSOCKET_CLIENT_ID = "SINGLETON_CLIENT" # ws会话单例ID
+
+# 配置项（环境变量）
+CONVERSATION_STORE_ENV_KEY = "EFFLUX_CONVERSATION_STORE" # 会话存储实现：jsonl（默认）/ sqlite
+EVENT_BUS_ENV_KEY = "EFFLUX_EVENT_BUS" # 事件总线实现：thread（默认）/ asyncio
@@ -39,6 +39,31 @@ def del_file(file_url: str):
     else:
         print(f"File {file_url} does not exist.")
 
+def read_last_line(file_url: str, block_size: int = 4096) -> Optional[str]:
+    """
+    从文件末尾反向分块读取最后一个非空行，不需要遍历整个文件
+    :param file_url: 文件路径
+    :param block_size: 每次向前读取的字节数
+    :return: 最后一行内容，文件不存在或为空时返回 None
+    """
+    if not os.path.exists(file_url):
+        return None
+    with open(file_url, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        buffer = b''
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            buffer = f.read(read_size) + buffer
+            stripped = buffer.rstrip(b'\r\n')
+            index = stripped.rfind(b'\n')
+            if index >= 0:
+                return stripped[index + 1:].decode('utf-8')
+        stripped = buffer.rstrip(b'\r\n')
+        return stripped.decode('utf-8') if stripped else None
+
 def open_and_base64(file_path: str) -> str:
     with open(file_path, "rb") as f:
         file_content = f.read()
@@ -0,0 +1,177 @@
+import base64
+import hashlib
+import io
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from cachetools import LRUCache
+from PIL import ExifTags, Image, ImageOps
+
+from common.core.logger import get_logger
+from common.core.metrics import register_metrics
+
+logger = get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class ImageProfile:
+    """图片预处理参数"""
+    # 长边最大像素
+    max_side: int
+    # 像素总数上限，为空时不限制
+    max_pixels: Optional[int] = None
+    # 不透明图片重新编码的 JPEG 质量，含透明通道的图片编码为 PNG
+    jpeg_quality: int = 85
+
+
+# 各厂商建议的图片尺寸，超过后由服务端缩放，提前缩小可以减少上传的数据量
+# 键为厂商名（LLMGenerator.firm），Gemini 的厂商名为 google，未列出的厂商使用 default
+IMAGE_PROFILES: Dict[str, ImageProfile] = {
+    "default": ImageProfile(max_side=2048),
+    "openai": ImageProfile(max_side=2048),
+    "anthropic": ImageProfile(max_side=1568, max_pixels=1_150_000),
+    "google": ImageProfile(max_side=3072),
+}
+
+# 附件存储中的文件名即内容的 sha256，不需要再计算
+_blob_pattern = re.compile(r"(?:^|[\\/])blobs[\\/][0-9a-f]{2}[\\/][0-9a-f]{2}[\\/]([0-9a-f]{64})$")
+
+
+class ImageCache:
+    """
+    图片预处理缓存：按厂商的尺寸上限缩放并重新编码为 base64 data url，
+    结果按 (文件内容哈希, 预处理参数) 缓存在内存（按字节数限制大小）和磁盘两级，
+    构建上下文时同一张图片只处理一次。
+    """
+
+    def __init__(self, cache_dir: str = "image_cache", memory_bytes: int = 64 * 1024 * 1024):
+        """
+        :param cache_dir: 磁盘缓存目录
+        :param memory_bytes: 内存缓存的 data url 总字节数上限
+        """
+        self.cache_dir = cache_dir
+        self._memory: LRUCache = LRUCache(maxsize=memory_bytes, getsizeof=len)
+        # (路径, 修改时间, 文件大小) -> 文件内容哈希
+        self._file_hashes: LRUCache = LRUCache(maxsize=4096)
+        self._lock = threading.Lock()
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._bytes_saved = 0
+
+    def _file_hash(self, file_path: str) -> str:
+        match = _blob_pattern.search(file_path)
+        if match:
+            return match.group(1)
+        stat = os.stat(file_path)
+        key = (file_path, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            file_hash = self._file_hashes.get(key)
+        if file_hash is None:
+            sha256 = hashlib.sha256()
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    sha256.update(chunk)
+            file_hash = sha256.hexdigest()
+            with self._lock:
+                self._file_hashes[key] = file_hash
+        return file_hash
+
+    @staticmethod
+    def _profile_key(profile: ImageProfile) -> str:
+        return f"{profile.max_side}_{profile.max_pixels or 0}_{profile.jpeg_quality}"
+
+    @staticmethod
+    def _encode(file_path: str, profile: ImageProfile) -> Tuple[str, int]:
+        """缩放并编码，返回 data url 和原文件 base64 后的长度"""
+        original_size = os.path.getsize(file_path)
+        with Image.open(file_path) as image:
+            image.load()
+            original_mime_type = Image.MIME.get(image.format, "image/png")
+            # 重新编码会丢弃 EXIF 方向标记，先按方向旋转像素
+            rotated = image.getexif().get(ExifTags.Base.Orientation, 1) != 1
+            if rotated:
+                image = ImageOps.exif_transpose(image)
+            width, height = image.size
+            scale = min(1.0, profile.max_side / max(width, height))
+            if profile.max_pixels:
+                scale = min(scale, (profile.max_pixels / (width * height)) ** 0.5)
+            if scale < 1.0:
+                image = image.resize((max(1, int(width * scale)), max(1, int(height * scale))), Image.LANCZOS)
+            buffer = io.BytesIO()
+            if image.mode in ("RGBA", "LA", "P") and ("A" in image.mode or "transparency" in image.info):
+                mime_type = "image/png"
+                image.save(buffer, format="PNG", optimize=True)
+            else:
+                mime_type = "image/jpeg"
+                image.convert("RGB").save(buffer, format="JPEG", quality=profile.jpeg_quality, optimize=True)
+        encoded = buffer.getvalue()
+        if len(encoded) >= original_size and scale >= 1.0 and not rotated:
+            # 重新编码没有变小时使用原文件
+            with open(file_path, "rb") as f:
+                encoded = f.read()
+            mime_type = original_mime_type
+        data_url = f"data:{mime_type};base64,{base64.b64encode(encoded).decode('utf-8')}"
+        return data_url, (original_size + 2) // 3 * 4
+
+    def data_url(self, file_path: str, profile_name: Optional[str] = None) -> str:
+        """
+        获取图片文件预处理后的 base64 data url
+        :param file_path: 图片文件路径
+        :param profile_name: 预处理参数名（厂商名），未知时使用 default
+        """
+        profile = IMAGE_PROFILES.get(profile_name or "default", IMAGE_PROFILES["default"])
+        cache_key = f"{self._file_hash(file_path)}_{self._profile_key(profile)}"
+        with self._lock:
+            data_url = self._memory.get(cache_key)
+            if data_url is not None:
+                self._memory_hits += 1
+                return data_url
+        disk_file = os.path.join(self.cache_dir, cache_key[:2], cache_key)
+        if os.path.exists(disk_file):
+            with open(disk_file, "r", encoding="utf-8") as f:
+                data_url = f.read()
+            with self._lock:
+                self._disk_hits += 1
+                self._remember(cache_key, data_url)
+            return data_url
+        data_url, original_length = self._encode(file_path, profile)
+        os.makedirs(os.path.dirname(disk_file), exist_ok=True)
+        # 多个线程可能同时处理同一张图片，临时文件按线程区分
+        tmp_file = f"{disk_file}.{threading.get_ident()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            f.write(data_url)
+        os.replace(tmp_file, disk_file)
+        with self._lock:
+            self._misses += 1
+            self._bytes_saved += max(0, original_length - len(data_url))
+            self._remember(cache_key, data_url)
+        return data_url
+
+    def _remember(self, cache_key: str, data_url: str):
+        try:
+            self._memory[cache_key] = data_url
+        except ValueError:
+            # 单个结果超过内存缓存上限时只保存在磁盘
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._memory_hits + self._disk_hits + self._misses
+            return {
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": (self._memory_hits + self._disk_hits) / total if total else 0.0,
+                "memory_bytes": self._memory.currsize,
+                "max_memory_bytes": self._memory.maxsize,
+                "bytes_saved": self._bytes_saved,
+            }
+
+
+# 进程内共享的图片缓存
+image_cache = ImageCache(memory_bytes=int(os.environ.get("EFFLUX_IMAGE_CACHE_MEMORY_MB", "64")) * 1024 * 1024)
+register_metrics("image_cache", image_cache.stats)
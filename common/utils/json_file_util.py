@@ -1,8 +1,10 @@
 import json
 import os
 import re
+import threading
 from common.core.logger import get_logger
-from typing import Optional, Dict, Any
+from common.core.metrics import register_metrics
+from typing import Optional, Dict, Any, Tuple
 
 from common.utils.file_util import current_directory
 
@@ -10,6 +12,89 @@ from common.utils.file_util import current_directory
 logger = get_logger(__name__)
 
 
+def _copy_json(obj: Any) -> Any:
+    """复制解析后的 json 数据，只包含 dict / list / 基本类型，比 deepcopy 快"""
+    obj_type = type(obj)
+    if obj_type is dict:
+        return {key: _copy_json(value) for key, value in obj.items()}
+    if obj_type is list:
+        return [_copy_json(value) for value in obj]
+    return obj
+
+
+class _DocumentCache:
+    """
+    进程内的 json 文件缓存，按绝对路径缓存解析结果，以 st_mtime_ns 和文件大小校验，
+    文件被外部修改后重新解析。缓存的数据不会被原地修改，写入时整体替换。
+    """
+
+    def __init__(self):
+        # 路径 -> (修改时间, 文件大小, 数据)
+        self._documents: Dict[str, Tuple[int, int, Any]] = {}
+        self._path_locks: Dict[str, threading.RLock] = {}
+        # 路径 -> 进程内写入次数，修改时间精度不足时用于判断文件是否变化
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.parses = 0
+        self.parses_avoided = 0
+        self.writes = 0
+
+    def path_lock(self, path: str) -> threading.RLock:
+        with self._lock:
+            path_lock = self._path_locks.get(path)
+            if path_lock is None:
+                path_lock = threading.RLock()
+                self._path_locks[path] = path_lock
+            return path_lock
+
+    def get(self, path: str) -> Any:
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._documents.get(path)
+            if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+                self.parses_avoided += 1
+                return entry[2]
+        with open(path, 'r', encoding='utf-8') as f:
+            file_content = f.read().strip()
+        # 如果文件为空，返回空字典
+        data = json.loads(file_content) if file_content else {}
+        with self._lock:
+            self.parses += 1
+            self._documents[path] = (stat.st_mtime_ns, stat.st_size, data)
+        return data
+
+    def put(self, path: str, data: Any):
+        """先写临时文件再替换，写入中途崩溃不会留下不完整的文件"""
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        stat = os.stat(path)
+        with self._lock:
+            self.writes += 1
+            self._versions[path] = self._versions.get(path, 0) + 1
+            self._documents[path] = (stat.st_mtime_ns, stat.st_size, data)
+
+    def version(self, path: str) -> int:
+        with self._lock:
+            return self._versions.get(path, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.parses + self.parses_avoided
+            return {
+                "documents": len(self._documents),
+                "parses": self.parses,
+                "parses_avoided": self.parses_avoided,
+                "hit_rate": self.parses_avoided / total if total else 0.0,
+                "writes": self.writes,
+            }
+
+
+_document_cache = _DocumentCache()
+register_metrics("json_file_cache", _document_cache.stats)
+
+
 class JSONFileUtil:
     def __init__(self, file_path):
         """初始化工具类，指定 JSON 文件路径"""
@@ -29,29 +114,31 @@ class JSONFileUtil:
             logger.info(f"已创建空 JSON 文件：{self.file_path}")
         else:
             logger.debug(f"文件 {self.file_path} 已存在，准备操作。")
+        self._cache_key = os.path.abspath(self.file_path)
 
-    def _read_json(self) -> dict:
-        """私有方法，读取 JSON 文件内容"""
-        logger.debug(f"读取文件 {self.file_path} 中的数据.")
+    def signature(self) -> Tuple[int, int, int]:
+        """文件版本签名 (修改时间, 文件大小, 进程内写入次数)，签名不变时文件内容没有变化"""
+        stat = os.stat(self._cache_key)
+        return stat.st_mtime_ns, stat.st_size, _document_cache.version(self._cache_key)
+
+    def _cached_json(self) -> Any:
+        """私有方法，读取缓存的 JSON 数据，调用方不能修改返回值"""
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                # 如果文件为空，返回空字典
-                file_content = f.read().strip()
-                if not file_content:  # 如果文件内容为空
-                    return {}
-                data = json.loads(file_content)
-                logger.debug(f"成功读取数据: {data}")
-                return data
+            return _document_cache.get(self._cache_key)
         except Exception as e:
             logger.error(f"读取 JSON 文件失败: {e}")
             raise
 
+    def _read_json(self) -> dict:
+        """私有方法，读取 JSON 文件内容，返回可修改的副本"""
+        logger.debug(f"读取文件 {self.file_path} 中的数据.")
+        return _copy_json(self._cached_json())
+
     def _write_json(self, data):
-        """私有方法，将数据写入 JSON 文件"""
-        logger.debug(f"正在将数据写入文件 {self.file_path}: {data}")
+        """私有方法，将数据写入 JSON 文件，data 写入后归缓存所有"""
+        logger.debug(f"正在将数据写入文件 {self.file_path}")
         try:
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
+            _document_cache.put(self._cache_key, data)
             logger.info(f"成功写入数据到文件 {self.file_path}.")
         except Exception as e:
             logger.error(f"写入 JSON 文件失败: {e}")
@@ -65,51 +152,55 @@ class JSONFileUtil:
     def write(self, data):
         """将数据写入 JSON 文件"""
         logger.debug(f"将数据写入文件 {self.file_path}.")
-        self._write_json(data)
+        with _document_cache.path_lock(self._cache_key):
+            self._write_json(_copy_json(data))
 
     def append(self, new_data):
         """向现有 JSON 文件中添加数据"""
         logger.debug(f"尝试向文件 {self.file_path} 追加数据: {new_data}")
-        current_data = self._read_json()
-
-        if isinstance(current_data, dict) and isinstance(new_data, dict):
-            current_data.update(new_data)
-            logger.debug(f"更新字典数据: {current_data}")
-        elif isinstance(current_data, list) and isinstance(new_data, list):
-            current_data.extend(new_data)
-            logger.debug(f"向列表中追加数据: {current_data}")
-        else:
-            logger.error(f"当前文件内容和追加的数据类型不匹配，无法追加.")
-            raise ValueError("当前文件内容和追加的数据类型不匹配")
+        with _document_cache.path_lock(self._cache_key):
+            current_data = self._cached_json()
+
+            if isinstance(current_data, dict) and isinstance(new_data, dict):
+                current_data = {**current_data, **_copy_json(new_data)}
+                logger.debug(f"更新字典数据: {current_data}")
+            elif isinstance(current_data, list) and isinstance(new_data, list):
+                current_data = current_data + _copy_json(new_data)
+                logger.debug(f"向列表中追加数据: {current_data}")
+            else:
+                logger.error(f"当前文件内容和追加的数据类型不匹配，无法追加.")
+                raise ValueError("当前文件内容和追加的数据类型不匹配")
 
-        self._write_json(current_data)
+            self._write_json(current_data)
 
     def delete(self, key):
         """根据键删除 JSON 文件中的数据"""
         logger.debug(f"尝试删除文件 {self.file_path} 中的键 {key}.")
-        data = self._read_json()
+        with _document_cache.path_lock(self._cache_key):
+            data = self._cached_json()
 
-        if isinstance(data, dict) and key in data:
-            del data[key]
-            logger.info(f"成功删除键 {key} 的数据.")
-        else:
-            logger.error(f"未找到键 {key}")
-        self._write_json(data)
+            if isinstance(data, dict) and key in data:
+                # 浅复制顶层后删除，缓存中的数据不被修改
+                data = {k: v for k, v in data.items() if k != key}
+                logger.info(f"成功删除键 {key} 的数据.")
+            else:
+                logger.error(f"未找到键 {key}")
+            self._write_json(data)
 
     def pretty_print(self):
         """打印出 JSON 文件内容"""
         logger.debug(f"打印文件 {self.file_path} 的内容.")
-        data = self._read_json()
+        data = self._cached_json()
         print(json.dumps(data, indent=4, ensure_ascii=False))
         logger.debug(f"打印内容:\n{json.dumps(data, indent=4, ensure_ascii=False)}")
 
     def read_key(self, key_path):
         """读取指定路径的键的数据，支持递归查找"""
         logger.debug(f"尝试读取文件 {self.file_path} 中的键 {key_path}.")
-        data = self._read_json()
-        # 只处理一级键
+        data = self._cached_json()
+        # 只处理一级键，只复制该键的数据
         if isinstance(data, dict) and key_path in data:
-            result = data[key_path]
+            result = _copy_json(data[key_path])
             logger.debug(f"成功读取键 {key_path} 的数据: {result}")
             return result
         else:
@@ -118,16 +209,18 @@ class JSONFileUtil:
     def update_key(self, key_path, new_value):
         """更新指定路径的键的数据，支持递归更新"""
         logger.debug(f"尝试更新文件 {self.file_path} 中的键 {key_path} 的值为 {new_value}.")
-        data = self._read_json()
-        # 只处理一级键
-        if isinstance(data, dict) and key_path in data:
-            data[key_path] = new_value
-            logger.info(f"成功更新键 {key_path} 的值为 {new_value}.")
-        else:
-            logger.info(f"未找到键 {key_path}. 新增 {new_value}.")
-            data[key_path] = new_value
+        # 读取、修改、写入在同一个路径锁内，并发更新不同的键不会互相覆盖
+        with _document_cache.path_lock(self._cache_key):
+            data = self._cached_json()
+            # 只处理一级键，浅复制顶层后替换，缓存中的数据不被修改
+            data = dict(data)
+            if key_path in data:
+                logger.info(f"成功更新键 {key_path} 的值为 {new_value}.")
+            else:
+                logger.info(f"未找到键 {key_path}. 新增 {new_value}.")
+            data[key_path] = _copy_json(new_value)
 
-        self._write_json(data)
+            self._write_json(data)
 
     @staticmethod
     def extract_json_from_string(s: str) -> Optional[Any]:
@@ -0,0 +1,363 @@
+import json
+import os
+import queue
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from cachetools import LRUCache
+
+from common.core.logger import get_logger
+from common.utils.jsonl_writer import jsonl_writer
+
+logger = get_logger(__name__)
+
+# 操作记录标识字段，普通记录（无该字段）为插入
+OP_KEY = "__op__"
+OP_UPDATE = "update"
+OP_DELETE = "delete"
+
+
+class _LogState:
+    """单个日志文件的内存状态：总行数、无效行数、各主键的存活记录数"""
+
+    def __init__(self):
+        self.lines = 0
+        self.garbage = 0
+        self.keys: Counter = Counter()
+
+    def garbage_ratio(self) -> float:
+        return self.garbage / self.lines if self.lines else 0.0
+
+
+class JsonlLog:
+    """
+    追加写的 jsonl 日志：修改和删除以操作记录追加到文件末尾，读取时合并，
+    单条记录的修改只需写入该条记录，不再重写整个文件。
+    无效记录占比超过阈值时由后台线程压缩文件。
+
+    文件格式：
+      普通记录：{...}
+      更新记录：{"__op__": "update", "key": 主键, "data": {需要覆盖的字段}}
+      删除记录：{"__op__": "delete", "key": 主键}
+    """
+
+    # 触发压缩的无效记录占比及最小行数
+    compact_ratio = float(os.environ.get("EFFLUX_LOG_COMPACT_RATIO", "0.5"))
+    compact_min_lines = int(os.environ.get("EFFLUX_LOG_COMPACT_MIN_LINES", "64"))
+
+    _compact_queue: "queue.Queue[tuple[JsonlLog, str]]" = queue.Queue()
+    _compact_pending = set()
+    _compact_thread: Optional[threading.Thread] = None
+    _compact_lock = threading.Lock()
+
+    def __init__(self, key_field: str, state_cache_size: int = 256):
+        """
+        :param key_field: 记录主键字段
+        :param state_cache_size: 缓存状态的文件数量
+        """
+        self.key_field = key_field
+        self._states: LRUCache = LRUCache(maxsize=state_cache_size)
+        self._states_lock = threading.Lock() # LRUCache 非线程安全，不同文件的读写共享同一个缓存
+        self._locks: Dict[str, threading.RLock] = {}
+        self._locks_lock = threading.Lock()
+
+    def lock(self, file_url: str) -> threading.RLock:
+        with self._locks_lock:
+            file_lock = self._locks.get(file_url)
+            if file_lock is None:
+                file_lock = threading.RLock()
+                self._locks[file_url] = file_lock
+            return file_lock
+
+    def _get_state(self, file_url: str) -> Optional[_LogState]:
+        with self._states_lock:
+            return self._states.get(file_url)
+
+    def _set_state(self, file_url: str, state: Optional[_LogState]):
+        with self._states_lock:
+            if state is None:
+                self._states.pop(file_url, None)
+            else:
+                self._states[file_url] = state
+
+    @staticmethod
+    def _append_lines(file_url: str, objs: List[Dict[str, Any]]):
+        # 交给后台写入器分组提交
+        jsonl_writer.submit(file_url, "".join(json.dumps(obj, ensure_ascii=False) + "\n" for obj in objs))
+
+    def flush(self, file_url: Optional[str] = None):
+        """写入屏障，读取文件前调用"""
+        jsonl_writer.flush(file_url)
+
+    def size(self, file_url: str) -> int:
+        """文件大小，包含尚未写入的追加内容"""
+        return jsonl_writer.size(file_url)
+
+    def signature(self, file_url: str) -> Tuple[int, int]:
+        """
+        文件大小和修改时间（纳秒），用于校验缓存。先刷出积压的追加内容，修改时间只随文件内容变化
+        :return: 文件不存在时返回 (0, 0)
+        """
+        jsonl_writer.flush(file_url)
+        try:
+            stat = os.stat(file_url)
+        except FileNotFoundError:
+            return 0, 0
+        return stat.st_size, stat.st_mtime_ns
+
+    def _merge(self, file_url: str) -> tuple[List[Optional[Dict[str, Any]]], _LogState]:
+        """读取并合并文件，返回按写入顺序排列的记录槽位（已删除为 None）"""
+        state = _LogState()
+        slots: List[Optional[Dict[str, Any]]] = []
+        positions: Dict[Any, List[int]] = {}
+        jsonl_writer.flush(file_url)
+        if not os.path.exists(file_url):
+            return slots, state
+        with open(file_url, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                obj = json.loads(line)
+                state.lines += 1
+                op = obj.get(OP_KEY)
+                if op is None:
+                    positions.setdefault(obj.get(self.key_field), []).append(len(slots))
+                    slots.append(obj)
+                    continue
+                # 操作记录压缩后不再保留，计为无效记录
+                state.garbage += 1
+                indexes = positions.get(obj["key"], [])
+                if op == OP_UPDATE:
+                    for index in indexes:
+                        slots[index] = {**slots[index], **obj["data"]}
+                elif op == OP_DELETE:
+                    for index in indexes:
+                        slots[index] = None
+                        state.garbage += 1
+                    positions.pop(obj["key"], None)
+        for key, indexes in positions.items():
+            state.keys[key] = len(indexes)
+        return slots, state
+
+    def read(self, file_url: str) -> List[Dict[str, Any]]:
+        """读取合并后的全部记录"""
+        with self.lock(file_url):
+            slots, state = self._merge(file_url)
+            self._set_state(file_url, state)
+        self._check_compact(file_url, state)
+        return [slot for slot in slots if slot is not None]
+
+    def _line_key(self, line: str) -> Any:
+        """取普通记录的主键，主键为首个字段时直接截取，避免解析整行"""
+        prefix = f'{{"{self.key_field}": "'
+        if line.startswith(prefix):
+            end = line.find('"', len(prefix))
+            if end > 0 and "\\" not in line[len(prefix):end]:
+                return line[len(prefix):end]
+        return json.loads(line).get(self.key_field)
+
+    def read_page(self, file_url: str, limit: Optional[int] = None, before: Any = None) -> Tuple[Iterator[Dict[str, Any]], bool]:
+        """
+        分页读取合并后的记录，只解析当前页的记录
+        :param file_url: 文件路径
+        :param limit: 每页数量，为空时返回游标之前的全部记录
+        :param before: 游标主键，返回该记录之前的记录，为空时从最后一条开始
+        :return: 按写入顺序的当前页记录生成器，以及是否还有更早的记录
+        """
+        slots: List[Optional[list]] = []
+        positions: Dict[Any, List[int]] = {}
+        with self.lock(file_url):
+            jsonl_writer.flush(file_url)
+            if os.path.exists(file_url):
+                with open(file_url, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        if not line.startswith(f'{{"{OP_KEY}"'):
+                            key = self._line_key(line)
+                            positions.setdefault(key, []).append(len(slots))
+                            slots.append([line, []])
+                            continue
+                        obj = json.loads(line)
+                        indexes = positions.get(obj["key"], [])
+                        if obj[OP_KEY] == OP_UPDATE:
+                            for index in indexes:
+                                slots[index][1].append(obj["data"])
+                        elif obj[OP_KEY] == OP_DELETE:
+                            for index in indexes:
+                                slots[index] = None
+                            positions.pop(obj["key"], None)
+        live_indexes = [index for index, slot in enumerate(slots) if slot is not None]
+        end = len(live_indexes)
+        if before is not None:
+            before_indexes = positions.get(before)
+            if not before_indexes:
+                return iter(()), False
+            end = live_indexes.index(before_indexes[0])
+        start = max(0, end - limit) if limit is not None else 0
+        page = [slots[index] for index in live_indexes[start:end]]
+
+        def generate() -> Iterator[Dict[str, Any]]:
+            for line, patches in page:
+                obj = json.loads(line)
+                for patch in patches:
+                    obj.update(patch)
+                yield obj
+
+        return generate(), start > 0
+
+    def _state(self, file_url: str) -> _LogState:
+        state = self._get_state(file_url)
+        if state is None:
+            _, state = self._merge(file_url)
+            self._set_state(file_url, state)
+        return state
+
+    def contains(self, file_url: str, key: Any) -> bool:
+        with self.lock(file_url):
+            return self._state(file_url).keys[key] > 0
+
+    def count(self, file_url: str) -> int:
+        """存活的记录数"""
+        with self.lock(file_url):
+            return sum(self._state(file_url).keys.values())
+
+    def append(self, file_url: str, obj: Dict[str, Any]):
+        """追加普通记录"""
+        with self.lock(file_url):
+            state = self._get_state(file_url)
+            self._append_lines(file_url, [obj])
+            if state is not None:
+                state.lines += 1
+                state.keys[obj.get(self.key_field)] += 1
+
+    def update(self, file_url: str, key: Any, data: Dict[str, Any]) -> bool:
+        """
+        追加更新记录，覆盖主键对应记录的部分字段
+        :return: 主键不存在时返回 False，不写入
+        """
+        with self.lock(file_url):
+            state = self._state(file_url)
+            if state.keys[key] <= 0:
+                return False
+            self._append_lines(file_url, [{OP_KEY: OP_UPDATE, "key": key, "data": data}])
+            state.lines += 1
+            state.garbage += 1
+        self._check_compact(file_url, state)
+        return True
+
+    def update_many(self, file_url: str, updates: List[Tuple[Any, Dict[str, Any]]]) -> List[bool]:
+        """
+        批量追加更新记录，一次提交写入
+        :param updates: [(主键, 需要覆盖的字段)]
+        :return: 与 updates 对应的结果，主键不存在的不写入
+        """
+        with self.lock(file_url):
+            state = self._state(file_url)
+            applied = [state.keys[key] > 0 for key, _ in updates]
+            lines = [{OP_KEY: OP_UPDATE, "key": key, "data": data} for (key, data), ok in zip(updates, applied) if ok]
+            if lines:
+                self._append_lines(file_url, lines)
+                state.lines += len(lines)
+                state.garbage += len(lines)
+        self._check_compact(file_url, state)
+        return applied
+
+    def delete(self, file_url: str, key: Any) -> bool:
+        """
+        追加删除记录（墓碑）
+        :return: 主键不存在时返回 False，不写入
+        """
+        with self.lock(file_url):
+            state = self._state(file_url)
+            if state.keys[key] <= 0:
+                return False
+            self._append_lines(file_url, [{OP_KEY: OP_DELETE, "key": key}])
+            state.lines += 1
+            state.garbage += 1 + state.keys.pop(key)
+        self._check_compact(file_url, state)
+        return True
+
+    def replace_all(self, file_url: str, objs: List[Dict[str, Any]]):
+        """
+        以给定记录集合替换文件内容。仅有删除、修改或末尾新增时以操作记录追加，
+        顺序发生变化或主键重复时整体重写
+        """
+        with self.lock(file_url):
+            current = self.read(file_url)
+            current_map = {obj.get(self.key_field): obj for obj in current}
+            new_keys = [obj.get(self.key_field) for obj in objs]
+            if len(current_map) != len(current) or len(set(new_keys)) != len(new_keys):
+                self.rewrite(file_url, objs)
+                return
+            new_key_set = set(new_keys)
+            kept_keys = [key for key in current_map if key in new_key_set]
+            if new_keys[:len(kept_keys)] != kept_keys:
+                self.rewrite(file_url, objs)
+                return
+            for key in current_map:
+                if key not in new_key_set:
+                    self.delete(file_url, key)
+            for obj in objs:
+                key = obj.get(self.key_field)
+                if key not in current_map:
+                    self.append(file_url, obj)
+                elif current_map[key] != obj:
+                    self.update(file_url, key, obj)
+
+    def rewrite(self, file_url: str, objs: List[Dict[str, Any]]):
+        """整体重写为普通记录，先写临时文件再替换"""
+        with self.lock(file_url):
+            # 替换前写入并关闭句柄，避免积压的内容写入旧文件
+            jsonl_writer.close(file_url)
+            os.makedirs(os.path.dirname(file_url) or ".", exist_ok=True)
+            tmp_file = f"{file_url}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                f.write("".join(json.dumps(obj, ensure_ascii=False) + "\n" for obj in objs))
+            os.replace(tmp_file, file_url)
+            state = _LogState()
+            state.lines = len(objs)
+            state.keys.update(obj.get(self.key_field) for obj in objs)
+            self._set_state(file_url, state)
+
+    def forget(self, file_url: str):
+        """文件删除前调用，写入积压的内容、关闭句柄并清理内存状态"""
+        with self.lock(file_url):
+            jsonl_writer.close(file_url)
+            self._set_state(file_url, None)
+
+    def compact(self, file_url: str):
+        """合并操作记录并重写文件"""
+        with self.lock(file_url):
+            slots, state = self._merge(file_url)
+            if not state.garbage:
+                return
+            self.rewrite(file_url, [slot for slot in slots if slot is not None])
+            logger.info(f"压缩日志文件[{file_url}]：{state.lines} -> {state.lines - state.garbage} 行")
+
+    def _check_compact(self, file_url: str, state: _LogState):
+        if state.lines >= self.compact_min_lines and state.garbage_ratio() >= self.compact_ratio:
+            JsonlLog._schedule_compact(self, file_url)
+
+    @classmethod
+    def _schedule_compact(cls, log: "JsonlLog", file_url: str):
+        with cls._compact_lock:
+            if (id(log), file_url) in cls._compact_pending:
+                return
+            cls._compact_pending.add((id(log), file_url))
+            if cls._compact_thread is None or not cls._compact_thread.is_alive():
+                cls._compact_thread = threading.Thread(target=cls._compact_loop, name="jsonl-log-compactor", daemon=True)
+                cls._compact_thread.start()
+        cls._compact_queue.put((log, file_url))
+
+    @classmethod
+    def _compact_loop(cls):
+        while True:
+            log, file_url = cls._compact_queue.get()
+            with cls._compact_lock:
+                cls._compact_pending.discard((id(log), file_url))
+            try:
+                log.compact(file_url)
+            except Exception as e:
+                logger.error(f"压缩日志文件[{file_url}]失败：{e}")
@@ -0,0 +1,213 @@
+import atexit
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from cachetools import LRUCache
+
+from common.core.logger import get_logger
+from common.utils.jsonl_log_util import JsonlLog, OP_KEY, OP_UPDATE, OP_DELETE
+
+logger = get_logger(__name__)
+
+INDEX_SUFFIX = ".idx"
+
+
+class _OffsetIndex:
+    """单个日志文件的偏移索引"""
+
+    def __init__(self, inode: int = 0, file_size: int = 0, keys: Optional[Dict[str, List[int]]] = None,
+                 groups: Optional[Dict[str, List[str]]] = None):
+        self.inode = inode
+        # 已建立索引的文件大小，文件只追加写，之后的内容增量补充
+        self.file_size = file_size
+        # 主键 -> [普通记录偏移, 更新记录偏移...]
+        self.keys: Dict[str, List[int]] = keys or {}
+        # 分组字段值 -> [主键]，按写入顺序
+        self.groups: Dict[str, List[str]] = groups or {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"inode": self.inode, "file_size": self.file_size, "keys": self.keys, "groups": self.groups}
+
+
+class JsonlOffsetIndex:
+    """
+    JsonlLog 文件的持久化偏移索引，按主键或分组字段定位记录所在的行，
+    查询时只读取命中的行，不再解析整个文件。
+    索引保存在同目录的 {文件}.idx 中，以 inode 和文件大小校验：
+    文件增长时只扫描新增部分，被压缩或替换（inode 变化、文件变小）时重建。
+    索引文件延迟合并写入，进程异常退出丢失的部分在下次查询时从已保存的位置重新扫描。
+    """
+
+    def __init__(self, log: JsonlLog, group_field: Optional[str] = None, cache_size: int = 64, persist_delay: float = 2):
+        """
+        :param log: 被索引的日志
+        :param group_field: 分组字段（如对话片段id），为空时只按主键索引
+        :param cache_size: 内存中缓存的索引数量
+        :param persist_delay: 索引文件延迟写入的秒数，期间的多次更新合并为一次写入
+        """
+        self.log = log
+        self.group_field = group_field
+        self._cache: LRUCache = LRUCache(maxsize=cache_size)
+        self._cache_lock = threading.Lock()
+        self.persist_delay = persist_delay
+        # 尚未写入索引文件的索引，被缓存淘汰后仍然保留到写入
+        self._dirty: Dict[str, _OffsetIndex] = {}
+        self._persist_timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
+
+    @staticmethod
+    def _index_file(file_url: str) -> str:
+        return f"{file_url}{INDEX_SUFFIX}"
+
+    def _load(self, file_url: str) -> Optional[_OffsetIndex]:
+        with self._cache_lock:
+            index = self._cache.get(file_url) or self._dirty.get(file_url)
+        if index is not None:
+            return index
+        index_file = self._index_file(file_url)
+        if not os.path.exists(index_file):
+            return None
+        try:
+            with open(index_file, 'r', encoding='utf-8') as f:
+                return _OffsetIndex(**json.load(f))
+        except Exception as e:
+            logger.warning(f"读取索引文件[{index_file}]失败，重建索引：{e}")
+            return None
+
+    def _save(self, file_url: str, index: _OffsetIndex):
+        """更新缓存并延迟写入索引文件，调用方持有日志文件锁"""
+        with self._cache_lock:
+            self._cache[file_url] = index
+            self._dirty[file_url] = index
+            if self._persist_timer is None:
+                self._persist_timer = threading.Timer(self.persist_delay, self.flush)
+                self._persist_timer.daemon = True
+                self._persist_timer.start()
+
+    def flush(self):
+        """立即写入尚未写入的索引文件"""
+        with self._cache_lock:
+            if self._persist_timer is not None:
+                self._persist_timer.cancel()
+                self._persist_timer = None
+            file_urls = list(self._dirty)
+        for file_url in file_urls:
+            with self.log.lock(file_url):
+                with self._cache_lock:
+                    index = self._dirty.pop(file_url, None)
+                if index is None:
+                    continue
+                try:
+                    self._persist(file_url, index)
+                except Exception as e:
+                    logger.warning(f"写入索引文件[{self._index_file(file_url)}]失败：{e}")
+
+    def _persist(self, file_url: str, index: _OffsetIndex):
+        """整体写入临时文件后替换，调用方持有日志文件锁"""
+        index_file = self._index_file(file_url)
+        tmp_file = f"{index_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(index.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_file, index_file)
+
+    def _extend(self, file_url: str, index: _OffsetIndex) -> bool:
+        """从已索引的位置扫描新增的完整行，返回是否有变化"""
+        with open(file_url, 'rb') as f:
+            f.seek(index.file_size)
+            offset = index.file_size
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # 不完整的行等写入完成后再索引
+                    break
+                line_offset, offset = offset, offset + len(line)
+                if not line.strip():
+                    continue
+                obj = json.loads(line)
+                op = obj.get(OP_KEY)
+                if op is None:
+                    key = obj.get(self.log.key_field)
+                    index.keys.setdefault(key, []).append(line_offset)
+                    if self.group_field and obj.get(self.group_field) is not None:
+                        index.groups.setdefault(obj.get(self.group_field), []).append(key)
+                elif op == OP_UPDATE:
+                    if obj["key"] in index.keys:
+                        index.keys[obj["key"]].append(line_offset)
+                elif op == OP_DELETE:
+                    if index.keys.pop(obj["key"], None) is not None:
+                        for keys in index.groups.values():
+                            while obj["key"] in keys:
+                                keys.remove(obj["key"])
+        changed = offset != index.file_size
+        index.file_size = offset
+        return changed
+
+    def _current(self, file_url: str) -> Optional[_OffsetIndex]:
+        """返回与文件一致的索引，调用方持有日志文件锁"""
+        self.log.flush(file_url)
+        if not os.path.exists(file_url):
+            return None
+        stat = os.stat(file_url)
+        index = self._load(file_url)
+        if index is None or index.inode != stat.st_ino or index.file_size > stat.st_size:
+            index = _OffsetIndex(inode=stat.st_ino)
+        if self._extend(file_url, index):
+            self._save(file_url, index)
+        else:
+            with self._cache_lock:
+                self._cache[file_url] = index
+        return index
+
+    def _read_records(self, file_url: str, index: _OffsetIndex, keys: Iterable[str]) -> List[Dict[str, Any]]:
+        records = []
+        with open(file_url, 'rb') as f:
+            for key in keys:
+                offsets = index.keys.get(key)
+                if not offsets:
+                    continue
+                # 与 JsonlLog 合并规则一致：主键重复时每条普通记录各自返回，更新记录作用于此前该主键的全部记录
+                objs: List[Dict[str, Any]] = []
+                for offset in offsets:
+                    f.seek(offset)
+                    line_obj = json.loads(f.readline())
+                    if OP_KEY in line_obj:
+                        for obj in objs:
+                            obj.update(line_obj["data"])
+                    else:
+                        objs.append(line_obj)
+                records.extend(objs)
+        return records
+
+    def find(self, file_url: str, keys: Iterable[str]) -> List[Dict[str, Any]]:
+        """按主键读取合并后的记录"""
+        with self.log.lock(file_url):
+            index = self._current(file_url)
+            if index is None:
+                return []
+            return self._read_records(file_url, index, keys)
+
+    def find_group(self, file_url: str, group: Any) -> List[Dict[str, Any]]:
+        """按分组字段值读取合并后的记录，按写入顺序"""
+        return self.find_groups(file_url, [group])
+
+    def find_groups(self, file_url: str, groups: Iterable[Any]) -> List[Dict[str, Any]]:
+        """按多个分组字段值读取合并后的记录，分组内按写入顺序"""
+        with self.log.lock(file_url):
+            index = self._current(file_url)
+            if index is None:
+                return []
+            keys: Dict[str, None] = {}
+            for group in groups:
+                keys.update(dict.fromkeys(index.groups.get(group, [])))
+            return self._read_records(file_url, index, keys)
+
+    def forget(self, file_url: str):
+        """文件删除前调用，删除索引文件"""
+        with self.log.lock(file_url):
+            with self._cache_lock:
+                self._cache.pop(file_url, None)
+                self._dirty.pop(file_url, None)
+            index_file = self._index_file(file_url)
+            if os.path.exists(index_file):
+                os.remove(index_file)
@@ -0,0 +1,250 @@
+import atexit
+import os
+import threading
+import time
+from typing import IO, Any, Dict, List, Optional, Tuple
+
+from common.core.logger import get_logger
+from common.core.metrics import SampleWindow, register_metrics
+
+logger = get_logger(__name__)
+
+DURABILITY_NONE = "none" # 只写入进程缓冲区，由屏障或关闭时刷出
+DURABILITY_FLUSH = "flush" # 每个批次刷到操作系统
+DURABILITY_FSYNC = "fsync" # 每个批次 fsync 到磁盘
+
+RETRY_SECONDS = 1 # 写入失败后重试的间隔
+
+
+class JsonlWriter:
+    """
+    按文件分组提交的后台写入器：追加内容先进入队列，后台线程在时间窗口内合并同一文件的追加，
+    一次打开、一次写入。读取方在读取前调用 flush() 作为屏障，保证读到自己的写入。
+    """
+
+    def __init__(self, durability: str = DURABILITY_FLUSH, window_ms: float = 5, max_batch: int = 256,
+                 max_open_files: int = 32, idle_close_seconds: float = 10):
+        """
+        :param durability: 每批次的持久化策略 none / flush / fsync
+        :param window_ms: 合并写入的时间窗口（毫秒）
+        :param max_batch: 单个文件积压达到该数量时立即写入
+        :param max_open_files: 保持打开的文件句柄数量上限
+        :param idle_close_seconds: 空闲文件句柄的关闭时间
+        """
+        if durability not in (DURABILITY_NONE, DURABILITY_FLUSH, DURABILITY_FSYNC):
+            logger.warning(f"未知的写入持久化策略[{durability}]，使用 {DURABILITY_FLUSH}")
+            durability = DURABILITY_FLUSH
+        self.durability = durability
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.max_open_files = max_open_files
+        self.idle_close_seconds = idle_close_seconds
+        self._cond = threading.Condition()
+        # 文件 -> [(内容, 入队时间)]
+        self._pending: Dict[str, List[Tuple[str, float]]] = {}
+        self._pending_bytes: Dict[str, int] = {}
+        self._file_locks: Dict[str, threading.Lock] = {}
+        # 文件 -> (句柄, 最后使用时间)
+        self._handles: Dict[str, Tuple[IO, float]] = {}
+        # 文件 -> 经打开的句柄写入后的文件大小，包含进程缓冲区中尚未刷出的内容
+        self._handle_sizes: Dict[str, int] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._batch_sizes = SampleWindow()
+        self._latencies = SampleWindow()
+        self._records = 0
+        self._batches = 0
+
+    def _file_lock(self, file_url: str) -> threading.Lock:
+        with self._cond:
+            file_lock = self._file_locks.get(file_url)
+            if file_lock is None:
+                file_lock = threading.Lock()
+                self._file_locks[file_url] = file_lock
+            return file_lock
+
+    def submit(self, file_url: str, text: str):
+        """提交追加内容，立即返回"""
+        with self._cond:
+            batch = self._pending.setdefault(file_url, [])
+            batch.append((text, time.perf_counter()))
+            self._pending_bytes[file_url] = self._pending_bytes.get(file_url, 0) + len(text.encode('utf-8'))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="jsonl-writer", daemon=True)
+                self._thread.start()
+            if len(batch) == 1 or len(batch) >= self.max_batch:
+                self._cond.notify()
+
+    def size(self, file_url: str) -> int:
+        """文件大小，包含尚未写入和尚未刷出缓冲区的内容"""
+        with self._file_lock(file_url):
+            with self._cond:
+                handle_size = self._handle_sizes.get(file_url)
+                if handle_size is not None:
+                    return handle_size + self._pending_bytes.get(file_url, 0)
+            try:
+                disk_size = os.path.getsize(file_url)
+            except FileNotFoundError:
+                disk_size = 0
+            with self._cond:
+                return disk_size + self._pending_bytes.get(file_url, 0)
+
+    def flush(self, file_url: Optional[str] = None):
+        """
+        写入屏障：同步写入积压的内容并刷出缓冲区
+        :param file_url: 为空时刷出全部文件
+        """
+        with self._cond:
+            file_urls = [file_url] if file_url else list(set(self._pending) | set(self._handles))
+        for url in file_urls:
+            self._write_batch(url, flush=True)
+
+    def close(self, file_url: str):
+        """刷出并关闭文件句柄，文件被替换或删除前调用"""
+        with self._file_lock(file_url):
+            self._write_batch_locked(file_url, flush=True)
+            self._close_handle(file_url)
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    if not self._cond.wait(timeout=self.idle_close_seconds):
+                        break
+                if self._pending and all(len(batch) < self.max_batch for batch in self._pending.values()):
+                    # 等待时间窗口内的其他追加
+                    self._cond.wait(timeout=self.window)
+                file_urls = list(self._pending)
+            failed = False
+            for file_url in file_urls:
+                try:
+                    self._write_batch(file_url, flush=False)
+                except Exception as e:
+                    failed = True
+                    logger.error(f"写入文件[{file_url}]失败，{RETRY_SECONDS}秒后重试：{e}")
+            self._close_idle_handles()
+            if failed:
+                time.sleep(RETRY_SECONDS)
+
+    def _write_batch(self, file_url: str, flush: bool):
+        with self._file_lock(file_url):
+            self._write_batch_locked(file_url, flush)
+
+    def _write_batch_locked(self, file_url: str, flush: bool):
+        with self._cond:
+            batch = self._pending.pop(file_url, None)
+        if batch:
+            batch_bytes = sum(len(text.encode('utf-8')) for text, _ in batch)
+            try:
+                handle = self._handle(file_url)
+                handle.write("".join(text for text, _ in batch))
+                if self.durability != DURABILITY_NONE:
+                    handle.flush()
+                if self.durability == DURABILITY_FSYNC:
+                    os.fsync(handle.fileno())
+            except Exception:
+                # 批次放回队首等待重试，屏障的调用方收到异常
+                self._discard_batch(file_url, batch)
+                raise
+            now = time.perf_counter()
+            with self._cond:
+                self._pending_bytes[file_url] -= batch_bytes
+                self._handle_sizes[file_url] += batch_bytes
+                self._records += len(batch)
+                self._batches += 1
+            self._batch_sizes.add(len(batch))
+            for _, enqueued in batch:
+                self._latencies.add((now - enqueued) * 1000)
+        if flush:
+            with self._cond:
+                entry = self._handles.get(file_url)
+            if entry:
+                entry[0].flush()
+
+    def _discard_batch(self, file_url: str, batch: List[Tuple[str, float]]):
+        """写入失败时关闭句柄，截掉本批次已写入的部分，批次放回队首，调用方持有文件锁"""
+        with self._cond:
+            entry = self._handles.pop(file_url, None)
+            handle_size = self._handle_sizes.pop(file_url, None)
+            self._pending[file_url] = batch + self._pending.get(file_url, [])
+        if entry is None:
+            return
+        try:
+            entry[0].close()
+        except Exception as e:
+            logger.warning(f"关闭文件[{file_url}]失败：{e}")
+        try:
+            if handle_size is not None and os.path.getsize(file_url) > handle_size:
+                os.truncate(file_url, handle_size)
+        except OSError as e:
+            logger.warning(f"回退文件[{file_url}]未完成的写入失败：{e}")
+
+    def _handle(self, file_url: str) -> IO:
+        with self._cond:
+            entry = self._handles.get(file_url)
+        if entry is None:
+            folder_path = os.path.dirname(file_url)
+            if folder_path:
+                os.makedirs(folder_path, exist_ok=True)
+            # 不转换换行符，写入的字节数与统计的大小一致
+            entry = (open(file_url, 'a', encoding='utf-8', newline=''), time.monotonic())
+            handle_size = os.path.getsize(file_url)
+        else:
+            entry = (entry[0], time.monotonic())
+            handle_size = None
+        with self._cond:
+            self._handles[file_url] = entry
+            if handle_size is not None:
+                self._handle_sizes[file_url] = handle_size
+        return entry[0]
+
+    def _close_handle(self, file_url: str):
+        with self._cond:
+            entry = self._handles.pop(file_url, None)
+            self._handle_sizes.pop(file_url, None)
+        if entry:
+            entry[0].close()
+
+    def _close_idle_handles(self):
+        """关闭空闲或超出数量的句柄，文件正在被其他线程写入时跳过"""
+        with self._cond:
+            entries = sorted(self._handles.items(), key=lambda item: item[1][1])
+        now = time.monotonic()
+        overflow = len(entries) - self.max_open_files
+        for index, (file_url, (_, last_used)) in enumerate(entries):
+            if index >= overflow and now - last_used < self.idle_close_seconds:
+                continue
+            file_lock = self._file_lock(file_url)
+            if not file_lock.acquire(blocking=False):
+                continue
+            try:
+                with self._cond:
+                    pending = file_url in self._pending
+                if not pending:
+                    self._close_handle(file_url)
+            finally:
+                file_lock.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            pending = sum(len(batch) for batch in self._pending.values())
+            records, batches, open_files = self._records, self._batches, len(self._handles)
+        return {
+            "durability": self.durability,
+            "records": records,
+            "batches": batches,
+            "pending": pending,
+            "open_files": open_files,
+            "batch_size": self._batch_sizes.summary(),
+            "latency_ms": self._latencies.summary(),
+        }
+
+
+# 进程内共享的写入器
+jsonl_writer = JsonlWriter(
+    durability=os.environ.get("EFFLUX_LOG_DURABILITY", DURABILITY_FLUSH).strip().lower(),
+    window_ms=float(os.environ.get("EFFLUX_LOG_BATCH_WINDOW_MS", "5")),
+    max_batch=int(os.environ.get("EFFLUX_LOG_MAX_BATCH", "256")),
+)
+register_metrics("jsonl_writer", jsonl_writer.stats)
+# 进程退出前写入积压的内容
+atexit.register(jsonl_writer.flush)
@@ -0,0 +1,267 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+from common.core.logger import get_logger
+from common.core.metrics import SampleWindow
+
+logger = get_logger(__name__)
+
+OVERFLOW_BLOCK = "block" # 队列满时发布方等待（工作线程和 asyncio 事件循环中的发布方除外）
+OVERFLOW_COALESCE = "coalesce" # 队列满时与队尾任务合并，无法合并时等待
+OVERFLOW_DROP_OLDEST = "drop_oldest" # 队列满时丢弃最早的可丢弃任务，没有可丢弃任务时等待
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_COALESCE, OVERFLOW_DROP_OLDEST)
+
+# 合并函数：(队尾任务参数, 新任务参数) -> 合并后的参数，无法合并时返回 None
+MergeFunc = Callable[[Tuple, Tuple], Optional[Tuple]]
+
+
+class _Task:
+    __slots__ = ("fn", "args", "future", "label", "droppable", "enqueued_at")
+
+    def __init__(self, fn: Callable, args: Tuple, future: Future, label: str, droppable: bool):
+        self.fn = fn
+        self.args = args
+        self.future = future
+        self.label = label
+        self.droppable = droppable
+        self.enqueued_at = time.perf_counter()
+
+
+class _QueueStats:
+
+    def __init__(self):
+        self.depth = 0
+        self.max_depth = 0
+        self.max_pending = 0
+        self.overflow = OVERFLOW_BLOCK
+        self.submitted = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.blocked = 0
+        # 等待超时、在工作线程或事件循环中发布，超出上限仍入队的次数
+        self.overflowed = 0
+        self.wait_ms = SampleWindow(maxlen=1024)
+        self.blocked_ms = SampleWindow(maxlen=256)
+
+
+class KeyedExecutor:
+    """
+    按键有序的线程池：同一个键的任务按提交顺序依次执行，不同键的任务由固定数量的工作线程并行执行。
+    每个键同一时间最多被一个工作线程持有，执行完一个任务后排到就绪队列末尾，多个键之间轮流执行。
+    键为 None 的任务互不约束顺序。
+    提交时可以限制每个键的待执行任务数，超出时按溢出策略等待、合并或丢弃；按标签统计队列深度、排队时间和丢弃数量。
+    """
+
+    def __init__(self, max_workers: int = 10, thread_name_prefix: str = "keyed-executor", block_seconds: float = 30):
+        """
+        :param max_workers: 工作线程数
+        :param thread_name_prefix: 工作线程名前缀
+        :param block_seconds: 队列满时发布方最长等待时间，超时后仍然入队
+        """
+        self.max_workers = max(max_workers, 1)
+        self.thread_name_prefix = thread_name_prefix
+        self.block_seconds = block_seconds
+        self._cond = threading.Condition()
+        # 键 -> 待执行任务
+        self._tasks: Dict[Hashable, Deque[_Task]] = {}
+        # 有待执行任务且没有被工作线程持有的键
+        self._ready: Deque[Hashable] = deque()
+        # 标签 -> 待执行的无序任务数
+        self._unordered: Dict[str, int] = {}
+        self._stats: Dict[str, _QueueStats] = {}
+        self._waiters = 0
+        self._workers: List[threading.Thread] = []
+        self._local = threading.local()
+        self._shutdown = False
+
+    def submit(self, key: Optional[Hashable], fn: Callable, *args: Any, label: str = "default", max_pending: int = 0,
+               overflow: str = OVERFLOW_BLOCK, merge: Optional[MergeFunc] = None, droppable: bool = False) -> Future:
+        """
+        提交任务
+        :param key: 顺序键，相同键的任务按提交顺序执行；为 None 时不保证顺序
+        :param fn: 任务函数
+        :param label: 统计标签，也用于限制无序任务的数量
+        :param max_pending: 键（无序任务为标签）的待执行任务数上限，0 表示不限制
+        :param overflow: 溢出策略 block / coalesce / drop_oldest
+        :param merge: coalesce 策略的合并函数，只与队尾同一函数的任务合并
+        :param droppable: 该任务是否可被 drop_oldest 策略丢弃
+        :return: 任务结果，合并时返回队尾任务的结果，被丢弃时取消
+        """
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("KeyedExecutor 已关闭")
+            stats = self._stats.get(label)
+            if stats is None:
+                stats = _QueueStats()
+                self._stats[label] = stats
+            stats.max_pending = max_pending
+            stats.overflow = overflow
+            stats.submitted += 1
+            if max_pending and self._depth(key, label) >= max_pending:
+                tasks = self._tasks.get(key) if key is not None else None
+                if overflow == OVERFLOW_COALESCE and merge is not None and tasks and tasks[-1].fn == fn:
+                    merged = merge(tasks[-1].args, args)
+                    if merged is not None:
+                        tasks[-1].args = merged
+                        stats.coalesced += 1
+                        return tasks[-1].future
+                elif overflow == OVERFLOW_DROP_OLDEST and droppable and tasks:
+                    for task in tasks:
+                        if task.droppable:
+                            tasks.remove(task)
+                            self._dequeued(task)
+                            task.future.cancel()
+                            self._stats[task.label].dropped += 1
+                            break
+                if self._depth(key, label) >= max_pending:
+                    self._wait_for_room(key, label, max_pending, stats)
+            future = Future()
+            task = _Task(fn, args, future, label, droppable)
+            if key is None:
+                key = object()
+                self._unordered[label] = self._unordered.get(label, 0) + 1
+            tasks = self._tasks.get(key)
+            if tasks is None:
+                tasks = deque()
+                self._tasks[key] = tasks
+                self._ready.append(key)
+                # 有发布方在等待时同一条件上也有非工作线程，全部唤醒
+                if self._waiters:
+                    self._cond.notify_all()
+                else:
+                    self._cond.notify()
+            tasks.append(task)
+            stats.depth += 1
+            stats.max_depth = max(stats.max_depth, stats.depth)
+            if len(self._workers) < self.max_workers:
+                self._start_worker()
+        return future
+
+    def _depth(self, key: Optional[Hashable], label: str) -> int:
+        """键或无序任务标签的待执行任务数，调用方持有锁"""
+        if key is None:
+            return self._unordered.get(label, 0)
+        tasks = self._tasks.get(key)
+        return len(tasks) if tasks else 0
+
+    def _wait_for_room(self, key: Optional[Hashable], label: str, max_pending: int, stats: _QueueStats):
+        """
+        队列满时等待，调用方持有锁。以下情况不等待，超出上限直接入队：
+        在工作线程中发布（避免处理器发布事件时互相等待）；在运行中的 asyncio 事件循环中发布（避免阻塞事件循环）
+        """
+        if getattr(self._local, "worker", False) or self._in_event_loop():
+            stats.overflowed += 1
+            return
+        stats.blocked += 1
+        start = time.perf_counter()
+        deadline = time.monotonic() + self.block_seconds
+        self._waiters += 1
+        try:
+            while not self._shutdown and self._depth(key, label) >= max_pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    stats.overflowed += 1
+                    logger.warning(f"任务队列[{label} - {key}]等待超过{self.block_seconds}秒仍已满，超出上限入队")
+                    break
+                self._cond.wait(remaining)
+        finally:
+            self._waiters -= 1
+        stats.blocked_ms.add((time.perf_counter() - start) * 1000)
+
+    @staticmethod
+    def _in_event_loop() -> bool:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return True
+
+    def _dequeued(self, task: _Task):
+        """任务离开队列，调用方持有锁"""
+        self._stats[task.label].depth -= 1
+
+    def _start_worker(self):
+        """按需启动工作线程，调用方持有锁"""
+        thread = threading.Thread(target=self._work, name=f"{self.thread_name_prefix}-{len(self._workers)}", daemon=True)
+        self._workers.append(thread)
+        thread.start()
+
+    def _work(self):
+        self._local.worker = True
+        while True:
+            with self._cond:
+                while not self._ready and not self._shutdown:
+                    self._cond.wait()
+                if not self._ready:
+                    return
+                key = self._ready.popleft()
+                tasks = self._tasks[key]
+                task = tasks.popleft()
+                self._dequeued(task)
+                if type(key) is object:
+                    self._unordered[task.label] -= 1
+                if self._waiters:
+                    self._cond.notify_all()
+            self._stats[task.label].wait_ms.add((time.perf_counter() - task.enqueued_at) * 1000)
+            if task.future.set_running_or_notify_cancel():
+                try:
+                    task.future.set_result(task.fn(*task.args))
+                except BaseException as e:
+                    task.future.set_exception(e)
+            with self._cond:
+                if tasks:
+                    # 同一键的后续任务排到末尾，让其他键先执行
+                    self._ready.append(key)
+                else:
+                    del self._tasks[key]
+
+    def pending(self) -> int:
+        """待执行的任务数"""
+        with self._cond:
+            return sum(len(tasks) for tasks in self._tasks.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            deepest = sorted(((len(tasks), key) for key, tasks in self._tasks.items() if type(key) is not object),
+                             key=lambda item: item[0], reverse=True)[:5]
+            queues = {label: {
+                "depth": stats.depth,
+                "max_depth": stats.max_depth,
+                "max_pending": stats.max_pending,
+                "overflow": stats.overflow,
+                "submitted": stats.submitted,
+                "coalesced": stats.coalesced,
+                "dropped": stats.dropped,
+                "blocked": stats.blocked,
+                "overflowed": stats.overflowed,
+            } for label, stats in self._stats.items()}
+            result = {
+                "workers": len(self._workers),
+                "pending": sum(len(tasks) for tasks in self._tasks.values()),
+                "keys": len(self._tasks),
+                "deepest_keys": {str(key): depth for depth, key in deepest},
+                "blocked_producers": self._waiters,
+            }
+            stats_items = list(self._stats.items())
+        for label, stats in stats_items:
+            queues[label]["wait_ms"] = stats.wait_ms.summary()
+            queues[label]["blocked_ms"] = stats.blocked_ms.summary()
+        result["queues"] = queues
+        return result
+
+    def shutdown(self, wait: bool = False):
+        """
+        关闭线程池，已提交的任务继续执行完
+        :param wait: 是否等待工作线程退出
+        """
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+            workers = list(self._workers)
+        if wait:
+            for worker in workers:
+                worker.join()
@@ -0,0 +1,38 @@
+import copy
+from typing import Any, Dict, Type, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T", bound=BaseModel)
+
+# 模型类 -> 字段默认值
+_field_defaults: Dict[type, Dict[str, Any]] = {}
+
+
+def _defaults(cls: Type[BaseModel]) -> Dict[str, Any]:
+    defaults = _field_defaults.get(cls)
+    if defaults is None:
+        defaults = {name: field.get_default(call_default_factory=True) for name, field in cls.model_fields.items()}
+        _field_defaults[cls] = defaults
+    return defaults
+
+
+def construct_trusted(cls: Type[T], data: Dict[str, Any]) -> T:
+    """
+    用已是目标类型的字段值直接构建模型，不做校验，只用于程序自身写入的数据。
+    比 model_construct 少了逐字段处理默认值和别名的开销，缺少的字段按默认值补齐，多余的字段忽略
+    :param cls: pydantic 模型类
+    :param data: 字段值，调用后归模型所有，调用方不应再修改
+    """
+    defaults = _defaults(cls)
+    if data.keys() != defaults.keys():
+        data = {name: data[name] if name in data else default for name, default in defaults.items()}
+    instance = cls.__new__(cls)
+    object.__setattr__(instance, '__dict__', data)
+    object.__setattr__(instance, '__pydantic_fields_set__', set(data))
+    object.__setattr__(instance, '__pydantic_extra__', None)
+    # 有私有属性的模型按默认值初始化，否则访问私有属性会报错
+    private = {name: attr.default_factory() if attr.default_factory is not None else copy.deepcopy(attr.default)
+               for name, attr in cls.__private_attributes__.items()} if cls.__private_attributes__ else None
+    object.__setattr__(instance, '__pydantic_private__', private)
+    return instance
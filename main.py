@@ -11,12 +11,15 @@ from adapter.web.core.exception_registry import register_exception_handlers
 from application.port.outbound.task_port import TaskPort
 from application.port.outbound.event_port import EventPort
 from application.port.outbound.cache_port import CachePort
+from application.port.inbound.generators_case import GeneratorsCase
 from common.utils.file_util import get_resource_path
+from adapter.tools.mcp.mcp_session_pool import mcp_session_pool
 from common.utils.common_utils import CONVERSATION_STOP_FLAG_KEY, SINGLETON_WEBSOCKET_CLIENT_ID, create_uuid, \
     CURRENT_CONVERSATION_AGENT_INSTANCE_ID
 import uvicorn
 import copy
 import asyncio
+import json
 
 from common.utils.json_file_util import JSONFileUtil
 from common.utils.yaml_util import save_yaml
@@ -39,6 +42,8 @@ async def shutdown():
     get_container().get(TaskPort).shutdown()
     # 关闭事件总线
     get_container().get(EventPort).shutdown()
+    # 关闭 mcp server 进程
+    mcp_session_pool.shutdown()
 
 app.add_event_handler("startup", startup)
 app.add_event_handler("shutdown", shutdown)
@@ -156,6 +161,38 @@ include_routers_from_package('adapter.web.controller')
 
 from websockets import serve
 
+# 进行中的 ws 指令任务，保留引用避免被回收
+ws_command_tasks = set()
+
+async def ws_prewarm(websocket, command: dict):
+    """预热对话，结果以 {"type": "prewarm", "data": ...} 返回给客户端"""
+    try:
+        data = await get_container().get(GeneratorsCase).prewarm(
+            generator_id=command["generator_id"],
+            mcp_name_list=command.get("mcp_name_list"),
+        )
+        await websocket.send(json.dumps({"type": "prewarm", "data": data}, ensure_ascii=False))
+    except Exception as e:
+        logger.warning(f"预热对话失败：{e}")
+        await websocket.send(json.dumps({"type": "prewarm", "error": str(e)}, ensure_ascii=False))
+
+def ws_command(websocket, message) -> bool:
+    """
+    处理客户端发送的 json 指令，目前支持 {"type": "prewarm", "generator_id": ..., "mcp_name_list": [...]}
+    :return: 是否为指令消息
+    """
+    try:
+        command = json.loads(message)
+    except (TypeError, ValueError):
+        return False
+    if not isinstance(command, dict) or command.get("type") != "prewarm" or not command.get("generator_id"):
+        return False
+    # 不阻塞接收后续消息
+    task = asyncio.create_task(ws_prewarm(websocket, command))
+    ws_command_tasks.add(task)
+    task.add_done_callback(ws_command_tasks.discard)
+    return True
+
 async def ws_handler(websocket):
     # 假设你在路径参数中指定了 client_id，例如 ws://localhost:8765/ws?client_id=abc
     query = dict((kv.split("=") for kv in websocket.request.path.split("?")[1].split("&")))
@@ -166,6 +203,8 @@ async def ws_handler(websocket):
     logger.info(f"connection open -> client_id[{client_id}]")
     try:
         async for message in websocket:
+            if ws_command(websocket, message):
+                continue
             print(f"Received from {client_id}: {message}")
             await websocket.send(f"Echo: {message}")
     except Exception as e: